@@ -39,7 +39,9 @@ def process_pdf_with_provider(pdf_path: str, provider: str):
     embeddings = EmbeddingFactory.create(
         provider=provider,
         api_key=api_key,
-        model=model
+        model=model,
+        cache_path=Config.EMBEDDING_CACHE_PATH,
+        cache_memory_bytes=Config.EMBEDDING_CACHE_MEMORY_BYTES
     )
     
     # Initialize processor
@@ -66,11 +66,15 @@ def search_pinecone(query: str, top_k: int = 3):
     """
     print(f"\nSearching Pinecone for: {query}")
     
-    # Initialize Pinecone store
+    # Initialize Pinecone store with the model used to embed queries
     store = PineconeStore(
         api_key=Config.PINECONE_API_KEY,
         environment=Config.PINECONE_ENVIRONMENT,
-        index_name=Config.PINECONE_INDEX
+        index_name=Config.PINECONE_INDEX,
+        embeddings=MistralEmbeddings(
+            api_key=Config.MISTRAL_API_KEY,
+            model=Config.MISTRAL_MODEL
+        )
     )
     
     # Search for similar documents
@@ -80,8 +84,8 @@ def search_pinecone(query: str, top_k: int = 3):
     print("\nSearch Results:")
     for i, (doc, score) in enumerate(results, 1):
         print(f"\n{i}. {doc.metadata.title} (Score: {score:.4f})")
-        print(f"Source: {doc.metadata.source}")
-        print(f"Content Type: {doc.metadata.content_type}")
+        print(f"Source: {doc.id}")
+        print(f"Content Type: {doc.metadata.file_type}")
     
     return results
 
@@ -4,16 +4,17 @@ DocVector: Intelligent Document Processing & Vector Database Integration System
 
 __version__ = "0.1.0"
 
-from .types import Document, Chunk, Metadata
+from .types import Document, Chunk, ChunkBatch, Metadata
 from .processor import DocumentProcessor
 from .chunking import BaseChunker, SemanticChunker, CodeChunker, TokenChunker
 from .embeddings import BaseEmbeddings, OpenAIEmbeddings
-from .vector_stores import BaseVectorStore, QdrantStore, WeaviateStore, MilvusStore
+from .vector_stores import BaseVectorStore, InMemoryVectorStore, SegmentedVectorStore, QdrantStore, WeaviateStore, MilvusStore
 from .config import Config
 
 __all__ = [
     "Document",
     "Chunk",
+    "ChunkBatch",
     "Metadata",
     "DocumentProcessor",
     "BaseChunker",
@@ -23,6 +24,8 @@ __all__ = [
     "BaseEmbeddings",
     "OpenAIEmbeddings",
     "BaseVectorStore",
+    "InMemoryVectorStore",
+    "SegmentedVectorStore",
     "QdrantStore",
     "WeaviateStore",
     "MilvusStore",
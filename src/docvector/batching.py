@@ -0,0 +1,259 @@
+"""
+Batching utilities for embedding generation.
+"""
+
+import asyncio
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from .types import Chunk, ChunkBatch
+from .embeddings import BaseEmbeddings
+
+def estimate_tokens(text: str) -> int:
+    """Cheaply estimate the number of tokens in a text (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+def iter_batches(
+    texts: Sequence[str],
+    max_batch_size: int,
+    max_batch_tokens: int,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> Iterator[Tuple[int, int]]:
+    """
+    Group consecutive texts into batches that respect count and token limits.
+
+    A single text larger than max_batch_tokens is placed in a batch of its own.
+
+    Args:
+        texts (Sequence[str]): Texts to group
+        max_batch_size (int): Maximum number of texts per batch
+        max_batch_tokens (int): Maximum estimated tokens per batch
+        count_tokens (Callable[[str], int]): Token counting function
+
+    Yields:
+        Tuple[int, int]: ``(start, end)`` slice bounds of each batch
+    """
+    start = 0
+    tokens = 0
+    for i, text in enumerate(texts):
+        text_tokens = count_tokens(text)
+        if i > start and (i - start >= max_batch_size or tokens + text_tokens > max_batch_tokens):
+            yield start, i
+            start = i
+            tokens = 0
+        tokens += text_tokens
+    if start < len(texts):
+        yield start, len(texts)
+
+class RateLimiter:
+    """
+    Async token-bucket limiter for provider request and token quotas.
+
+    Both budgets refill continuously and allow bursts of up to one minute's
+    worth of quota.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_minute (int, optional): Request quota, unlimited if None
+            tokens_per_minute (int, optional): Token quota, unlimited if None
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(
+                float(self.requests_per_minute),
+                self._requests + elapsed * self.requests_per_minute / 60.0
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + elapsed * self.tokens_per_minute / 60.0
+            )
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60.0 / self.tokens_per_minute)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request using the given number of tokens is allowed."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            self._refill()
+            wait = self._wait_time(tokens)
+            while wait > 0:
+                await asyncio.sleep(wait)
+                self._refill()
+                wait = self._wait_time(tokens)
+            self._requests -= 1
+            self._tokens -= tokens
+
+class EmbeddingBatcher:
+    """Embeds chunks through embed_batch in provider-sized batches."""
+
+    def __init__(
+        self,
+        embeddings: BaseEmbeddings,
+        max_batch_size: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_concurrency: int = 4,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embeddings (BaseEmbeddings): Embedding model used for each batch
+            max_batch_size (int, optional): Override the provider's batch size limit
+            max_batch_tokens (int, optional): Override the provider's token limit
+            max_concurrency (int): Maximum batches in flight for async embedding
+            rate_limiter (RateLimiter, optional): Provider quota shared by all async batches
+        """
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size or embeddings.max_batch_size
+        self.max_batch_tokens = max_batch_tokens or embeddings.max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+
+    def batches(self, texts: Sequence[str]) -> Iterator[Tuple[int, int]]:
+        """Yield ``(start, end)`` bounds of the batches for the given texts."""
+        return iter_batches(texts, self.max_batch_size, self.max_batch_tokens)
+
+    @staticmethod
+    def _check_batch(batch: List[str], embedded: Sequence) -> None:
+        if len(embedded) != len(batch):
+            raise ValueError(
+                f"Embedding provider returned {len(embedded)} vectors for {len(batch)} texts"
+            )
+
+    def embed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        """Generate embeddings for texts, preserving their order."""
+        vectors: List[List[float]] = []
+        for start, end in self.batches(texts):
+            batch = list(texts[start:end])
+            embedded = self.embeddings.embed_batch(batch)
+            self._check_batch(batch, embedded)
+            vectors.extend(embedded)
+        return vectors
+
+    async def aembed_texts(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Asynchronously generate embeddings for texts, preserving their order.
+
+        Up to ``max_concurrency`` batches are in flight at once, and each batch
+        waits for the rate limiter before it is sent.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed(start: int, end: int) -> List[List[float]]:
+            batch = list(texts[start:end])
+            async with semaphore:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire(sum(estimate_tokens(text) for text in batch))
+                embedded = await self.embeddings.aembed_batch(batch)
+            self._check_batch(batch, embedded)
+            return embedded
+
+        results = await asyncio.gather(*(embed(start, end) for start, end in self.batches(texts)))
+        return [vector for embedded in results for vector in embedded]
+
+    def embed_texts_array(self, texts: Sequence[str]) -> np.ndarray:
+        """Generate embeddings for texts into one preallocated (n, dim) float32 array."""
+        vectors: Optional[np.ndarray] = None
+        for start, end in self.batches(texts):
+            batch = list(texts[start:end])
+            embedded = self.embeddings.embed_batch_array(batch)
+            self._check_batch(batch, embedded)
+            if vectors is None:
+                vectors = np.empty((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[start:end] = embedded
+        return vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+
+    async def aembed_texts_array(self, texts: Sequence[str]) -> np.ndarray:
+        """Asynchronously generate embeddings for texts into one (n, dim) float32 array."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed(start: int, end: int) -> Tuple[int, int, np.ndarray]:
+            batch = list(texts[start:end])
+            async with semaphore:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire(sum(estimate_tokens(text) for text in batch))
+                embedded = await self.embeddings.aembed_batch_array(batch)
+            self._check_batch(batch, embedded)
+            return start, end, embedded
+
+        results = await asyncio.gather(*(embed(start, end) for start, end in self.batches(texts)))
+        if not results:
+            return np.empty((0, 0), dtype=np.float32)
+        vectors = np.empty((len(texts), results[0][2].shape[1]), dtype=np.float32)
+        for start, end, embedded in results:
+            vectors[start:end] = embedded
+        return vectors
+
+    def embed_chunks(self, chunks: List[Chunk]) -> List[Chunk]:
+        """Set ``Chunk.embedding`` on every chunk and return the chunks."""
+        vectors = self.embed_texts([chunk.text for chunk in chunks])
+        for chunk, vector in zip(chunks, vectors):
+            chunk.embedding = vector
+        return chunks
+
+    async def aembed_chunks(self, chunks: List[Chunk]) -> List[Chunk]:
+        """Asynchronously set ``Chunk.embedding`` on every chunk and return the chunks."""
+        vectors = await self.aembed_texts([chunk.text for chunk in chunks])
+        for chunk, vector in zip(chunks, vectors):
+            chunk.embedding = vector
+        return chunks
+
+    def embed_chunk_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """Set ``ChunkBatch.embeddings`` to a float32 matrix and return the batch."""
+        batch.embeddings = self.embed_texts_array(batch.texts)
+        return batch
+
+    async def aembed_chunk_batch(self, batch: ChunkBatch) -> ChunkBatch:
+        """Asynchronously set ``ChunkBatch.embeddings`` to a float32 matrix and return the batch."""
+        batch.embeddings = await self.aembed_texts_array(batch.texts)
+        return batch
+
+    def iter_embed_chunks(self, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        """
+        Embed a stream of chunks, yielding them in order once their batch is done.
+
+        At most one batch of chunks is held in memory at a time.
+        """
+        pending: List[Chunk] = []
+        tokens = 0
+        for chunk in chunks:
+            chunk_tokens = estimate_tokens(chunk.text)
+            if pending and (
+                len(pending) >= self.max_batch_size or tokens + chunk_tokens > self.max_batch_tokens
+            ):
+                yield from self.embed_chunks(pending)
+                pending = []
+                tokens = 0
+            pending.append(chunk)
+            tokens += chunk_tokens
+        if pending:
+            yield from self.embed_chunks(pending)
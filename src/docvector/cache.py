@@ -0,0 +1,263 @@
+"""
+Persistent content-addressed cache for embeddings.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from .embeddings import BaseEmbeddings
+
+class EmbeddingCache:
+    """
+    Two-level vector cache: an in-memory LRU in front of a SQLite file.
+
+    Vectors are stored as raw float32 blobs keyed by a SHA-256 digest of
+    (provider, model, text), so the same text embedded by the same model is
+    only ever paid for once.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_memory_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            path (str, optional): SQLite database file; memory-only if None
+            max_memory_bytes (int): Size budget of the in-memory LRU
+        """
+        self.path = path
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str) -> bytes:
+        """Build the content address of a text for a given provider and model."""
+        digest = hashlib.sha256()
+        for part in (provider, model, text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.digest()
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up keys, returning the vectors that are cached."""
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+            if missing and self._db is not None:
+                unique = list(dict.fromkeys(missing))
+                for start in range(0, len(unique), 500):
+                    part = unique[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        found[bytes(key)] = vector
+                        self._remember(bytes(key), vector)
+                self.disk_hits += sum(1 for key in missing if key in found)
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        """Store vectors in memory and, if configured, on disk."""
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.tobytes()) for key, vector in items.items()]
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and memory usage."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+class CachedEmbeddings(BaseEmbeddings):
+    """Embedding model wrapper that serves repeated texts from an EmbeddingCache."""
+
+    def __init__(self, embeddings: BaseEmbeddings, cache: EmbeddingCache):
+        """
+        Initialize the cached embeddings.
+
+        Args:
+            embeddings (BaseEmbeddings): Embedding model to wrap
+            cache (EmbeddingCache): Cache used to store vectors
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.provider_name = embeddings.provider_name
+        self.model = getattr(embeddings, "model", "")
+        self.max_batch_size = embeddings.max_batch_size
+        self.max_batch_tokens = embeddings.max_batch_tokens
+
+    def __getstate__(self):
+        # The cache's SQLite connection and lock cannot be pickled; the copy reopens the same file
+        return {
+            "embeddings": self.embeddings,
+            "cache_path": self.cache.path,
+            "max_memory_bytes": self.cache.max_memory_bytes,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["embeddings"], EmbeddingCache(state["cache_path"], state["max_memory_bytes"]))
+
+    def _key(self, text: str) -> bytes:
+        return self.cache.make_key(self.provider_name, self.model, text)
+
+    def _lookup(self, texts: List[str]):
+        keys = [self._key(text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+        return keys, found, missing
+
+    def _store(self, missing: List[str], vectors: np.ndarray, found: Dict[bytes, np.ndarray]) -> None:
+        # Copy rows so cached vectors do not keep the provider's whole batch alive
+        new = {self._key(text): np.array(vector, dtype=np.float32) for text, vector in zip(missing, vectors)}
+        self.cache.put_many(new)
+        found.update(new)
+
+    def embed_text(self, text: str) -> List[float]:
+        """Generate embeddings for a single text, using the cache when possible."""
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for multiple texts, embedding only cache misses."""
+        return self.embed_batch_array(texts).tolist()
+
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """Generate an (n, dim) embedding array, embedding only cache misses."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            self._store(missing, self.embeddings.embed_batch_array(missing), found)
+        return np.stack([found[key] for key in keys])
+
+    async def aembed_text(self, text: str) -> List[float]:
+        """Asynchronously generate embeddings for a single text, using the cache when possible."""
+        return (await self.aembed_batch([text]))[0]
+
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronously generate embeddings for multiple texts, embedding only cache misses."""
+        return (await self.aembed_batch_array(texts)).tolist()
+
+    async def aembed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """Asynchronously generate an (n, dim) embedding array, embedding only cache misses."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            self._store(missing, await self.embeddings.aembed_batch_array(missing), found)
+        return np.stack([found[key] for key in keys])
+
+    def stats(self) -> Dict[str, float]:
+        """Return the cache's hit/miss counters."""
+        return self.cache.stats()
+
+class QueryEmbedder:
+    """
+    Embeds search queries, remembering the vectors of recent queries.
+
+    Repeated queries are common in interactive and RAG workloads, so a small
+    LRU of query vectors avoids a provider round trip on the search path.
+    Several queries are embedded with a single embed_batch call.
+    """
+
+    def __init__(self, embeddings: BaseEmbeddings, cache_size: int = 1024):
+        """
+        Initialize the query embedder.
+
+        Args:
+            embeddings (BaseEmbeddings): Embedding model used for queries
+            cache_size (int): Number of recent query vectors kept
+        """
+        self.embeddings = embeddings
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, query: str) -> np.ndarray:
+        """Return the float32 vector of one query."""
+        return self.embed_many([query])[0]
+
+    def embed_many(self, queries: Sequence[str]) -> np.ndarray:
+        """Return an (n, dim) float32 array of query vectors, embedding the misses in one batch."""
+        if not queries:
+            return np.empty((0, 0), dtype=np.float32)
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for query in queries:
+                vector = self._vectors.get(query)
+                if vector is not None:
+                    self._vectors.move_to_end(query)
+                    found[query] = vector
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        missing = [query for query in dict.fromkeys(queries) if query not in found]
+        if missing:
+            vectors = self.embeddings.embed_batch_array(missing)
+            with self._lock:
+                for query, vector in zip(missing, vectors):
+                    vector = np.array(vector, dtype=np.float32)
+                    found[query] = vector
+                    self._vectors[query] = vector
+                    self._vectors.move_to_end(query)
+                while len(self._vectors) > self.cache_size:
+                    self._vectors.popitem(last=False)
+        return np.stack([found[query] for query in queries])
@@ -2,10 +2,16 @@
 Chunking strategies for document processing.
 """
 
+import ast
+import bisect
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from functools import lru_cache
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
 import re
-from .types import Chunk, Metadata
+import numpy as np
+from .types import Chunk, ChunkBatch, Metadata
+from .embeddings import BaseEmbeddings
+from .batching import EmbeddingBatcher
 
 class BaseChunker(ABC):
     """Base class for chunking strategies."""
@@ -18,113 +24,592 @@ class BaseChunker(ABC):
     def chunk_text(self, text: str, metadata: Optional[Metadata] = None) -> List[Chunk]:
         """Split text into chunks."""
         pass
+    
+    def iter_chunks(
+        self,
+        stream: Union[str, IO[str], Iterable[str]],
+        metadata: Optional[Metadata] = None,
+        buffer_size: int = 64 * 1024
+    ) -> Iterator[Chunk]:
+        """
+        Lazily split a text stream into chunks.
+        
+        The stream is read into a window of about buffer_size characters which
+        is chunked with chunk_text. Every chunk but the last is final and is
+        yielded; the window then restarts at the last chunk, so its overlap with
+        the previous chunk is carried across buffer boundaries. Offsets are
+        relative to the start of the stream.
+        
+        Args:
+            stream: A string, a text file object, or an iterable of text blocks
+            metadata (Metadata, optional): Metadata attached to each chunk
+            buffer_size (int): Minimum number of characters to chunk at once
+        
+        Yields:
+            Chunk: Chunks in document order
+        """
+        if isinstance(stream, str):
+            blocks: Iterable[str] = (stream[i:i + buffer_size] for i in range(0, len(stream), buffer_size))
+        elif hasattr(stream, "read"):
+            blocks = iter(lambda: stream.read(buffer_size), "")
+        else:
+            blocks = stream
+        
+        buffer = ""
+        offset = 0
+        threshold = buffer_size
+        for block in blocks:
+            buffer += block
+            if len(buffer) < threshold:
+                continue
+            chunks = self.chunk_text(buffer, metadata)
+            if len(chunks) < 2:
+                # No chunk is known to be complete yet; wait for more text
+                threshold = 2 * len(buffer)
+                continue
+            for chunk in chunks[:-1]:
+                chunk.start_index += offset
+                chunk.end_index += offset
+                yield chunk
+            cut = chunks[-1].start_index
+            buffer = buffer[cut:]
+            offset += cut
+            threshold = max(buffer_size, len(buffer) + 1)
+        
+        if buffer:
+            for chunk in self.chunk_text(buffer, metadata):
+                chunk.start_index += offset
+                chunk.end_index += offset
+                yield chunk
+    
+    @staticmethod
+    def _make_chunk(text: str, start: int, end: int, metadata: Optional[Metadata]) -> Chunk:
+        """Create a chunk covering text[start:end]."""
+        return Chunk(
+            text=text[start:end],
+            metadata=metadata or Metadata(),
+            start_index=start,
+            end_index=end
+        )
 
-class SemanticChunker(BaseChunker):
-    """Chunks text based on semantic boundaries (sentences, paragraphs)."""
+class SpanChunker(BaseChunker):
+    """
+    Base class for chunkers whose chunks are contiguous slices of the text.
+    
+    Subclasses only compute (start, end) spans; chunk_text wraps them in
+    Chunk models and chunk_batch in a columnar ChunkBatch without creating
+    any per-chunk objects.
+    """
+    
+    @abstractmethod
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Return the (start, end) offsets of each chunk of text."""
+        pass
     
     def chunk_text(self, text: str, metadata: Optional[Metadata] = None) -> List[Chunk]:
-        """Split text into chunks based on semantic boundaries."""
-        # Split into sentences (simple approach)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        """Split text into chunks."""
+        return [self._make_chunk(text, start, end, metadata) for start, end in self.chunk_spans(text)]
+    
+    def chunk_batch(self, text: str, metadata: Optional[Metadata] = None) -> ChunkBatch:
+        """Split text into a ChunkBatch whose chunks all share metadata."""
+        return ChunkBatch.from_spans(text, self.chunk_spans(text), metadata)
+
+class SemanticChunker(SpanChunker):
+    """Chunks text based on semantic boundaries (sentences, paragraphs)."""
+    
+    sentence_boundary = re.compile(r'(?<=[.!?])\s+')
+    whitespace = re.compile(r'\s+')
+    
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        embeddings: Optional[BaseEmbeddings] = None,
+        breakpoint_percentile: float = 90.0,
+        min_chunk_size: int = 200
+    ):
+        """
+        Initialize the semantic chunker.
+        
+        Without embeddings, sentences are packed by length. With embeddings,
+        chunk boundaries are placed where the meaning of consecutive sentences
+        shifts most.
+        
+        Args:
+            chunk_size (int): Maximum characters per chunk
+            overlap (int): Characters of trailing sentences repeated in the next chunk, length mode only
+            embeddings (BaseEmbeddings, optional): Model used to embed sentences for similarity mode
+            breakpoint_percentile (float): Percentile of adjacent sentence distances above which to split
+            min_chunk_size (int): Minimum characters before a similarity boundary is taken
+        """
+        super().__init__(chunk_size, overlap)
+        self.embeddings = embeddings
+        self.breakpoint_percentile = breakpoint_percentile
+        self.min_chunk_size = min_chunk_size
+        self._batcher: Optional[EmbeddingBatcher] = None
+    
+    @property
+    def batcher(self) -> EmbeddingBatcher:
+        """Batcher over a cached wrapper of the embeddings, created on first use."""
+        if self._batcher is None:
+            from .cache import CachedEmbeddings, EmbeddingCache
+            embeddings = self.embeddings
+            if not isinstance(embeddings, CachedEmbeddings):
+                # Sentences are re-embedded when a stream window is re-chunked
+                embeddings = CachedEmbeddings(embeddings, EmbeddingCache())
+            self._batcher = EmbeddingBatcher(embeddings)
+        return self._batcher
+    
+    def __getstate__(self):
+        # The batcher is rebuilt in each worker; the provider rebuilds its API
+        # client, and a CachedEmbeddings reopens its cache file, when unpickled
+        state = self.__dict__.copy()
+        state["_batcher"] = None
+        return state
+    
+    def _sentence_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Return the spans between sentence boundary matches."""
+        sentences = []
+        position = 0
+        for boundary in self.sentence_boundary.finditer(text):
+            if boundary.start() > position:
+                sentences.append((position, boundary.start()))
+            position = boundary.end()
+        if position < len(text):
+            sentences.append((position, len(text)))
+        return [piece for start, end in sentences for piece in self._split_long(text, start, end)]
+    
+    def _split_long(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Cut a span longer than chunk_size at its last whitespace within chunk_size.
+        
+        Text without sentence punctuation, such as logs or CSV, would otherwise
+        be one sentence and one unbounded chunk. A run with no whitespace is
+        cut at exactly chunk_size characters.
+        """
+        pieces = []
+        while end - start > self.chunk_size:
+            gaps = [gap for gap in self.whitespace.finditer(text, start, start + self.chunk_size + 1) if gap.start() > start]
+            if gaps:
+                pieces.append((start, gaps[-1].start()))
+                start = gaps[-1].end()
+            else:
+                pieces.append((start, start + self.chunk_size))
+                start += self.chunk_size
+        if end > start:
+            pieces.append((start, end))
+        return pieces
+    
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into chunks based on semantic boundaries.
+        
+        Chunks are packed with whole sentences up to chunk_size characters and
+        repeat up to overlap characters of trailing sentences from the previous
+        chunk, or, with embeddings, split where adjacent sentences are least
+        similar. Offsets come from the sentence spans, so each chunk's text is
+        exactly text[start_index:end_index].
+        """
+        sentences = self._sentence_spans(text)
+        if self.embeddings is not None and len(sentences) > 2:
+            return self._similarity_spans(text, sentences)
+        return self._length_spans(sentences)
+    
+    def _length_spans(self, sentences: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Pack sentences by length with overlap."""
         chunks = []
-        current_chunk = []
+        current_chunk: List[Tuple[int, int]] = []
         current_length = 0
         
-        for sentence in sentences:
-            sentence_length = len(sentence)
+        for start, end in sentences:
+            sentence_length = end - start
             if current_length + sentence_length > self.chunk_size and current_chunk:
                 # Create chunk from current sentences
-                chunk_text = ' '.join(current_chunk)
-                chunks.append(Chunk(
-                    text=chunk_text,
-                    metadata=metadata or Metadata(),
-                    start_index=text.find(chunk_text),
-                    end_index=text.find(chunk_text) + len(chunk_text)
-                ))
-                # Keep overlap
-                overlap_text = ' '.join(current_chunk[-self.overlap:])
-                current_chunk = [overlap_text]
-                current_length = len(overlap_text)
-            current_chunk.append(sentence)
+                chunks.append((current_chunk[0][0], current_chunk[-1][1]))
+                # Keep trailing sentences that fit in the overlap, never the whole chunk
+                keep = 0
+                overlap_length = 0
+                while keep < len(current_chunk) - 1:
+                    span = current_chunk[-1 - keep]
+                    if overlap_length + span[1] - span[0] > self.overlap:
+                        break
+                    overlap_length += span[1] - span[0]
+                    keep += 1
+                current_chunk = current_chunk[len(current_chunk) - keep:]
+                current_length = overlap_length
+            current_chunk.append((start, end))
             current_length += sentence_length
         
         # Add remaining text as chunk
         if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunks.append(Chunk(
-                text=chunk_text,
-                metadata=metadata or Metadata(),
-                start_index=text.find(chunk_text),
-                end_index=text.find(chunk_text) + len(chunk_text)
-            ))
+            chunks.append((current_chunk[0][0], current_chunk[-1][1]))
         
         return chunks
-
-class CodeChunker(BaseChunker):
-    """Chunks code based on language-specific boundaries."""
     
-    def chunk_text(self, text: str, metadata: Optional[Metadata] = None) -> List[Chunk]:
-        """Split code into chunks based on function/class boundaries."""
-        # Simple approach: split on function/class definitions
-        # This is a basic implementation and should be enhanced for specific languages
+    def _similarity_spans(self, text: str, sentences: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Split sentences where the cosine distance between neighbours peaks."""
+        vectors = self.batcher.embed_texts_array([text[start:end] for start, end in sentences])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+        distances = 1.0 - np.einsum("ij,ij->i", vectors[:-1], vectors[1:])
+        breaks = distances > np.percentile(distances, self.breakpoint_percentile)
+        
         chunks = []
-        current_pos = 0
+        chunk_start = sentences[0][0]
+        for i in range(1, len(sentences)):
+            length = sentences[i - 1][1] - chunk_start
+            if (breaks[i - 1] and length >= self.min_chunk_size) or sentences[i][1] - chunk_start > self.chunk_size:
+                chunks.append((chunk_start, sentences[i - 1][1]))
+                chunk_start = sentences[i][0]
+        chunks.append((chunk_start, sentences[-1][1]))
+        return chunks
+
+class CodeChunker(SpanChunker):
+    """
+    Chunks source code along syntactic boundaries.
+    
+    Python is parsed with ast: the file is partitioned at its top-level
+    statements (with their decorators and the comment lines directly above
+    them) and consecutive statements are packed into chunks of up to
+    chunk_size characters. A statement that is too large on its own is split
+    at its nested statements, so a class stays whole when it fits and is
+    otherwise divided between methods. Other languages, and Python that does
+    not parse, use the same packing over units that start at lines with no
+    indentation outside any open bracket. Units never straddle chunks, so
+    overlap is not used. Nothing is dropped: chunks tile the whole text.
+    """
+    
+    line_break = re.compile(r'\r\n|\r|\n')
+    comment_line = re.compile(r'\s*(#|//|/\*|\*)')
+    # String literals and comments, whose brackets do not count towards nesting
+    non_code = re.compile(
+        r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`|//[^\n]*|/\*.*?(?:\*/|\Z)',
+        re.DOTALL
+    )
+    
+    def __init__(self, chunk_size: int = 1000, overlap: int = 0, language: Optional[str] = None):
+        """
+        Initialize the code chunker.
         
-        # Find function/class definitions
-        pattern = r'(?:def|class)\s+\w+'
-        matches = list(re.finditer(pattern, text))
+        Args:
+            chunk_size (int): Maximum characters per chunk, unless a single line is longer
+            overlap (int): Unused, kept for the BaseChunker signature
+            language (str, optional): Source language; Python is detected by parsing when None
+        """
+        super().__init__(chunk_size, overlap)
+        self.language = language
+    
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Split code into spans of whole statements or top-level blocks."""
+        if not text:
+            return []
+        line_starts = [0] + [match.end() for match in self.line_break.finditer(text)]
+        lines = [text[line_starts[i]:line_starts[i + 1]] if i + 1 < len(line_starts) else text[line_starts[i]:]
+                 for i in range(len(line_starts))]
         
-        for i, match in enumerate(matches):
-            start = match.start()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-            
-            chunk_text = text[start:end]
-            chunks.append(Chunk(
-                text=chunk_text,
-                metadata=metadata or Metadata(),
-                start_index=start,
-                end_index=end
-            ))
+        tree = None
+        if self.language in (None, "python"):
+            try:
+                tree = ast.parse(text)
+            except (SyntaxError, ValueError):
+                tree = None
+        if tree is not None and tree.body:
+            units = self._python_units(tree.body, 0, len(text), 0, line_starts, lines)
+        else:
+            units = [(start, end, None) for start, end in self._generic_units(text, line_starts, lines)]
+        return self._pack(units, line_starts, lines)
+    
+    def _python_units(
+        self,
+        nodes: List[ast.stmt],
+        start: int,
+        end: int,
+        first_line: int,
+        line_starts: List[int],
+        lines: List[str]
+    ) -> List[Tuple[int, int, Optional[ast.stmt]]]:
+        """Partition [start, end) at the first line of each statement in nodes, which follow first_line."""
+        boundaries = []
+        floor = first_line
+        for node in nodes:
+            line = min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+            # Keep comment lines directly above a statement with it
+            while line - 1 > floor and self.comment_line.match(lines[line - 2]) and lines[line - 2].strip():
+                line -= 1
+            boundaries.append(max(line_starts[line - 1], start))
+            floor = node.end_lineno or node.lineno
         
-        return chunks
+        units: List[Tuple[int, int, Optional[ast.stmt]]] = []
+        if boundaries[0] > start:
+            units.append((start, boundaries[0], None))
+        for i, node in enumerate(nodes):
+            stop = boundaries[i + 1] if i + 1 < len(nodes) else end
+            if stop > boundaries[i]:
+                units.append((boundaries[i], stop, node))
+        return units
+    
+    def _generic_units(self, text: str, line_starts: List[int], lines: List[str]) -> List[Tuple[int, int]]:
+        """Partition code at unindented lines outside brackets, keeping comments with what follows."""
+        # Blank out strings and comments, keeping line breaks so offsets still match
+        code = self.non_code.sub(lambda match: re.sub(r'[^\r\n]', ' ', match.group()), text)
+        boundaries = [0]
+        depth = 0
+        previous_comment = False
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if (i and stripped and depth <= 0 and not line[0].isspace()
+                    and stripped[0] not in ")]}" and not previous_comment):
+                boundaries.append(line_starts[i])
+            if stripped:
+                previous_comment = bool(self.comment_line.match(line))
+            code_line = code[line_starts[i]:line_starts[i] + len(line)]
+            depth += sum(code_line.count(c) for c in "([{") - sum(code_line.count(c) for c in ")]}")
+        boundaries.append(len(text))
+        return [(a, b) for a, b in zip(boundaries, boundaries[1:]) if b > a]
+    
+    def _split_lines(self, start: int, end: int, line_starts: List[int], lines: List[str]) -> List[Tuple[int, int]]:
+        """Pack whole lines of [start, end) into spans of up to chunk_size characters."""
+        spans = []
+        first = bisect.bisect_right(line_starts, start) - 1
+        chunk_start = start
+        position = start
+        for i in range(first, len(lines)):
+            line_end = min(line_starts[i] + len(lines[i]), end)
+            if line_end > chunk_start + self.chunk_size and position > chunk_start:
+                spans.append((chunk_start, position))
+                chunk_start = position
+            position = line_end
+            if position >= end:
+                break
+        spans.append((chunk_start, end))
+        return spans
+    
+    def _pack(
+        self,
+        units: List[Tuple[int, int, Optional[ast.stmt]]],
+        line_starts: List[int],
+        lines: List[str]
+    ) -> List[Tuple[int, int]]:
+        """Group consecutive units into chunks, splitting units larger than chunk_size."""
+        spans: List[Tuple[int, int]] = []
+        current: Optional[Tuple[int, int]] = None
+        for start, end, node in units:
+            if end - start > self.chunk_size:
+                if current:
+                    spans.append(current)
+                    current = None
+                children = sorted(
+                    (child for field in ("body", "handlers", "orelse", "finalbody")
+                     for child in getattr(node, field, None) or [] if isinstance(child, ast.stmt)),
+                    key=lambda child: child.lineno
+                ) if node is not None else []
+                if children:
+                    first_line = bisect.bisect_right(line_starts, start)
+                    spans.extend(self._pack(
+                        self._python_units(children, start, end, first_line, line_starts, lines), line_starts, lines
+                    ))
+                else:
+                    spans.extend(self._split_lines(start, end, line_starts, lines))
+            elif current and end - current[0] <= self.chunk_size:
+                current = (current[0], end)
+            else:
+                if current:
+                    spans.append(current)
+                current = (start, end)
+        if current:
+            spans.append(current)
+        return spans
+
+@lru_cache(maxsize=None)
+def get_tokenizer(encoding_name: str = "cl100k_base"):
+    """Load a tiktoken BPE encoding once per process."""
+    try:
+        import tiktoken
+    except ImportError:
+        raise ImportError("Please install tiktoken: pip install tiktoken")
+    return tiktoken.get_encoding(encoding_name)
 
-class TokenChunker(BaseChunker):
-    """Chunks text based on token boundaries."""
+class TokenChunker(SpanChunker):
+    """
+    Chunks text into windows of BPE tokens.
     
-    def chunk_text(self, text: str, metadata: Optional[Metadata] = None) -> List[Chunk]:
-        """Split text into chunks based on token boundaries."""
-        # Simple word-based tokenization
-        words = text.split()
-        chunks = []
-        current_chunk = []
-        current_length = 0
+    chunk_size and overlap are counted in tokens of a tiktoken encoding, so
+    chunks match what embedding providers bill and limit. The text is encoded
+    in one pass and token byte lengths are mapped to character offsets with
+    NumPy, so each chunk is an exact slice text[start_index:end_index].
+    """
+    
+    # Offsets where the pre-tokenizers of tiktoken's encodings always start a new piece
+    restart_point = re.compile(r'(?<=\n)(?=\S)|(?<=[^\W\d_]) (?=[^\W\d_])')
+    
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        encoding_name: str = "cl100k_base",
+        tokenizer=None
+    ):
+        """
+        Initialize the token chunker.
         
-        for word in words:
-            word_length = len(word) + 1  # +1 for space
-            if current_length + word_length > self.chunk_size and current_chunk:
-                # Create chunk from current words
-                chunk_text = ' '.join(current_chunk)
-                chunks.append(Chunk(
-                    text=chunk_text,
-                    metadata=metadata or Metadata(),
-                    start_index=text.find(chunk_text),
-                    end_index=text.find(chunk_text) + len(chunk_text)
-                ))
-                # Keep overlap
-                overlap_words = current_chunk[-self.overlap:]
-                current_chunk = overlap_words
-                current_length = sum(len(w) + 1 for w in overlap_words)
-            current_chunk.append(word)
-            current_length += word_length
-        
-        # Add remaining words as chunk
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunks.append(Chunk(
-                text=chunk_text,
-                metadata=metadata or Metadata(),
-                start_index=text.find(chunk_text),
-                end_index=text.find(chunk_text) + len(chunk_text)
-            ))
-        
-        return chunks 
\ No newline at end of file
+        Args:
+            chunk_size (int): Maximum tokens per chunk
+            overlap (int): Tokens shared by consecutive chunks
+            encoding_name (str): tiktoken encoding, loaded lazily and cached
+            tokenizer (optional): Encoding object to use instead of encoding_name
+        """
+        if not 0 <= overlap < chunk_size:
+            raise ValueError(f"overlap must be in [0, chunk_size), got {overlap} for chunk_size={chunk_size}")
+        super().__init__(chunk_size, overlap)
+        self.encoding_name = encoding_name
+        self._tokenizer = tokenizer
+    
+    @property
+    def tokenizer(self):
+        """The tiktoken encoding used to count tokens."""
+        return self._tokenizer or get_tokenizer(self.encoding_name)
+    
+    def count_tokens(self, text: str) -> int:
+        """Return the number of tokens in text."""
+        return len(self.tokenizer.encode_ordinary(text))
+    
+    def _token_boundaries(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the character offsets of every token boundary of text.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: int64 offsets rounded down and up to a character
+            boundary, one more than the number of tokens
+        """
+        tokens = self.tokenizer.encode_ordinary(text)
+        
+        # Byte offset of every token boundary
+        token_bytes = self.tokenizer.decode_tokens_bytes(tokens)
+        byte_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, token_bytes), dtype=np.int64, count=len(tokens)), out=byte_offsets[1:])
+        
+        # Character index of every byte; a token may end inside a multi-byte character
+        encoded = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        char_starts = (encoded & 0xC0) != 0x80
+        chars_before = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(char_starts, out=chars_before[1:])
+        floor = chars_before - np.append(~char_starts, False)
+        ceil = chars_before
+        return floor[byte_offsets], ceil[byte_offsets]
+    
+    def chunk_offsets(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the character offsets of every token window of text.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: int64 start and end offsets of each chunk
+        """
+        floor, ceil = self._token_boundaries(text)
+        tokens = len(floor) - 1
+        if not tokens:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        step = self.chunk_size - self.overlap
+        window_starts = np.arange(0, max(tokens - self.overlap, 1), step)
+        window_ends = np.minimum(window_starts + self.chunk_size, tokens)
+        return floor[window_starts], ceil[window_ends]
+    
+    def iter_chunks(
+        self,
+        stream: Union[str, IO[str], Iterable[str]],
+        metadata: Optional[Metadata] = None,
+        buffer_size: int = 64 * 1024
+    ) -> Iterator[Chunk]:
+        """
+        Lazily split a text stream into the same token windows as chunk_text.
+        
+        Windows are counted in tokens of the whole stream rather than
+        restarted at each buffer. The buffer is only ever tokenized from
+        points where the encoding's pre-tokenizer always starts a new piece
+        (after a line break, or at a space between two letters), so its
+        tokens are those of the whole text, and a window is yielded once the
+        buffer holds all of its tokens before the last such point. The
+        buffer then restarts at the last such point before the next window.
+        
+        Args:
+            stream: A string, a text file object, or an iterable of text blocks
+            metadata (Metadata, optional): Metadata attached to each chunk
+            buffer_size (int): Minimum number of characters to tokenize at once
+        
+        Yields:
+            Chunk: Chunks in document order
+        """
+        if isinstance(stream, str):
+            blocks: Iterable[str] = (stream[i:i + buffer_size] for i in range(0, len(stream), buffer_size))
+        elif hasattr(stream, "read"):
+            blocks = iter(lambda: stream.read(buffer_size), "")
+        else:
+            blocks = stream
+        
+        step = self.chunk_size - self.overlap
+        buffer = ""
+        offset = 0
+        first_token = 0  # Index in the whole stream of the buffer's first token
+        next_window = 0
+        threshold = buffer_size
+        for block in blocks:
+            buffer += block
+            if len(buffer) < threshold:
+                continue
+            floor, ceil = self._token_boundaries(buffer)
+            restarts = [match.start() for match in self.restart_point.finditer(buffer)]
+            # Tokens before the last restart point are final; later ones may change with more text
+            stable = first_token + (self._token_index(floor, restarts[-1]) if restarts else 0)
+            while next_window + self.chunk_size <= stable:
+                yield self._window_chunk(buffer, floor, ceil, next_window - first_token, offset, metadata)
+                next_window += step
+            
+            window_start = floor[next_window - first_token]
+            cut = next((point for point in reversed(restarts) if point <= window_start), 0)
+            if not cut:
+                # No window is known to be complete yet; wait for more text
+                threshold = 2 * len(buffer)
+                continue
+            first_token += self._token_index(floor, cut)
+            buffer = buffer[cut:]
+            offset += cut
+            threshold = max(buffer_size, len(buffer) + 1)
+        
+        floor, ceil = self._token_boundaries(buffer)
+        tokens = first_token + len(floor) - 1
+        while tokens and next_window < max(tokens - self.overlap, 1):
+            yield self._window_chunk(buffer, floor, ceil, next_window - first_token, offset, metadata)
+            next_window += step
+    
+    @staticmethod
+    def _token_index(floor: np.ndarray, position: int) -> int:
+        """Return the index of the token boundary at a character boundary."""
+        # Boundaries inside the preceding character round down below position
+        return int(np.searchsorted(floor, position))
+    
+    def _window_chunk(
+        self,
+        text: str,
+        floor: np.ndarray,
+        ceil: np.ndarray,
+        token: int,
+        offset: int,
+        metadata: Optional[Metadata]
+    ) -> Chunk:
+        """Create the chunk of the window starting at a token of text, shifted by offset."""
+        end_token = min(token + self.chunk_size, len(ceil) - 1)
+        chunk = self._make_chunk(text, int(floor[token]), int(ceil[end_token]), metadata)
+        chunk.start_index += offset
+        chunk.end_index += offset
+        return chunk
+    
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Split text into spans of at most chunk_size tokens."""
+        starts, ends = self.chunk_offsets(text)
+        return list(zip(starts.tolist(), ends.tolist()))
+    
+    def chunk_batch(self, text: str, metadata: Optional[Metadata] = None) -> ChunkBatch:
+        """Split text into a ChunkBatch straight from the offset arrays."""
+        starts, ends = self.chunk_offsets(text)
+        return ChunkBatch(text, starts, ends, metadata)
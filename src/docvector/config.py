@@ -27,6 +27,10 @@ class Config:
     DEEPSEEK_API_KEY: Optional[str] = os.getenv("DEEPSEEK_API_KEY")
     DEEPSEEK_MODEL: str = os.getenv("DEEPSEEK_MODEL", "deepseek-embed")
     
+    # Embedding cache settings (disabled when no path is set)
+    EMBEDDING_CACHE_PATH: Optional[str] = os.getenv("EMBEDDING_CACHE_PATH")
+    EMBEDDING_CACHE_MEMORY_BYTES: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+    
     # Vector store settings
     VECTOR_STORE_PROVIDER = os.getenv("VECTOR_STORE_PROVIDER", "pinecone")  # pinecone, qdrant, weaviate, or milvus
     
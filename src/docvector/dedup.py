@@ -0,0 +1,207 @@
+"""
+Near-duplicate chunk detection between chunking and embedding.
+"""
+
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .types import Chunk
+
+# Mersenne prime for the universal hash family; products stay below 2**62
+_PRIME = (1 << 31) - 1
+
+class MinHashDeduplicator:
+    """
+    Corpus-wide near-duplicate filter using MinHash signatures and LSH.
+
+    Each chunk is reduced to the set of its word shingles and a MinHash
+    signature estimating Jaccard similarity between those sets. Signatures
+    are split into bands, and chunks sharing a band are compared; a chunk
+    whose estimated similarity to an earlier chunk reaches threshold is a
+    duplicate of it. The first chunk seen stays canonical for the lifetime
+    of the deduplicator, so boilerplate repeated across documents is caught.
+    Canonical chunks are identified by their registration order and only
+    their signatures are kept, not the chunks themselves. If the chunks of a
+    split cannot be embedded, rollback() unregisters them, so later copies
+    are embedded in their place.
+
+    In "drop" mode duplicates are removed before embedding. In "link" mode
+    they are kept but reuse their canonical chunk's embedding, which saves
+    the embedding call but not index space; the canonical embeddings are
+    then kept as float32 vectors.
+    """
+
+    modes = ("drop", "link")
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+        mode: str = "drop",
+        seed: int = 0
+    ):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            threshold (float): Estimated Jaccard similarity at which chunks are duplicates
+            num_perm (int): Number of MinHash permutations
+            bands (int): Number of LSH bands; must divide num_perm
+            shingle_size (int): Words per shingle
+            mode (str): "drop" to remove duplicates, "link" to reuse canonical embeddings
+            seed (int): Seed of the hash permutations
+        """
+        if num_perm % bands:
+            raise ValueError(f"bands={bands} must divide num_perm={num_perm}")
+        if mode not in self.modes:
+            raise ValueError(f"Unsupported dedup mode: {mode}. Choose from {list(self.modes)}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.mode = mode
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every canonical chunk."""
+        self.duplicates = 0
+        self._signatures: List[np.ndarray] = []
+        self._exact: Dict[bytes, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        # Link mode: canonical embeddings, and canonical chunks awaiting theirs
+        self._embeddings: Dict[int, np.ndarray] = {}
+        self._pending: Dict[int, Chunk] = {}
+
+    def _words(self, text: str) -> List[str]:
+        return re.findall(r"\w+", text.lower())
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Return the MinHash signature of a text's word shingles, or None if it has no words."""
+        words = self._words(text)
+        if not words:
+            return None
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) % _PRIME for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        # Values are below 2**31, so the stored signature fits in uint32
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def canonical(self, chunk: Chunk) -> Optional[int]:
+        """
+        Return the id of the earlier chunk that chunk duplicates, or register chunk as canonical.
+
+        Args:
+            chunk (Chunk): Chunk to look up
+
+        Returns:
+            Optional[int]: Id of the canonical chunk, or None if chunk is new
+        """
+        words = self._words(chunk.text)
+        exact_key = hashlib.sha1(" ".join(words).encode("utf-8")).digest()
+        index = self._exact.get(exact_key)
+        if index is not None:
+            self.duplicates += 1
+            return index
+
+        signature = self.signature(chunk.text)
+        if signature is None:
+            return None
+        keys = self._band_keys(signature)
+        candidates = {index for band, key in enumerate(keys) for index in self._buckets[band].get(key, ())}
+        for index in sorted(candidates):
+            if np.mean(self._signatures[index] == signature) >= self.threshold:
+                self.duplicates += 1
+                return index
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._exact[exact_key] = index
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(index)
+        if self.mode == "link":
+            # Held only until finish records its embedding
+            self._pending[index] = chunk
+        return None
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.num_perm // self.bands
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def checkpoint(self) -> Tuple[int, int]:
+        """Return the state that rollback() restores."""
+        return len(self._signatures), self.duplicates
+
+    def rollback(self, checkpoint: Tuple[int, int]) -> None:
+        """
+        Unregister every canonical chunk registered since a checkpoint.
+
+        Args:
+            checkpoint (Tuple[int, int]): Value returned by checkpoint()
+        """
+        count, self.duplicates = checkpoint
+        for index in range(count, len(self._signatures)):
+            for band, key in enumerate(self._band_keys(self._signatures[index])):
+                bucket = self._buckets[band][key]
+                bucket.remove(index)
+                if not bucket:
+                    del self._buckets[band][key]
+            self._embeddings.pop(index, None)
+            self._pending.pop(index, None)
+        del self._signatures[count:]
+        # Only runs when embedding fails, so a full pass over the exact keys is fine
+        self._exact = {key: index for key, index in self._exact.items() if index < count}
+
+    def split(self, chunks: List[Chunk]) -> Tuple[List[Chunk], List[Tuple[Chunk, int]]]:
+        """
+        Separate chunks that need embedding from near-duplicates.
+
+        Args:
+            chunks (List[Chunk]): Chunks in document order
+
+        Returns:
+            Tuple: Chunks to embed, and ``(duplicate, canonical id)`` pairs
+        """
+        unique = []
+        duplicates = []
+        for chunk in chunks:
+            canonical = self.canonical(chunk)
+            if canonical is None:
+                unique.append(chunk)
+            else:
+                duplicates.append((chunk, canonical))
+        return unique, duplicates
+
+    def finish(self, chunks: List[Chunk], duplicates: List[Tuple[Chunk, int]]) -> List[Chunk]:
+        """
+        Resolve duplicates once the unique chunks are embedded.
+
+        Args:
+            chunks (List[Chunk]): All chunks passed to split
+            duplicates (List[Tuple[Chunk, int]]): Pairs returned by split
+
+        Returns:
+            List[Chunk]: The chunks to keep, in order
+        """
+        if self.mode == "link":
+            # Canonical chunks not embedded by now never will be, e.g. without an embedding model
+            for index, chunk in self._pending.items():
+                if chunk.embedding is not None:
+                    self._embeddings[index] = np.asarray(chunk.embedding, dtype=np.float32)
+            self._pending.clear()
+            for duplicate, index in duplicates:
+                embedding = self._embeddings.get(index)
+                duplicate.embedding = None if embedding is None else embedding.tolist()
+            return chunks
+        dropped = {id(duplicate) for duplicate, _ in duplicates}
+        return [chunk for chunk in chunks if id(chunk) not in dropped]
@@ -2,13 +2,63 @@
 Embedding models for document vectorization.
 """
 
+import asyncio
+import base64
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Union
 import numpy as np
 
+def decode_base64_embeddings(encoded: Sequence[Union[str, bytes]]) -> np.ndarray:
+    """
+    Decode base64 embeddings into one preallocated (n, dim) float32 array.
+    
+    Each item is the base64 encoding of little-endian float32 values, as
+    returned by providers that support ``encoding_format="base64"``. Rows are
+    read with np.frombuffer, so no per-value Python floats are created.
+    
+    Args:
+        encoded (Sequence[Union[str, bytes]]): One encoded embedding per text
+    
+    Returns:
+        np.ndarray: Embedding matrix of shape (len(encoded), dim)
+    """
+    if not encoded:
+        return np.empty((0, 0), dtype=np.float32)
+    first = np.frombuffer(base64.b64decode(encoded[0]), dtype="<f4")
+    vectors = np.empty((len(encoded), len(first)), dtype=np.float32)
+    vectors[0] = first
+    for i in range(1, len(encoded)):
+        row = np.frombuffer(base64.b64decode(encoded[i]), dtype="<f4")
+        if len(row) != len(first):
+            raise ValueError(f"Embedding {i} has dimension {len(row)}, expected {len(first)}")
+        vectors[i] = row
+    return vectors
+
 class BaseEmbeddings(ABC):
     """Base class for embedding models."""
     
+    # Provider identifier, part of the embedding cache key
+    provider_name: str = "custom"
+    
+    # Per-request limits used when grouping texts into embed_batch calls
+    max_batch_size: int = 64
+    max_batch_tokens: int = 8191
+    
+    # Constructor arguments of providers whose API clients cannot be pickled
+    _config: Optional[Dict[str, Any]] = None
+    
+    def __getstate__(self):
+        if self._config is None:
+            return self.__dict__.copy()
+        # API clients hold locks and connection pools; the copy builds its own
+        return {"_config": self._config}
+    
+    def __setstate__(self, state):
+        if set(state) == {"_config"}:
+            self.__init__(**state["_config"])
+        else:
+            self.__dict__.update(state)
+    
     @abstractmethod
     def embed_text(self, text: str) -> List[float]:
         """Generate embeddings for a single text."""
@@ -18,46 +68,106 @@ class BaseEmbeddings(ABC):
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple texts."""
         pass
+    
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts as an (n, dim) float32 array.
+        
+        Providers that can return binary embeddings override this to decode
+        them directly instead of building Python float lists.
+        """
+        return np.asarray(self.embed_batch(texts), dtype=np.float32)
+    
+    async def aembed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """Asynchronously generate embeddings for multiple texts as an (n, dim) float32 array."""
+        return np.asarray(await self.aembed_batch(texts), dtype=np.float32)
+    
+    async def aembed_text(self, text: str) -> List[float]:
+        """Asynchronously generate embeddings for a single text."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed_text, text)
+    
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Asynchronously generate embeddings for multiple texts.
+        
+        Providers without a native async client run the blocking call in the
+        default executor so it does not stall the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.embed_batch, texts)
 
 class OpenAIEmbeddings(BaseEmbeddings):
     """OpenAI embeddings implementation."""
     
-    def __init__(self, api_key: str, model: str = "text-embedding-3-small"):
+    provider_name = "openai"
+    max_batch_size = 2048
+    max_batch_tokens = 300000
+    
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "text-embedding-3-small",
+        base_url: Optional[str] = None
+    ):
         """
         Initialize OpenAI embeddings.
         
         Args:
             api_key (str): OpenAI API key
             model (str): Model name (text-embedding-3-small or text-embedding-3-large)
+            base_url (str, optional): Override the API endpoint (e.g. a proxy or local server)
         """
+        self._config = {"api_key": api_key, "model": model, "base_url": base_url}
         try:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=api_key)
+            from openai import AsyncOpenAI, OpenAI
+            self.client = OpenAI(api_key=api_key, base_url=base_url)
+            self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url)
             self.model = model
         except ImportError:
             raise ImportError("Please install openai: pip install openai")
     
     def embed_text(self, text: str) -> List[float]:
         """Generate embeddings for a single text using OpenAI."""
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=text,
-            encoding_format="float"
-        )
-        return response.data[0].embedding
+        return self.embed_batch_array([text])[0].tolist()
     
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple texts using OpenAI."""
+        return self.embed_batch_array(texts).tolist()
+    
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for multiple texts using OpenAI, transferred as base64."""
         response = self.client.embeddings.create(
             model=self.model,
             input=texts,
-            encoding_format="float"
+            encoding_format="base64"
         )
-        return [data.embedding for data in response.data]
+        return decode_base64_embeddings([data.embedding for data in response.data])
+    
+    async def aembed_text(self, text: str) -> List[float]:
+        """Asynchronously generate embeddings for a single text using OpenAI."""
+        return (await self.aembed_batch_array([text]))[0].tolist()
+    
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronously generate embeddings for multiple texts using OpenAI."""
+        return (await self.aembed_batch_array(texts)).tolist()
+    
+    async def aembed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """Asynchronously generate embeddings for multiple texts using OpenAI, transferred as base64."""
+        response = await self.async_client.embeddings.create(
+            model=self.model,
+            input=texts,
+            encoding_format="base64"
+        )
+        return decode_base64_embeddings([data.embedding for data in response.data])
 
 class MistralEmbeddings(BaseEmbeddings):
     """Mistral AI embeddings implementation."""
     
+    provider_name = "mistral"
+    max_batch_size = 128
+    max_batch_tokens = 16384
+    
     def __init__(self, api_key: str, model: str = "mistral-embed"):
         """
         Initialize Mistral embeddings.
@@ -66,10 +176,12 @@ class MistralEmbeddings(BaseEmbeddings):
             api_key (str): Mistral AI API key
             model (str): Model name
         """
+        self._config = {"api_key": api_key, "model": model}
         try:
+            from mistralai.async_client import MistralAsyncClient
             from mistralai.client import MistralClient
-            from mistralai.models.chat_completion import ChatMessage
             self.client = MistralClient(api_key=api_key)
+            self.async_client = MistralAsyncClient(api_key=api_key)
             self.model = model
         except ImportError:
             raise ImportError("Please install mistralai: pip install mistralai")
@@ -89,10 +201,24 @@ class MistralEmbeddings(BaseEmbeddings):
             input=texts
         )
         return [data.embedding for data in response.data]
+    
+    async def aembed_text(self, text: str) -> List[float]:
+        """Asynchronously generate embeddings for a single text using Mistral."""
+        return (await self.aembed_batch([text]))[0]
+    
+    async def aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronously generate embeddings for multiple texts using Mistral."""
+        response = await self.async_client.embeddings(
+            model=self.model,
+            input=texts
+        )
+        return [data.embedding for data in response.data]
 
 class DeepSeekEmbeddings(BaseEmbeddings):
     """DeepSeek embeddings implementation."""
     
+    provider_name = "deepseek"
+    
     def __init__(self, api_key: str, model: str = "deepseek-embed"):
         """
         Initialize DeepSeek embeddings.
@@ -101,6 +227,7 @@ class DeepSeekEmbeddings(BaseEmbeddings):
             api_key (str): DeepSeek API key
             model (str): Model name
         """
+        self._config = {"api_key": api_key, "model": model}
         try:
             import deepseek
             self.client = deepseek.Client(api_key=api_key)
@@ -128,7 +255,13 @@ class EmbeddingFactory:
     """Factory class for creating embedding instances."""
     
     @staticmethod
-    def create(provider: str, api_key: str, model: Optional[str] = None) -> BaseEmbeddings:
+    def create(
+        provider: str,
+        api_key: str,
+        model: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        cache_memory_bytes: int = 64 * 1024 * 1024
+    ) -> BaseEmbeddings:
         """
         Create an embedding instance based on the provider.
         
@@ -136,9 +269,12 @@ class EmbeddingFactory:
             provider (str): Provider name ('openai', 'mistral', or 'deepseek')
             api_key (str): API key for the provider
             model (str, optional): Model name
+            cache_path (str, optional): SQLite file for a persistent embedding cache
+            cache_memory_bytes (int): Size of the cache's in-memory LRU
         
         Returns:
-            BaseEmbeddings: An instance of the embedding class
+            BaseEmbeddings: An instance of the embedding class, wrapped in
+            CachedEmbeddings when cache_path is given
         """
         providers = {
             'openai': (OpenAIEmbeddings, "text-embedding-3-small"),
@@ -150,4 +286,8 @@ class EmbeddingFactory:
             raise ValueError(f"Unsupported provider: {provider}. Choose from {list(providers.keys())}")
         
         EmbeddingClass, default_model = providers[provider]
-        return EmbeddingClass(api_key=api_key, model=model or default_model) 
\ No newline at end of file
+        embeddings = EmbeddingClass(api_key=api_key, model=model or default_model)
+        if cache_path:
+            from .cache import CachedEmbeddings, EmbeddingCache
+            embeddings = CachedEmbeddings(embeddings, EmbeddingCache(cache_path, cache_memory_bytes))
+        return embeddings 
\ No newline at end of file
@@ -0,0 +1,541 @@
+"""
+Text extraction from document files.
+"""
+
+import json
+import json.decoder
+import json.scanner
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Tuple, Type
+
+PDF_MIME_TYPE = "application/pdf"
+DOCX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# MIME types that libmagic reports for many specific formats (or for empty files)
+GENERIC_MIME_TYPES = {
+    "text/plain", "application/octet-stream", "application/zip", "application/x-empty", "inode/x-empty"
+}
+
+# Bytes of the file header handed to libmagic; enough to recognize OOXML containers
+MAGIC_HEADER_BYTES = 8192
+
+# PdfReader instances cached per worker process, keyed by file path
+_pdf_readers: Dict[str, Any] = {}
+
+def _open_pdf(file_path: str) -> Any:
+    """Open a PDF lazily; pages are only parsed when accessed."""
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        raise ImportError("Please install PyPDF2: pip install PyPDF2")
+    return PdfReader(file_path)
+
+def _extract_pdf_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) in a worker process."""
+    reader = _pdf_readers.get(file_path)
+    if reader is None:
+        _pdf_readers.clear()
+        reader = _pdf_readers[file_path] = _open_pdf(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+def pdf_info(file_path: str, reader: Any = None) -> Dict[str, Any]:
+    """
+    Read a PDF's page count and document information without extracting text.
+
+    Args:
+        file_path (str): Path to the PDF file
+        reader (PdfReader, optional): Already open reader of the file
+
+    Returns:
+        Dict[str, Any]: ``page_count`` plus ``title``/``author`` when present
+    """
+    if reader is None:
+        reader = _open_pdf(file_path)
+    info: Dict[str, Any] = {"page_count": len(reader.pages)}
+    document_info = reader.metadata or {}
+    for key in ("title", "author"):
+        value = document_info.get(f"/{key.capitalize()}")
+        if value:
+            info[key] = str(value)
+    return info
+
+def iter_pdf_pages(
+    file_path: str,
+    workers: int = 1,
+    pages_per_task: int = 8,
+    min_parallel_pages: int = 32,
+    reader: Any = None
+) -> Iterator[str]:
+    """
+    Lazily yield the text of each page of a PDF, in order.
+
+    Small files, or workers=1, are extracted page by page in this process.
+    Otherwise page ranges are fanned out over a process pool with a bounded
+    number of ranges in flight, so memory stays proportional to
+    workers * pages_per_task pages rather than the whole document.
+
+    Args:
+        file_path (str): Path to the PDF file
+        workers (int): Number of worker processes
+        pages_per_task (int): Pages extracted per worker task
+        min_parallel_pages (int): Smallest page count worth parallelizing
+        reader (PdfReader, optional): Already open reader of the file
+
+    Yields:
+        str: Text of each page
+    """
+    if reader is None:
+        reader = _open_pdf(file_path)
+    page_count = len(reader.pages)
+
+    if workers <= 1 or page_count < min_parallel_pages:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    del reader
+    ranges = iter(range(0, page_count, pages_per_task))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight: Deque[Future] = deque()
+
+        def submit() -> Optional[Future]:
+            start = next(ranges, None)
+            if start is None:
+                return None
+            end = min(start + pages_per_task, page_count)
+            return executor.submit(_extract_pdf_range, file_path, start, end)
+
+        for _ in range(2 * workers):
+            future = submit()
+            if future is None:
+                break
+            in_flight.append(future)
+        while in_flight:
+            pages = in_flight.popleft().result()
+            future = submit()
+            if future is not None:
+                in_flight.append(future)
+            yield from pages
+
+class BaseExtractor(ABC):
+    """
+    Base class for text extractors.
+    
+    Extractors stream a file's text as blocks. Paged extractors yield exactly
+    one block per page so callers can track page boundaries.
+    """
+    
+    mime_types: Tuple[str, ...] = ()
+    extensions: Tuple[str, ...] = ()
+    paged: bool = False
+    
+    @abstractmethod
+    def iter_text(self, file_path: str, read_size: int = 64 * 1024, workers: int = 1) -> Iterator[str]:
+        """
+        Yield the file's text as a sequence of blocks.
+        
+        Args:
+            file_path (str): Path to the file
+            read_size (int): Approximate number of characters per block
+            workers (int): Worker processes available to extractors that parallelize
+        """
+        pass
+    
+    def extract_info(self, file_path: str) -> Dict[str, Any]:
+        """Return format-specific metadata such as page_count, title or author."""
+        return {}
+    
+    def extract(
+        self,
+        file_path: str,
+        read_size: int = 64 * 1024,
+        workers: int = 1
+    ) -> Tuple[Dict[str, Any], Iterator[str]]:
+        """
+        Return the file's metadata and a stream of its text.
+        
+        Extractors of formats that must be parsed to read either one override
+        this to parse the file once for both.
+        
+        Args:
+            file_path (str): Path to the file
+            read_size (int): Approximate number of characters per block
+            workers (int): Worker processes available to extractors that parallelize
+        
+        Returns:
+            Tuple[Dict[str, Any], Iterator[str]]: The extract_info dict and the iter_text blocks
+        """
+        return self.extract_info(file_path), self.iter_text(file_path, read_size, workers)
+
+# Registered extractors keyed by MIME type, and MIME types keyed by file extension
+_extractors: Dict[str, BaseExtractor] = {}
+_extension_types: Dict[str, str] = {}
+
+def register_extractor(extractor_class: Type[BaseExtractor]) -> Type[BaseExtractor]:
+    """Class decorator registering an extractor for its MIME types and extensions."""
+    extractor = extractor_class()
+    for mime_type in extractor.mime_types:
+        _extractors[mime_type] = extractor
+    for extension in extractor.extensions:
+        _extension_types.setdefault(extension, extractor.mime_types[0])
+    return extractor_class
+
+def get_extractor(mime_type: str) -> BaseExtractor:
+    """Return the extractor for a MIME type."""
+    extractor = _extractors.get(mime_type)
+    if extractor is None:
+        raise ValueError(f"Unsupported file type: {mime_type}")
+    return extractor
+
+def supported_mime_types() -> List[str]:
+    """List the MIME types with a registered extractor."""
+    return sorted(_extractors)
+
+# One libmagic handle per thread; creating a handle reloads the magic database
+_magic_local = threading.local()
+
+def _get_magic() -> Any:
+    """Return this thread's long-lived libmagic handle, or None if libmagic is unavailable."""
+    detector = getattr(_magic_local, "detector", False)
+    if detector is False:
+        try:
+            import magic
+            detector = magic.Magic(mime=True)
+        except ImportError:
+            detector = None
+        _magic_local.detector = detector
+    return detector
+
+def _extension_type(file_path: str) -> Optional[str]:
+    """Return the MIME type registered for the file's extension."""
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    return _extension_types.get(extension)
+
+@lru_cache(maxsize=4096)
+def _detect_cached(file_path: str, mtime_ns: int, size: int) -> str:
+    """Detect a MIME type; cached per (path, mtime, size) so unchanged files are probed once."""
+    detector = _get_magic()
+    if detector is None:
+        return _extension_type(file_path) or "application/octet-stream"
+    with open(file_path, "rb") as f:
+        mime_type = detector.from_buffer(f.read(MAGIC_HEADER_BYTES))
+    if mime_type in GENERIC_MIME_TYPES:
+        mime_type = _extension_type(file_path) or mime_type
+    return mime_type
+
+def detect_mime_type(file_path: str, file_stats: Optional[os.stat_result] = None) -> str:
+    """
+    Detect a file's MIME type.
+    
+    The file header is read once and sniffed with a reused libmagic handle.
+    libmagic reports formats such as Markdown as text/plain, so generic
+    results are refined with the file extension when it is registered; the
+    extension alone is used when libmagic is not installed.
+    
+    Args:
+        file_path (str): Path to the file
+        file_stats (os.stat_result, optional): Result of os.stat if already available
+    """
+    file_stats = file_stats or os.stat(file_path)
+    return _detect_cached(os.path.abspath(file_path), file_stats.st_mtime_ns, file_stats.st_size)
+
+@register_extractor
+class TextExtractor(BaseExtractor):
+    """Plain text extractor."""
+    
+    mime_types = ("text/plain",)
+    extensions = ("txt", "text", "log")
+    
+    def iter_text(self, file_path: str, read_size: int = 64 * 1024, workers: int = 1) -> Iterator[str]:
+        """Read the file in blocks of read_size characters."""
+        with open(file_path, "r", encoding="utf-8") as f:
+            yield from iter(lambda: f.read(read_size), "")
+
+@register_extractor
+class PDFExtractor(BaseExtractor):
+    """PDF extractor yielding one block per page."""
+    
+    mime_types = (PDF_MIME_TYPE,)
+    extensions = ("pdf",)
+    paged = True
+    
+    def iter_text(self, file_path: str, read_size: int = 64 * 1024, workers: int = 1) -> Iterator[str]:
+        """Yield the text of each page, optionally extracting pages in parallel."""
+        return iter_pdf_pages(file_path, workers=workers)
+    
+    def extract_info(self, file_path: str) -> Dict[str, Any]:
+        """Return the page count, title and author of the PDF."""
+        return pdf_info(file_path)
+    
+    def extract(
+        self,
+        file_path: str,
+        read_size: int = 64 * 1024,
+        workers: int = 1
+    ) -> Tuple[Dict[str, Any], Iterator[str]]:
+        """Read the document information and the pages through one reader."""
+        reader = _open_pdf(file_path)
+        return pdf_info(file_path, reader), iter_pdf_pages(file_path, workers=workers, reader=reader)
+
+@register_extractor
+class DocxExtractor(BaseExtractor):
+    """Word document extractor."""
+    
+    mime_types = (DOCX_MIME_TYPE,)
+    extensions = ("docx",)
+    
+    @staticmethod
+    def _open(file_path: str) -> Any:
+        try:
+            import docx
+        except ImportError:
+            raise ImportError("Please install python-docx: pip install python-docx")
+        return docx.Document(file_path)
+    
+    def iter_text(self, file_path: str, read_size: int = 64 * 1024, workers: int = 1) -> Iterator[str]:
+        """Yield paragraphs and table rows in document order, one line each."""
+        return self._iter_document(self._open(file_path))
+    
+    @staticmethod
+    def _iter_document(document: Any) -> Iterator[str]:
+        from docx.oxml.ns import qn
+        from docx.table import Table
+        from docx.text.paragraph import Paragraph
+        for element in document.element.body.iterchildren():
+            if element.tag == qn("w:p"):
+                yield Paragraph(element, document).text + "\n"
+            elif element.tag == qn("w:tbl"):
+                for row in Table(element, document).rows:
+                    yield "\t".join(cell.text for cell in row.cells) + "\n"
+    
+    def extract_info(self, file_path: str) -> Dict[str, Any]:
+        """Return the title and author from the document properties."""
+        return self._info(self._open(file_path))
+    
+    @staticmethod
+    def _info(document: Any) -> Dict[str, Any]:
+        properties = document.core_properties
+        return {key: value for key, value in (("title", properties.title), ("author", properties.author)) if value}
+    
+    def extract(
+        self,
+        file_path: str,
+        read_size: int = 64 * 1024,
+        workers: int = 1
+    ) -> Tuple[Dict[str, Any], Iterator[str]]:
+        """Read the document properties and text from one parse of the file."""
+        document = self._open(file_path)
+        return self._info(document), self._iter_document(document)
+
+class _HTMLTextParser(HTMLParser):
+    """Incremental HTML to text converter skipping scripts and styles."""
+    
+    block_tags = {
+        "p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6",
+        "section", "article", "header", "footer", "blockquote", "pre", "table", "title"
+    }
+    skip_tags = {"script", "style", "noscript", "template"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skip_tags:
+            self._skip_depth += 1
+        elif tag in self.block_tags:
+            self.parts.append("\n")
+    
+    def handle_endtag(self, tag):
+        if tag in self.skip_tags:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.block_tags:
+            self.parts.append("\n")
+    
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+    
+    def take(self) -> str:
+        """Return and reset the text collected so far."""
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+@register_extractor
+class HTMLExtractor(BaseExtractor):
+    """HTML extractor built on the standard library's incremental parser."""
+    
+    mime_types = ("text/html", "application/xhtml+xml")
+    extensions = ("html", "htm", "xhtml")
+    
+    def iter_text(self, file_path: str, read_size: int = 64 * 1024, workers: int = 1) -> Iterator[str]:
+        """Feed the file to the parser in blocks and yield the visible text."""
+        parser = _HTMLTextParser()
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            for block in iter(lambda: f.read(read_size), ""):
+                parser.feed(block)
+                text = parser.take()
+                if text:
+                    yield text
+        parser.close()
+        text = parser.take()
+        if text:
+            yield text
+
+@register_extractor
+class MarkdownExtractor(BaseExtractor):
+    """Markdown extractor rendering groups of blocks to text."""
+    
+    mime_types = ("text/markdown", "text/x-markdown")
+    extensions = ("md", "markdown")
+    
+    def iter_text(self, file_path: str, read_size: int = 64 * 1024, workers: int = 1) -> Iterator[str]:
+        """Render the file in groups of blank-line separated blocks of about read_size characters."""
+        try:
+            import markdown
+        except ImportError:
+            raise ImportError("Please install markdown: pip install markdown")
+        renderer = markdown.Markdown()
+        
+        def render(lines: List[str]) -> str:
+            parser = _HTMLTextParser()
+            parser.feed(renderer.reset().convert("".join(lines)))
+            parser.close()
+            return parser.take() + "\n"
+        
+        lines: List[str] = []
+        size = 0
+        in_fence = False
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.lstrip().startswith(("```", "~~~")):
+                    in_fence = not in_fence
+                # Only split at blank lines outside fenced code blocks
+                if not line.strip() and not in_fence and size >= read_size:
+                    yield render(lines)
+                    lines = []
+                    size = 0
+                lines.append(line)
+                size += len(line)
+        if lines:
+            yield render(lines)
+
+# Patterns of the JSON tokenizer; a string only matches once its closing quote has been read
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_JSON_DELIMITERS = set(" \t\n\r,:]}")
+_JSON_CONSTANTS = {
+    "true": True, "false": False, "null": None,
+    "NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf"),
+}
+
+def _iter_json_tokens(f: IO[str], read_size: int) -> Iterator[Tuple[str, Any]]:
+    """
+    Tokenize a JSON text file incrementally, holding at most one unfinished token.
+
+    Yields:
+        Tuple[str, Any]: ``(punctuation, None)`` for ``{}[],:``, ``("value", value)``,
+        and finally ``("end", None)``
+    """
+    buffer = ""
+    position = 0
+    eof = False
+    while True:
+        position = _JSON_WHITESPACE.match(buffer, position).end()
+        char = buffer[position:position + 1]
+        if char and char in "{}[],:":
+            yield char, None
+            position += 1
+            continue
+
+        token = None
+        if char == '"':
+            match = _JSON_STRING.match(buffer, position)
+            if match:
+                token = json.decoder.scanstring(buffer, position + 1)[0], match.end()
+        elif char:
+            match = json.scanner.NUMBER_RE.match(buffer, position)
+            if match:
+                integer, fraction, exponent = match.groups()
+                number = float(integer + (fraction or "") + (exponent or "")) if fraction or exponent else int(integer)
+                token = number, match.end()
+            for name, constant in _JSON_CONSTANTS.items():
+                if buffer.startswith(name, position):
+                    token = constant, position + len(name)
+        # A number or constant is only complete once the character after it has been read
+        if token is not None and (eof or char == '"' or buffer[token[1]:token[1] + 1] in _JSON_DELIMITERS):
+            yield "value", token[0]
+            position = token[1]
+            continue
+
+        if eof:
+            if char:
+                raise ValueError(f"Invalid JSON at {buffer[position:position + 20]!r}")
+            yield "end", None
+            return
+        block = f.read(read_size)
+        eof = not block
+        buffer = buffer[position:] + block
+        position = 0
+
+@register_extractor
+class JSONExtractor(BaseExtractor):
+    """JSON extractor flattening documents into path/value lines."""
+    
+    mime_types = ("application/json",)
+    extensions = ("json",)
+    
+    def _walk(self, tokens: Iterator[Tuple[str, Any]], token: Tuple[str, Any], path: str) -> Iterator[str]:
+        kind, value = token
+        if kind == "{":
+            kind, key = next(tokens)
+            while kind != "}":
+                if kind != "value" or not isinstance(key, str) or next(tokens)[0] != ":":
+                    raise ValueError(f"Invalid JSON object at {path or 'the top level'}")
+                yield from self._walk(tokens, next(tokens), f"{path}.{key}" if path else key)
+                kind, key = self._next_item(tokens, "}", path)
+        elif kind == "[":
+            token = next(tokens)
+            i = 0
+            while token[0] != "]":
+                yield from self._walk(tokens, token, f"{path}[{i}]")
+                token = self._next_item(tokens, "]", path)
+                i += 1
+        elif kind == "value":
+            if value is not None:
+                yield f"{path}: {value}\n" if path else f"{value}\n"
+        else:
+            raise ValueError(f"Unexpected {kind!r} in JSON at {path or 'the top level'}")
+    
+    @staticmethod
+    def _next_item(tokens: Iterator[Tuple[str, Any]], close: str, path: str) -> Tuple[str, Any]:
+        """Consume the separator after a container item and return the next item's first token."""
+        kind, _ = next(tokens)
+        if kind == ",":
+            return next(tokens)
+        if kind != close:
+            raise ValueError(f"Expected ',' or {close!r} in JSON at {path or 'the top level'}")
+        return kind, None
+    
+    def iter_text(self, file_path: str, read_size: int = 64 * 1024, workers: int = 1) -> Iterator[str]:
+        """
+        Yield one line per leaf value, labelled with its path.
+        
+        The file is tokenized block by block, so memory use is bounded by
+        read_size and the longest single value rather than the file size.
+        A key repeated within an object yields a line for each occurrence.
+        """
+        with open(file_path, "r", encoding="utf-8") as f:
+            tokens = _iter_json_tokens(f, read_size)
+            yield from self._walk(tokens, next(tokens), "")
+            if next(tokens)[0] != "end":
+                raise ValueError(f"Extra data after the JSON value in {file_path}")
@@ -0,0 +1,762 @@
+"""
+Approximate nearest neighbour indexes for local vector stores.
+
+Indexes map integer ids to L2-normalized float32 vectors and rank by inner
+product, i.e. cosine similarity.
+"""
+
+import heapq
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+class BaseIndex(ABC):
+    """Base class for vector indexes."""
+
+    @abstractmethod
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Add normalized vectors under the given integer ids."""
+        pass
+
+    @abstractmethod
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar vectors for each normalized query.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: ``(ids, scores)`` of shape (n_queries, k),
+            best first, padded with -1 and -inf when fewer than k vectors match
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, ids: Sequence[int]) -> None:
+        """Remove vectors by id."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all vectors, keeping the index parameters."""
+        pass
+
+    @abstractmethod
+    def save(self, path: str) -> None:
+        """Save the index to a file."""
+        pass
+
+    @classmethod
+    @abstractmethod
+    def load(cls, path: str) -> "BaseIndex":
+        """Load an index saved with save."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+def _pad_results(results: List[List[Tuple[float, int]]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack per-query (score, id) lists into padded id and score arrays."""
+    ids = np.full((len(results), k), -1, dtype=np.int64)
+    scores = np.full((len(results), k), -np.inf, dtype=np.float32)
+    for i, hits in enumerate(results):
+        for j, (score, label) in enumerate(hits[:k]):
+            ids[i, j] = label
+            scores[i, j] = score
+    return ids, scores
+
+class HNSWIndex(BaseIndex):
+    """
+    Hierarchical Navigable Small World graph index in pure Python and NumPy.
+
+    Vectors are inserted incrementally. M bounds the number of links per node
+    (2 * M on the bottom layer), ef_construction the candidate list used while
+    linking, and ef_search the candidate list used by queries; larger values
+    trade latency for recall. Removed vectors stay in the graph for
+    navigation but are never returned.
+    """
+
+    def __init__(self, M: int = 16, ef_construction: int = 200, ef_search: int = 64, seed: int = 0):
+        """
+        Initialize the index.
+
+        Args:
+            M (int): Links per node on the upper layers
+            ef_construction (int): Candidate list size while inserting
+            ef_search (int): Candidate list size while searching
+            seed (int): Seed for the random layer assignment
+        """
+        self.M = M
+        self.M0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1 / np.log(M)
+        self._rng = np.random.default_rng(seed)
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove all vectors, keeping the index parameters."""
+        self._vectors: Optional[np.ndarray] = None
+        self._labels = np.empty(0, dtype=np.int64)
+        self._levels = np.empty(0, dtype=np.int32)
+        self._deleted = np.empty(0, dtype=bool)
+        self._graph0 = np.empty((0, self.M0), dtype=np.int32)
+        self._degree0 = np.empty(0, dtype=np.int32)
+        self._upper: List[Dict[int, List[int]]] = []
+        self._nodes: Dict[int, int] = {}
+        self._count = 0
+        self._entry = -1
+        self._max_level = -1
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _reserve(self, rows: int, dim: int) -> None:
+        """Grow the node arrays geometrically."""
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if self._count + rows <= capacity:
+            return
+        capacity = max(1024, 2 * capacity, self._count + rows)
+
+        def grow(array: Optional[np.ndarray], shape: Tuple[int, ...], dtype, fill) -> np.ndarray:
+            grown = np.full(shape, fill, dtype=dtype)
+            if array is not None:
+                grown[:self._count] = array[:self._count]
+            return grown
+
+        self._vectors = grow(self._vectors, (capacity, dim), np.float32, 0)
+        self._labels = grow(self._labels, (capacity,), np.int64, -1)
+        self._levels = grow(self._levels, (capacity,), np.int32, 0)
+        self._deleted = grow(self._deleted, (capacity,), bool, False)
+        self._graph0 = grow(self._graph0, (capacity, self.M0), np.int32, -1)
+        self._degree0 = grow(self._degree0, (capacity,), np.int32, 0)
+
+    def _neighbors(self, node: int, level: int) -> List[int]:
+        if level == 0:
+            return self._graph0[node, :self._degree0[node]].tolist()
+        return self._upper[level - 1].get(node, [])
+
+    def _set_neighbors(self, node: int, level: int, neighbors: List[int]) -> None:
+        if level == 0:
+            self._graph0[node, :len(neighbors)] = neighbors
+            self._graph0[node, len(neighbors):] = -1
+            self._degree0[node] = len(neighbors)
+        else:
+            self._upper[level - 1][node] = list(neighbors)
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[int], ef: int, level: int) -> List[Tuple[float, int]]:
+        """Best-first search of one layer, returning up to ef (score, node) pairs."""
+        visited = set(entry_points)
+        scores = (self._vectors[entry_points] @ query).tolist()
+        candidates = [(-score, node) for score, node in zip(scores, entry_points)]
+        heapq.heapify(candidates)
+        results = [(score, node) for score, node in zip(scores, entry_points)]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            negative, node = heapq.heappop(candidates)
+            if -negative < results[0][0] and len(results) >= ef:
+                break
+            neighbors = [n for n in self._neighbors(node, level) if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for score, neighbor in zip((self._vectors[neighbors] @ query).tolist(), neighbors):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(results, (score, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return results
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """
+        Pick up to m diverse neighbors with the HNSW heuristic.
+
+        A candidate is skipped when it is closer to an already selected
+        neighbor than to the base element; skipped candidates fill any
+        remaining slots.
+        """
+        selected: List[int] = []
+        skipped: List[int] = []
+        for score, node in sorted(candidates, reverse=True):
+            if len(selected) >= m:
+                break
+            if selected and float(np.max(self._vectors[selected] @ self._vectors[node])) > score:
+                skipped.append(node)
+            else:
+                selected.append(node)
+        return selected + skipped[:m - len(selected)]
+
+    def _insert(self, node: int) -> None:
+        query = self._vectors[node]
+        level = int(-np.log(1.0 - self._rng.random()) * self._level_mult)
+        self._levels[node] = level
+        while len(self._upper) < level:
+            self._upper.append({})
+        for lc in range(1, level + 1):
+            self._upper[lc - 1][node] = []
+
+        if self._entry < 0:
+            self._entry = node
+            self._max_level = level
+            return
+
+        entry_points = [self._entry]
+        for lc in range(self._max_level, level, -1):
+            entry_points = [max(self._search_layer(query, entry_points, 1, lc))[1]]
+
+        for lc in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(query, entry_points, self.ef_construction, lc)
+            m_max = self.M0 if lc == 0 else self.M
+            neighbors = self._select_neighbors(found, self.M)
+            self._set_neighbors(node, lc, neighbors)
+            for neighbor in neighbors:
+                links = self._neighbors(neighbor, lc) + [node]
+                if len(links) > m_max:
+                    scores = (self._vectors[links] @ self._vectors[neighbor]).tolist()
+                    links = self._select_neighbors(list(zip(scores, links)), m_max)
+                self._set_neighbors(neighbor, lc, links)
+            entry_points = [n for _, n in found]
+
+        if level > self._max_level:
+            self._entry = node
+            self._max_level = level
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Insert normalized vectors; re-adding an id replaces its vector."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        ids = np.asarray(ids, dtype=np.int64)
+        self._reserve(len(vectors), vectors.shape[1])
+        for vector, label in zip(vectors, ids.tolist()):
+            self.remove([label])
+            node = self._count
+            self._count += 1
+            self._vectors[node] = vector
+            self._labels[node] = label
+            self._nodes[label] = node
+            self._insert(node)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the graph for each query with a candidate list of max(ef_search, k)."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        ef = max(self.ef_search, k)
+        results: List[List[Tuple[float, int]]] = []
+        for query in queries:
+            if self._entry < 0:
+                results.append([])
+                continue
+            entry_points = [self._entry]
+            for lc in range(self._max_level, 0, -1):
+                entry_points = [max(self._search_layer(query, entry_points, 1, lc))[1]]
+            found = self._search_layer(query, entry_points, ef, 0)
+            hits = sorted(((s, n) for s, n in found if not self._deleted[n]), reverse=True)[:k]
+            results.append([(s, int(self._labels[n])) for s, n in hits])
+        return _pad_results(results, k)
+
+    def remove(self, ids: Sequence[int]) -> None:
+        """Mark vectors as removed; they remain in the graph for navigation."""
+        for label in ids:
+            node = self._nodes.pop(int(label), None)
+            if node is not None:
+                self._deleted[node] = True
+
+    def save(self, path: str) -> None:
+        """Save the graph and vectors to a NumPy .npz file at path."""
+        n = self._count
+        arrays: Dict[str, np.ndarray] = {
+            "params": np.array(
+                [self.M, self.ef_construction, self.ef_search, self._entry, self._max_level, n], dtype=np.int64
+            ),
+            "vectors": self._vectors[:n] if self._vectors is not None else np.empty((0, 0), dtype=np.float32),
+            "labels": self._labels[:n],
+            "levels": self._levels[:n],
+            "deleted": self._deleted[:n],
+            "graph0": self._graph0[:n],
+            "degree0": self._degree0[:n],
+        }
+        for level, links in enumerate(self._upper, 1):
+            nodes = sorted(links)
+            arrays[f"upper{level}_nodes"] = np.array(nodes, dtype=np.int32)
+            arrays[f"upper{level}_counts"] = np.array([len(links[node]) for node in nodes], dtype=np.int32)
+            arrays[f"upper{level}_links"] = np.array(
+                [n for node in nodes for n in links[node]], dtype=np.int32
+            )
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "HNSWIndex":
+        """Load an index saved with save."""
+        with np.load(path) as data:
+            M, ef_construction, ef_search, entry, max_level, n = data["params"].tolist()
+            index = cls(M=M, ef_construction=ef_construction, ef_search=ef_search)
+            if n:
+                index._reserve(n, data["vectors"].shape[1])
+                index._vectors[:n] = data["vectors"]
+                index._labels[:n] = data["labels"]
+                index._levels[:n] = data["levels"]
+                index._deleted[:n] = data["deleted"]
+                index._graph0[:n] = data["graph0"]
+                index._degree0[:n] = data["degree0"]
+            index._count = n
+            index._entry = entry
+            index._max_level = max_level
+            for level in range(1, max_level + 1):
+                nodes = data[f"upper{level}_nodes"].tolist()
+                counts = data[f"upper{level}_counts"].tolist()
+                flat = data[f"upper{level}_links"].tolist()
+                links: Dict[int, List[int]] = {}
+                offset = 0
+                for node, count in zip(nodes, counts):
+                    links[node] = flat[offset:offset + count]
+                    offset += count
+                index._upper.append(links)
+        index._nodes = {
+            int(label): node for node, label in enumerate(index._labels[:n].tolist()) if not index._deleted[node]
+        }
+        return index
+
+class HnswlibIndex(BaseIndex):
+    """HNSW index backed by the compiled hnswlib library."""
+
+    def __init__(
+        self,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        initial_capacity: int = 1024
+    ):
+        """
+        Initialize the index; the underlying hnswlib index is created on the first add.
+
+        Args:
+            M (int): Links per node on the upper layers
+            ef_construction (int): Candidate list size while inserting
+            ef_search (int): Candidate list size while searching
+            initial_capacity (int): Number of vectors allocated up front
+        """
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("Please install hnswlib: pip install hnswlib")
+        self._hnswlib = hnswlib
+        self.M = M
+        self.ef_construction = ef_construction
+        self._ef_search = ef_search
+        self.initial_capacity = initial_capacity
+        self._index: Any = None
+        self._dim = 0
+        self._live: set = set()
+
+    @property
+    def ef_search(self) -> int:
+        return self._ef_search
+
+    @ef_search.setter
+    def ef_search(self, value: int) -> None:
+        self._ef_search = value
+        if self._index is not None:
+            self._index.set_ef(value)
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def clear(self) -> None:
+        """Remove all vectors, keeping the index parameters."""
+        self._index = None
+        self._live = set()
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Insert normalized vectors; re-adding an id replaces its vector."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        ids = np.asarray(ids, dtype=np.int64)
+        if self._index is None:
+            self._dim = vectors.shape[1]
+            self._index = self._hnswlib.Index(space="ip", dim=self._dim)
+            self._index.init_index(
+                max_elements=max(self.initial_capacity, len(vectors)),
+                ef_construction=self.ef_construction,
+                M=self.M
+            )
+            self._index.set_ef(self._ef_search)
+        needed = self._index.get_current_count() + len(vectors)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+        self._index.add_items(vectors, ids)
+        self._live.update(ids.tolist())
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Search with hnswlib's knn_query."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        live = len(self)
+        if self._index is None or live == 0:
+            return _pad_results([[] for _ in queries], k)
+        labels, distances = self._index.knn_query(queries, k=min(k, live))
+        results = [
+            [(1.0 - float(d), int(label)) for label, d in zip(row_labels, row_distances)]
+            for row_labels, row_distances in zip(labels, distances)
+        ]
+        return _pad_results(results, k)
+
+    def remove(self, ids: Sequence[int]) -> None:
+        """Mark vectors as deleted."""
+        if self._index is None:
+            return
+        for label in ids:
+            if int(label) in self._live:
+                self._index.mark_deleted(int(label))
+                self._live.discard(int(label))
+
+    def save(self, path: str) -> None:
+        """Save the hnswlib index to path with its parameters and live ids in path + '.json'."""
+        self._index.save_index(path)
+        with open(path + ".json", "w") as f:
+            json.dump({"M": self.M, "ef_construction": self.ef_construction, "ef_search": self._ef_search,
+                       "dim": self._dim, "ids": sorted(self._live)}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "HnswlibIndex":
+        """Load an index saved with save."""
+        with open(path + ".json") as f:
+            params = json.load(f)
+        index = cls(M=params["M"], ef_construction=params["ef_construction"], ef_search=params["ef_search"])
+        index._dim = params["dim"]
+        index._index = index._hnswlib.Index(space="ip", dim=index._dim)
+        index._index.load_index(path)
+        index._index.set_ef(index._ef_search)
+        index._live = set(params["ids"])
+        return index
+
+def _kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd's k-means with random initialization; empty clusters are re-seeded."""
+    centroids = data[rng.choice(len(data), size=k, replace=len(data) < k)].copy()
+    data_norms = (data ** 2).sum(axis=1)
+    for _ in range(iterations):
+        distances = data_norms[:, np.newaxis] - 2 * data @ centroids.T + (centroids ** 2).sum(axis=1)
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, data)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, np.newaxis]
+        if empty.any():
+            centroids[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+    return centroids
+
+class IVFPQIndex(BaseIndex):
+    """
+    Inverted file index with product-quantized residuals.
+
+    Vectors are assigned to the nearest of n_lists coarse centroids and the
+    residual is compressed to n_subvectors one-byte codes, so each vector
+    costs n_subvectors bytes instead of 4 * dim. Queries scan the n_probe
+    closest lists with a per-query lookup table (asymmetric distance
+    computation). With rerank > 0 the full vectors are also kept and the top
+    rerank candidates are re-scored exactly, trading memory for accuracy.
+
+    The index trains itself with k-means on the first train_size vectors
+    added; until then those vectors are searched exactly.
+    """
+
+    def __init__(
+        self,
+        n_lists: int = 256,
+        n_subvectors: int = 16,
+        n_probe: int = 8,
+        rerank: int = 0,
+        train_size: Optional[int] = None,
+        iterations: int = 20,
+        seed: int = 0
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            n_lists (int): Number of coarse clusters (inverted lists)
+            n_subvectors (int): Number of PQ sub-quantizers; must divide the dimension
+            n_probe (int): Number of lists scanned per query
+            rerank (int): Candidates re-scored with the full vectors, 0 to disable
+            train_size (int, optional): Vectors buffered before training, defaults to 40 * n_lists
+            iterations (int): k-means iterations
+            seed (int): Seed for training samples and initialization
+        """
+        self.n_lists = n_lists
+        self.n_subvectors = n_subvectors
+        self.n_probe = n_probe
+        self.rerank = rerank
+        self.train_size = train_size or max(40 * n_lists, 256)
+        self.iterations = iterations
+        self.seed = seed
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove all vectors and training, keeping the index parameters."""
+        self.centroids: Optional[np.ndarray] = None
+        self.codebooks: Optional[np.ndarray] = None
+        self._codes: List[np.ndarray] = []
+        self._list_ids: List[np.ndarray] = []
+        self._list_sizes: List[int] = []
+        self._locations: Dict[int, Tuple[int, int]] = {}
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._pending: Dict[int, np.ndarray] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self._locations) + len(self._pending)
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Train the coarse quantizer and the residual PQ codebooks on a sample."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        dim = vectors.shape[1]
+        if dim % self.n_subvectors:
+            raise ValueError(f"Dimension {dim} is not divisible by n_subvectors={self.n_subvectors}")
+        rng = np.random.default_rng(self.seed)
+        n_lists = min(self.n_lists, len(vectors))
+        self.centroids = _kmeans(vectors, n_lists, self.iterations, rng)
+        residuals = vectors - self.centroids[self._assign(vectors)]
+        sub_dim = dim // self.n_subvectors
+        codes_per_subvector = min(256, len(vectors))
+        self.codebooks = np.stack([
+            _kmeans(residuals[:, j * sub_dim:(j + 1) * sub_dim], codes_per_subvector, self.iterations, rng)
+            for j in range(self.n_subvectors)
+        ])
+        self._codes = [np.empty((0, self.n_subvectors), dtype=np.uint8) for _ in range(n_lists)]
+        self._list_ids = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self._list_sizes = [0] * n_lists
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return (vectors @ self.centroids.T - 0.5 * (self.centroids ** 2).sum(axis=1)).argmax(axis=1)
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        """Quantize residuals to one code per sub-vector."""
+        sub_dim = residuals.shape[1] // self.n_subvectors
+        codes = np.empty((len(residuals), self.n_subvectors), dtype=np.uint8)
+        for j, codebook in enumerate(self.codebooks):
+            part = residuals[:, j * sub_dim:(j + 1) * sub_dim]
+            distances = -2 * part @ codebook.T + (codebook ** 2).sum(axis=1)
+            codes[:, j] = distances.argmin(axis=1)
+        return codes
+
+    def _append(self, list_no: int, codes: np.ndarray, ids: np.ndarray) -> None:
+        size = self._list_sizes[list_no]
+        if size + len(ids) > len(self._list_ids[list_no]):
+            capacity = max(16, 2 * len(self._list_ids[list_no]), size + len(ids))
+            grown_codes = np.empty((capacity, self.n_subvectors), dtype=np.uint8)
+            grown_codes[:size] = self._codes[list_no][:size]
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_ids[:size] = self._list_ids[list_no][:size]
+            self._codes[list_no] = grown_codes
+            self._list_ids[list_no] = grown_ids
+        self._codes[list_no][size:size + len(ids)] = codes
+        self._list_ids[list_no][size:size + len(ids)] = ids
+        for offset, label in enumerate(ids.tolist()):
+            self._locations[label] = (list_no, size + offset)
+        self._list_sizes[list_no] = size + len(ids)
+
+    def _add_trained(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        lists = self._assign(vectors)
+        codes = self._encode(vectors - self.centroids[lists])
+        for list_no in np.unique(lists).tolist():
+            mask = lists == list_no
+            self._append(list_no, codes[mask], ids[mask])
+        if self.rerank:
+            self._vectors.update(zip(ids.tolist(), vectors))
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        """Add normalized vectors, training first once train_size vectors are available."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        ids = np.asarray(ids, dtype=np.int64)
+        self.remove(ids.tolist())
+        if self.is_trained:
+            self._add_trained(vectors, ids)
+            return
+        self._pending.update(zip(ids.tolist(), vectors))
+        if len(self._pending) >= self.train_size:
+            pending_ids = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+            pending = np.stack(list(self._pending.values()))
+            self._pending = {}
+            sample = np.random.default_rng(self.seed).choice(len(pending), self.train_size, replace=False)
+            self.train(pending[sample])
+            self._add_trained(pending, pending_ids)
+
+    def remove(self, ids: Sequence[int]) -> None:
+        """Remove vectors by swapping the last entry of their list into their slot."""
+        for label in ids:
+            label = int(label)
+            self._pending.pop(label, None)
+            self._vectors.pop(label, None)
+            location = self._locations.pop(label, None)
+            if location is None:
+                continue
+            list_no, position = location
+            last = self._list_sizes[list_no] - 1
+            if position != last:
+                moved = int(self._list_ids[list_no][last])
+                self._codes[list_no][position] = self._codes[list_no][last]
+                self._list_ids[list_no][position] = moved
+                self._locations[moved] = (list_no, position)
+            self._list_sizes[list_no] = last
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Scan the n_probe closest lists of each query with ADC lookup tables."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if not self.is_trained:
+            return self._search_pending(queries, k)
+
+        sub_dim = queries.shape[1] // self.n_subvectors
+        subvectors = np.arange(self.n_subvectors)
+        n_probe = min(self.n_probe, len(self.centroids))
+        coarse = queries @ self.centroids.T
+        results: List[List[Tuple[float, int]]] = []
+        for query, coarse_scores in zip(queries, coarse):
+            # Residual codebooks are shared by all lists, so one table serves every probed list
+            table = np.einsum("jd,jkd->jk", query.reshape(self.n_subvectors, sub_dim), self.codebooks)
+            probe = np.argpartition(-coarse_scores, n_probe - 1)[:n_probe]
+            scores = []
+            labels = []
+            for list_no in probe.tolist():
+                size = self._list_sizes[list_no]
+                if size:
+                    codes = self._codes[list_no][:size]
+                    scores.append(table[subvectors, codes].sum(axis=1) + coarse_scores[list_no])
+                    labels.append(self._list_ids[list_no][:size])
+            if not scores:
+                results.append([])
+                continue
+            scores_array = np.concatenate(scores)
+            labels_array = np.concatenate(labels)
+            rerank = self.rerank if self._vectors else 0
+            keep = min(max(k, rerank), len(scores_array))
+            top = np.argpartition(-scores_array, keep - 1)[:keep]
+            if rerank:
+                exact = np.stack([self._vectors[label] for label in labels_array[top].tolist()]) @ query
+                hits = list(zip(exact.tolist(), labels_array[top].tolist()))
+            else:
+                hits = list(zip(scores_array[top].tolist(), labels_array[top].tolist()))
+            results.append(sorted(hits, reverse=True)[:k])
+        return _pad_results(results, k)
+
+    def _search_pending(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact search over the vectors buffered before training."""
+        if not self._pending:
+            return _pad_results([[] for _ in queries], k)
+        ids = list(self._pending)
+        scores = queries @ np.stack(list(self._pending.values())).T
+        return _pad_results(
+            [sorted(zip(row.tolist(), ids), reverse=True)[:k] for row in scores], k
+        )
+
+    def save(self, path: str) -> None:
+        """Save the quantizers and inverted lists to a NumPy .npz file at path."""
+        arrays: Dict[str, np.ndarray] = {
+            "params": np.array(
+                [self.n_lists, self.n_subvectors, self.n_probe, self.rerank, self.train_size, self.iterations, self.seed],
+                dtype=np.int64
+            ),
+        }
+        if self._pending:
+            arrays["pending_ids"] = np.fromiter(self._pending, dtype=np.int64, count=len(self._pending))
+            arrays["pending"] = np.stack(list(self._pending.values()))
+        if self.is_trained:
+            arrays["centroids"] = self.centroids
+            arrays["codebooks"] = self.codebooks
+            arrays["list_sizes"] = np.array(self._list_sizes, dtype=np.int64)
+            arrays["codes"] = np.concatenate(
+                [codes[:size] for codes, size in zip(self._codes, self._list_sizes)]
+            )
+            arrays["ids"] = np.concatenate([ids[:size] for ids, size in zip(self._list_ids, self._list_sizes)])
+            if self.rerank and self._vectors:
+                arrays["vector_ids"] = np.fromiter(self._vectors, dtype=np.int64, count=len(self._vectors))
+                arrays["vectors"] = np.stack(list(self._vectors.values()))
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFPQIndex":
+        """Load an index saved with save."""
+        with np.load(path) as data:
+            n_lists, n_subvectors, n_probe, rerank, train_size, iterations, seed = data["params"].tolist()
+            index = cls(n_lists=n_lists, n_subvectors=n_subvectors, n_probe=n_probe, rerank=rerank,
+                        train_size=train_size, iterations=iterations, seed=seed)
+            if "pending" in data:
+                index._pending = dict(zip(data["pending_ids"].tolist(), data["pending"]))
+            if "centroids" in data:
+                index.centroids = data["centroids"]
+                index.codebooks = data["codebooks"]
+                n = len(index.centroids)
+                index._codes = [np.empty((0, n_subvectors), dtype=np.uint8) for _ in range(n)]
+                index._list_ids = [np.empty(0, dtype=np.int64) for _ in range(n)]
+                index._list_sizes = [0] * n
+                codes, ids = data["codes"], data["ids"]
+                offset = 0
+                for list_no, size in enumerate(data["list_sizes"].tolist()):
+                    if size:
+                        index._append(list_no, codes[offset:offset + size], ids[offset:offset + size])
+                    offset += size
+            if "vectors" in data:
+                index._vectors = dict(zip(data["vector_ids"].tolist(), data["vectors"]))
+        return index
+
+def create_hnsw_index(M: int = 16, ef_construction: int = 200, ef_search: int = 64) -> BaseIndex:
+    """Create an HNSW index, using the compiled hnswlib backend when it is installed."""
+    try:
+        return HnswlibIndex(M=M, ef_construction=ef_construction, ef_search=ef_search)
+    except ImportError:
+        return HNSWIndex(M=M, ef_construction=ef_construction, ef_search=ef_search)
+
+def recall_report(
+    index: BaseIndex,
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    settings: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Measure recall@k and query latency of an index against exact search.
+
+    Args:
+        index (BaseIndex): Index containing the vectors
+        vectors (np.ndarray): The indexed normalized vectors
+        ids (np.ndarray): Ids of the vectors, in the same order
+        queries (np.ndarray): Normalized query vectors
+        k (int): Number of neighbours to compare
+        settings (List[Dict[str, Any]], optional): Index attribute values to try in turn,
+            e.g. ``[{"ef_search": 32}, {"ef_search": 128}]``
+
+    Returns:
+        List[Dict[str, Any]]: One row per setting with recall, mean_ms and p99_ms
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    ids = np.asarray(ids)
+    exact = np.argsort(-(queries @ np.asarray(vectors, dtype=np.float32).T), axis=1)[:, :k]
+    truth = [set(ids[row].tolist()) for row in exact]
+
+    report = []
+    for setting in settings or [{}]:
+        previous = {name: getattr(index, name) for name in setting}
+        for name, value in setting.items():
+            setattr(index, name, value)
+        latencies = []
+        found = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result_ids, _ = index.search(query[np.newaxis, :], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found += len(expected.intersection(result_ids[0].tolist()))
+        for name, value in previous.items():
+            setattr(index, name, value)
+        report.append({
+            **setting,
+            "recall": found / (len(queries) * k) if len(queries) else 0.0,
+            "mean_ms": float(np.mean(latencies)) if latencies else 0.0,
+            "p99_ms": float(np.percentile(latencies, 99)) if latencies else 0.0,
+        })
+    return report
@@ -0,0 +1,118 @@
+"""
+Manifest of indexed chunk content hashes for incremental re-indexing.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_vector_ids(document_id: str, texts: List[str]) -> List[Tuple[str, str]]:
+    """
+    Derive content-addressed vector ids for a document's chunk texts.
+
+    The id depends on the chunk text rather than its position, so inserting
+    text before a chunk does not change the ids of the chunks after it.
+    Repeated texts within a document get an occurrence suffix.
+
+    Args:
+        document_id (str): Identifier of the document
+        texts (List[str]): Chunk texts in document order
+
+    Returns:
+        List[Tuple[str, str]]: ``(vector_id, chunk_hash)`` for each text
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for text in texts:
+        chunk_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        occurrence = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = occurrence + 1
+        vector_id = f"{document_id}_{chunk_hash[:16]}"
+        ids.append((f"{vector_id}_{occurrence}" if occurrence else vector_id, chunk_hash))
+    return ids
+
+class IndexManifest:
+    """
+    SQLite record of what has been indexed for each document.
+
+    For every document it keeps a fingerprint of the source file and the
+    content hash of each stored chunk vector, which is what re-indexing
+    compares against to find new, unchanged and vanished chunks.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the manifest.
+
+        Args:
+            path (str, optional): SQLite database file; memory-only if None
+        """
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS documents (document_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "document_id TEXT NOT NULL, vector_id TEXT NOT NULL, chunk_hash TEXT NOT NULL, "
+            "PRIMARY KEY (document_id, vector_id))"
+        )
+        self._db.commit()
+
+    def fingerprint(self, document_id: str) -> Optional[str]:
+        """Return the fingerprint recorded for a document, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def chunk_hashes(self, document_id: str) -> Dict[str, str]:
+        """Return the recorded chunks of a document as a vector id to content hash mapping."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT vector_id, chunk_hash FROM chunks WHERE document_id = ?", (document_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def document_ids(self) -> List[str]:
+        """Return every document recorded in the manifest."""
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT document_id FROM documents")]
+
+    def update(self, document_id: str, fingerprint: str, chunk_hashes: Dict[str, str]) -> None:
+        """Replace a document's fingerprint and chunks in one transaction."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+            self._db.executemany(
+                "INSERT INTO chunks (document_id, vector_id, chunk_hash) VALUES (?, ?, ?)",
+                [(document_id, vector_id, chunk_hash) for vector_id, chunk_hash in chunk_hashes.items()]
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents (document_id, fingerprint) VALUES (?, ?)",
+                (document_id, fingerprint)
+            )
+
+    def remove(self, document_id: str) -> None:
+        """Forget a document."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+            self._db.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+
+    def close(self) -> None:
+        """Close the underlying database."""
+        self._db.close()
@@ -2,32 +2,374 @@
 Document processing module.
 """
 
+import asyncio
+import bisect
+import contextlib
 import os
-from typing import Optional, List, Dict, Any
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 from datetime import datetime
-import magic
-from .types import Document, Metadata, Chunk
+from .types import Document, Metadata, Chunk, ProcessingResult, ReindexResult
 from .chunking import BaseChunker, SemanticChunker
 from .embeddings import BaseEmbeddings
+from .batching import EmbeddingBatcher
+from .dedup import MinHashDeduplicator
+from .vector_stores import BaseVectorStore
+from .extractors import detect_mime_type, get_extractor
+from .manifest import IndexManifest, chunk_vector_ids, hash_file
+
+def _build_document_in_worker(chunker: BaseChunker, file_path: str) -> Document:
+    """Read and chunk a file in a worker process."""
+    return DocumentProcessor(chunker=chunker)._build_document(file_path)
 
 class DocumentProcessor:
     """Document processing class."""
     
+    # Characters read from a file per block when streaming
+    read_size: int = 64 * 1024
+    
     def __init__(
         self,
         chunker: Optional[BaseChunker] = None,
-        embeddings: Optional[BaseEmbeddings] = None
+        embeddings: Optional[BaseEmbeddings] = None,
+        batcher: Optional[EmbeddingBatcher] = None,
+        pdf_workers: int = 1,
+        deduplicator: Optional[MinHashDeduplicator] = None
     ):
         self.chunker = chunker or SemanticChunker()
+        self.pdf_workers = pdf_workers
+        self.deduplicator = deduplicator
         self.embeddings = embeddings
+        if batcher is None and embeddings:
+            batcher = EmbeddingBatcher(embeddings)
+        self.batcher = batcher
     
     def process(self, file_path: str) -> Document:
         """Process a document file."""
-        # Read file content
-        content = self._read_file(file_path)
+        document = self._build_document(file_path)
+        with self._deduplicating():
+            unique, duplicates = self._split(document.chunks)
+            
+            # Generate embeddings if available
+            if self.embeddings:
+                document.embedding = self.embeddings.embed_text(document.content)
+                self.batcher.embed_chunks(unique)
+        
+        document.chunks = self._finish(document.chunks, duplicates)
+        return document
+    
+    async def aprocess(self, file_path: str) -> Document:
+        """Process a document file, embedding chunks with concurrent async requests."""
+        loop = asyncio.get_running_loop()
+        document = await loop.run_in_executor(None, self._build_document, file_path)
+        with self._deduplicating():
+            unique, duplicates = self._split(document.chunks)
+            
+            if self.embeddings:
+                document.embedding, _ = await asyncio.gather(
+                    self.embeddings.aembed_text(document.content),
+                    self.batcher.aembed_chunks(unique)
+                )
+        
+        document.chunks = self._finish(document.chunks, duplicates)
+        return document
+    
+    def iter_process(
+        self,
+        file_path: str,
+        vector_store: Optional[BaseVectorStore] = None,
+        document_id: Optional[str] = None,
+        store_batch_size: int = 100
+    ) -> Iterator[Chunk]:
+        """
+        Stream a document file through chunking, embedding and storage.
+        
+        The file is read incrementally and chunks are embedded and stored in
+        batches, so memory stays bounded by the chunk and batch sizes rather
+        than the file size. No whole-document embedding is computed.
+        
+        Args:
+            file_path (str): Path to the document file
+            vector_store (BaseVectorStore, optional): Store receiving each batch of chunks
+            document_id (str, optional): Document identifier in the store, defaults to the file name
+            store_batch_size (int): Number of chunks per vector store write
+        
+        Yields:
+            Chunk: Processed chunks in document order
+        """
+        file_type = detect_mime_type(file_path)
+        page_starts: List[int] = []
+        info, blocks = self._open_text(file_path, page_starts, file_type)
+        metadata = self._extract_metadata(file_path, file_type, info)
+        document_id = document_id or metadata.title
+        chunks = self.chunker.iter_chunks(blocks, metadata, self.read_size)
+        chunks = self._with_page_numbers(chunks, page_starts)
+        if self.deduplicator is not None:
+            chunks = self._iter_deduplicated(chunks)
+        elif self.batcher:
+            chunks = self.batcher.iter_embed_chunks(chunks)
+        
+        pending: List[Chunk] = []
+        stored = 0
+        for chunk in chunks:
+            if vector_store is not None:
+                pending.append(chunk)
+                if len(pending) >= store_batch_size:
+                    vector_store.add_chunks(document_id, pending, start=stored)
+                    stored += len(pending)
+                    pending = []
+            yield chunk
+        if vector_store is not None:
+            if pending:
+                vector_store.add_chunks(document_id, pending, start=stored)
+            # Stores that buffer writes would otherwise hold the last batches
+            vector_store.flush()
+    
+    def reindex(
+        self,
+        file_path: str,
+        vector_store: BaseVectorStore,
+        manifest: IndexManifest,
+        document_id: Optional[str] = None
+    ) -> ReindexResult:
+        """
+        Bring a file's vectors in the store up to date, touching only what changed.
+        
+        Chunk vectors are stored under content-addressed ids. Chunks whose
+        content was indexed before are neither embedded nor upserted again,
+        new chunks are embedded and added, and chunks that vanished from the
+        file are deleted. A file whose bytes and chunker settings are unchanged
+        since the last run is skipped without being read. Unchanged chunks keep
+        the offsets they were stored with.
+        
+        Args:
+            file_path (str): Path to the document file
+            vector_store (BaseVectorStore): Store holding the document's chunks
+            manifest (IndexManifest): Record of previously indexed chunks
+            document_id (str, optional): Document identifier, defaults to the file name
+        
+        Returns:
+            ReindexResult: Counts of added, unchanged and deleted chunks
+        """
+        if not self.batcher:
+            raise ValueError("Re-indexing requires the processor to be created with embeddings")
+        document_id = document_id or os.path.basename(file_path)
+        chunker = self.chunker
+        fingerprint = f"{hash_file(file_path)}:{type(chunker).__name__}:{chunker.chunk_size}:{chunker.overlap}"
+        previous = manifest.chunk_hashes(document_id)
+        if manifest.fingerprint(document_id) == fingerprint:
+            return ReindexResult(document_id=document_id, unchanged=len(previous), skipped=True)
+        
+        document = self._build_document(file_path)
+        current = dict(chunk_vector_ids(document_id, [chunk.text for chunk in document.chunks]))
+        added = [
+            (vector_id, chunk)
+            for vector_id, chunk in zip(current, document.chunks)
+            if vector_id not in previous
+        ]
+        if added:
+            self.batcher.embed_chunks([chunk for _, chunk in added])
+            vector_store.add_chunks(
+                document_id,
+                [chunk for _, chunk in added],
+                vector_ids=[vector_id for vector_id, _ in added]
+            )
+        vanished = [vector_id for vector_id in previous if vector_id not in current]
+        if vanished:
+            vector_store.delete_chunks(vanished)
+        # Record the document only once the store holds its vectors, so a
+        # failed or interrupted write is retried on the next run
+        vector_store.flush()
+        manifest.update(document_id, fingerprint, current)
+        
+        return ReindexResult(
+            document_id=document_id,
+            added=len(added),
+            unchanged=len(current) - len(added),
+            deleted=len(vanished)
+        )
+    
+    def process_many(
+        self,
+        file_paths: Iterable[str],
+        workers: Optional[int] = None
+    ) -> Iterator[ProcessingResult]:
+        """
+        Process many files in parallel, yielding results as they complete.
+        
+        Reading and chunking run in a process pool. Completed documents are
+        embedded in the parent process through the shared batcher, so chunks
+        from several small files are combined into full provider batches.
+        Failures are reported per file and do not stop the run.
+        
+        Args:
+            file_paths (Iterable[str]): Files to process, consumed lazily
+            workers (int, optional): Number of worker processes, defaults to the CPU count
+        
+        Yields:
+            ProcessingResult: One result per file, in completion order
+        """
+        workers = workers or os.cpu_count() or 1
+        paths = iter(file_paths)
+        ready: List[Tuple[str, Document]] = []
+        ready_chunks = 0
         
-        # Extract metadata
-        metadata = self._extract_metadata(file_path)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight: Dict[Future, str] = {}
+            
+            def submit() -> None:
+                # Keep a bounded number of files queued ahead of the consumer
+                while len(in_flight) < 2 * workers:
+                    path = next(paths, None)
+                    if path is None:
+                        return
+                    in_flight[executor.submit(_build_document_in_worker, self.chunker, str(path))] = str(path)
+            
+            submit()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = in_flight.pop(future)
+                    try:
+                        document = future.result()
+                    except Exception as e:
+                        yield ProcessingResult(file_path=path, error=f"{type(e).__name__}: {e}")
+                        continue
+                    if not self.batcher:
+                        document.chunks = self._finish(document.chunks, self._split(document.chunks)[1])
+                        yield ProcessingResult(file_path=path, document=document)
+                        continue
+                    ready.append((path, document))
+                    ready_chunks += len(document.chunks) + 1
+                    if ready_chunks >= self.batcher.max_batch_size:
+                        yield from self._embed_ready(ready)
+                        ready = []
+                        ready_chunks = 0
+                submit()
+        
+        if ready:
+            yield from self._embed_ready(ready)
+    
+    def process_directory(
+        self,
+        directory: str,
+        pattern: str = "*",
+        recursive: bool = True,
+        workers: Optional[int] = None
+    ) -> Iterator[ProcessingResult]:
+        """
+        Process every file in a directory matching a glob pattern.
+        
+        Args:
+            directory (str): Directory to ingest
+            pattern (str): Glob pattern for file names
+            recursive (bool): Whether to descend into subdirectories
+            workers (int, optional): Number of worker processes
+        
+        Yields:
+            ProcessingResult: One result per file, in completion order
+        """
+        root = Path(directory)
+        matches = root.rglob(pattern) if recursive else root.glob(pattern)
+        yield from self.process_many((str(path) for path in matches if path.is_file()), workers=workers)
+    
+    def _embed_ready(self, ready: List[Tuple[str, Document]]) -> Iterator[ProcessingResult]:
+        """
+        Embed several documents and their chunks in shared batches.
+        
+        If the shared batches fail, each document is deduplicated and
+        embedded again on its own, so a document the provider rejects only
+        fails its own file and its chunks do not stay registered as the
+        canonical copies of later duplicates.
+        """
+        errors: Dict[str, str] = {}
+        try:
+            with self._deduplicating():
+                splits = [self._split(document.chunks) for _, document in ready]
+                self._embed_documents([(document, unique) for (_, document), (unique, _) in zip(ready, splits)])
+        except Exception:
+            splits = []
+            for path, document in ready:
+                try:
+                    with self._deduplicating():
+                        unique, duplicates = self._split(document.chunks)
+                        self._embed_documents([(document, unique)])
+                except Exception as e:
+                    errors[path] = f"{type(e).__name__}: {e}"
+                    unique, duplicates = [], []
+                splits.append((unique, duplicates))
+        for (path, document), (_, duplicates) in zip(ready, splits):
+            if path in errors:
+                yield ProcessingResult(file_path=path, error=errors[path])
+                continue
+            document.chunks = self._finish(document.chunks, duplicates)
+            yield ProcessingResult(file_path=path, document=document)
+    
+    def _embed_documents(self, documents: List[Tuple[Document, List[Chunk]]]) -> None:
+        """Embed document contents and the given chunks of each document in shared batches."""
+        chunks = [chunk for _, unique in documents for chunk in unique]
+        texts = [document.content for document, _ in documents] + [chunk.text for chunk in chunks]
+        vectors = self.batcher.embed_texts(texts)
+        for chunk, vector in zip(chunks, vectors[len(documents):]):
+            chunk.embedding = vector
+        for (document, _), vector in zip(documents, vectors):
+            document.embedding = vector
+    
+    def _split(self, chunks: List[Chunk]) -> Tuple[List[Chunk], List[Tuple[Chunk, int]]]:
+        """Separate near-duplicate chunks from those that need embedding."""
+        if self.deduplicator is None:
+            return chunks, []
+        return self.deduplicator.split(chunks)
+    
+    @contextlib.contextmanager
+    def _deduplicating(self) -> Iterator[None]:
+        """Unregister the canonical chunks split inside the block if it raises, e.g. when embedding fails."""
+        if self.deduplicator is None:
+            yield
+            return
+        checkpoint = self.deduplicator.checkpoint()
+        try:
+            yield
+        except BaseException:
+            self.deduplicator.rollback(checkpoint)
+            raise
+    
+    def _finish(self, chunks: List[Chunk], duplicates: List[Tuple[Chunk, int]]) -> List[Chunk]:
+        """Drop near-duplicates or give them their canonical chunk's embedding."""
+        if self.deduplicator is None:
+            return chunks
+        return self.deduplicator.finish(chunks, duplicates)
+    
+    def _iter_deduplicated(self, chunks: Iterable[Chunk]) -> Iterator[Chunk]:
+        """Deduplicate and embed a chunk stream one window of a provider batch at a time."""
+        window_size = self.batcher.max_batch_size if self.batcher else 64
+        window: List[Chunk] = []
+        for chunk in chunks:
+            window.append(chunk)
+            if len(window) >= window_size:
+                yield from self._embed_window(window)
+                window = []
+        if window:
+            yield from self._embed_window(window)
+    
+    def _embed_window(self, window: List[Chunk]) -> List[Chunk]:
+        with self._deduplicating():
+            unique, duplicates = self._split(window)
+            if self.batcher and unique:
+                self.batcher.embed_chunks(unique)
+        return self._finish(window, duplicates)
+    
+    def _build_document(self, file_path: str) -> Document:
+        """Read, describe and chunk a document file."""
+        # Detect the file type once for reading and metadata
+        file_type = detect_mime_type(file_path)
+        
+        # Read file content and metadata, parsing the file once
+        page_starts: List[int] = []
+        info, blocks = self._open_text(file_path, page_starts, file_type)
+        content = "".join(blocks)
+        metadata = self._extract_metadata(file_path, file_type, info)
         
         # Create document
         document = Document(
@@ -36,40 +378,84 @@ class DocumentProcessor:
         )
         
         # Chunk document
-        document.chunks = self.chunker.chunk_text(content, metadata)
-        
-        # Generate embeddings if available
-        if self.embeddings:
-            document.embedding = self.embeddings.embed_text(content)
-            for chunk in document.chunks:
-                chunk.embedding = self.embeddings.embed_text(chunk.text)
+        document.chunks = list(self._with_page_numbers(self.chunker.chunk_text(content, metadata), page_starts))
         
         return document
     
+    @staticmethod
+    def _with_page_numbers(chunks: Iterable[Chunk], page_starts: List[int]) -> Iterator[Chunk]:
+        """Set each chunk's 1-based page number from the page start offsets, if any."""
+        for chunk in chunks:
+            if page_starts:
+                chunk.page_number = bisect.bisect_right(page_starts, chunk.start_index)
+            yield chunk
+    
     def _read_file(self, file_path: str) -> str:
         """Read file content based on file type."""
-        file_type = magic.from_file(file_path, mime=True)
-        
-        if file_type == "text/plain":
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read()
-        elif file_type == "application/pdf":
-            # TODO: Implement PDF reading
-            return ""
-        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            # TODO: Implement DOCX reading
-            return ""
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
-    
-    def _extract_metadata(self, file_path: str) -> Metadata:
-        """Extract metadata from file."""
+        return "".join(self._iter_text(file_path))
+    
+    def _iter_text(
+        self,
+        file_path: str,
+        page_starts: Optional[List[int]] = None,
+        file_type: Optional[str] = None
+    ) -> Iterator[str]:
+        """Read file content as a stream of text blocks based on file type."""
+        return self._open_text(file_path, page_starts, file_type)[1]
+    
+    def _open_text(
+        self,
+        file_path: str,
+        page_starts: Optional[List[int]] = None,
+        file_type: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Iterator[str]]:
+        """
+        Open a file once for its format metadata and its stream of text blocks.
+        
+        For paged formats the character offset at which each page starts is
+        appended to page_starts as the page is read.
+        """
+        extractor = get_extractor(file_type or detect_mime_type(file_path))
+        info, blocks = extractor.extract(file_path, read_size=self.read_size, workers=self.pdf_workers)
+        if extractor.paged:
+            blocks = self._track_pages(blocks, page_starts)
+        return info, blocks
+    
+    @staticmethod
+    def _track_pages(blocks: Iterable[str], page_starts: Optional[List[int]]) -> Iterator[str]:
+        """Separate pages and record the offset at which each one starts."""
+        offset = 0
+        for i, page in enumerate(blocks):
+            if i:
+                # Separate pages so sentences do not run across them
+                yield "\n\n"
+                offset += 2
+            if page_starts is not None:
+                page_starts.append(offset)
+            yield page
+            offset += len(page)
+    
+    def _extract_metadata(
+        self,
+        file_path: str,
+        file_type: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None
+    ) -> Metadata:
+        """Extract metadata from file, using format metadata already read by the extractor if given."""
         file_stats = os.stat(file_path)
+        file_type = file_type or detect_mime_type(file_path, file_stats)
         
-        return Metadata(
+        metadata = Metadata(
             title=os.path.basename(file_path),
-            file_type=magic.from_file(file_path, mime=True),
+            file_type=file_type,
             file_size=file_stats.st_size,
             created_at=datetime.fromtimestamp(file_stats.st_ctime),
             modified_at=datetime.fromtimestamp(file_stats.st_mtime)
-        ) 
\ No newline at end of file
+        )
+        if info is None:
+            info = get_extractor(file_type).extract_info(file_path)
+        metadata.page_count = info.get("page_count")
+        metadata.author = info.get("author")
+        if info.get("title"):
+            metadata.custom["document_title"] = info["title"]
+        return metadata 
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Memory-mapped on-disk segment format for embeddings.
+
+A segment is one immutable file::
+
+    header | vector matrix (float32 or float16) | offset table | metadata block
+
+The header is a fixed struct recording the row count, dimension and byte
+offsets of the other sections. The offset table holds rows + 1 uint64
+positions into the metadata block, which is the concatenation of one UTF-8
+JSON record per row. Opening a segment maps these sections with np.memmap,
+so nothing is deserialized at startup and processes that open the same file
+share its pages through the OS page cache; a record is decoded only when
+its row is returned by a search.
+"""
+
+import json
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .types import Chunk
+
+SEGMENT_MAGIC = b"DVSEG\x00\x00\x00"
+SEGMENT_VERSION = 1
+SEGMENT_ALIGNMENT = 64
+SEGMENT_DTYPES = {"float32": 0, "float16": 1}
+_HEADER = struct.Struct("<8sIIQQQQQQ")
+
+def _align(offset: int) -> int:
+    return -(-offset // SEGMENT_ALIGNMENT) * SEGMENT_ALIGNMENT
+
+def _model_json(model) -> str:
+    """Serialize a pydantic model with either the v1 or v2 API."""
+    dump = getattr(model, "model_dump_json", None)
+    return dump() if dump is not None else model.json()
+
+def chunk_record(vector_id: str, document_id: str, chunk: Chunk) -> Dict[str, Any]:
+    """Build the metadata record stored for a chunk; the embedding lives in the matrix."""
+    return {
+        "id": vector_id,
+        "document_id": document_id,
+        "text": chunk.text,
+        "start_index": chunk.start_index,
+        "end_index": chunk.end_index,
+        "page_number": chunk.page_number,
+        "metadata": json.loads(_model_json(chunk.metadata)),
+    }
+
+def record_chunk(record: Dict[str, Any]) -> Chunk:
+    """Rebuild the Chunk stored in a metadata record."""
+    return Chunk(
+        text=record["text"],
+        start_index=record["start_index"],
+        end_index=record["end_index"],
+        page_number=record.get("page_number"),
+        metadata=record["metadata"],
+    )
+
+def write_segment(
+    path: str,
+    vectors: np.ndarray,
+    records: Sequence[Dict[str, Any]],
+    dtype: str = "float32"
+) -> None:
+    """
+    Write an immutable segment file.
+
+    The file is written next to path and renamed into place, so readers
+    never observe a partially written segment.
+
+    Args:
+        path (str): Destination file
+        vectors (np.ndarray): Matrix of shape (rows, dim)
+        records (Sequence[Dict[str, Any]]): One JSON-serializable record per row
+        dtype (str): Storage type of the matrix, "float32" or "float16"
+    """
+    vectors = np.atleast_2d(vectors)
+    if len(vectors) != len(records):
+        raise ValueError(f"Segment has {len(vectors)} vectors but {len(records)} records")
+    encoded = [json.dumps(record, separators=(",", ":")).encode("utf-8") for record in records]
+    write_segment_blocks(path, len(records), vectors.shape[1], [(vectors, encoded)], dtype)
+
+def write_segment_blocks(
+    path: str,
+    rows: int,
+    dim: int,
+    blocks: Iterable[Tuple[np.ndarray, Sequence[bytes]]],
+    dtype: str = "float32"
+) -> None:
+    """
+    Write an immutable segment file from a stream of row blocks.
+
+    Only one block is held at a time, so segments larger than memory can be
+    written, e.g. when merging existing segments. Like write_segment, the
+    file is renamed into place once complete.
+
+    Args:
+        path (str): Destination file
+        rows (int): Total number of rows in all blocks
+        dim (int): Vector dimension
+        blocks: ``(vectors, encoded_records)`` pairs, where each record is UTF-8 JSON
+        dtype (str): Storage type of the matrix, "float32" or "float16"
+    """
+    if dtype not in SEGMENT_DTYPES:
+        raise ValueError(f"Unsupported segment dtype: {dtype}")
+    if not rows:
+        raise ValueError("Cannot write an empty segment")
+    row_bytes = dim * np.dtype(dtype).itemsize
+    offsets = np.zeros(rows + 1, dtype=np.uint64)
+    matrix_offset = _align(_HEADER.size)
+    offsets_offset = _align(matrix_offset + rows * row_bytes)
+    metadata_offset = offsets_offset + offsets.nbytes
+
+    temp_path = path + ".tmp"
+    written = 0
+    with open(temp_path, "wb") as f:
+        f.truncate(metadata_offset)
+        for vectors, encoded in blocks:
+            vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype=dtype)
+            if len(vectors) != len(encoded):
+                raise ValueError(f"Segment block has {len(vectors)} vectors but {len(encoded)} records")
+            if vectors.shape[1] != dim or written + len(vectors) > rows:
+                raise ValueError(f"Segment block of shape {vectors.shape} does not fit {rows} rows of dimension {dim}")
+            f.seek(matrix_offset + written * row_bytes)
+            f.write(vectors.tobytes())
+            f.seek(metadata_offset + int(offsets[written]))
+            for i, item in enumerate(encoded, written):
+                f.write(item)
+                offsets[i + 1] = offsets[i] + len(item)
+            written += len(vectors)
+        if written != rows:
+            raise ValueError(f"Segment blocks held {written} rows, expected {rows}")
+        f.seek(offsets_offset)
+        f.write(offsets.tobytes())
+        f.seek(0)
+        f.write(_HEADER.pack(
+            SEGMENT_MAGIC, SEGMENT_VERSION, SEGMENT_DTYPES[dtype], rows, dim,
+            matrix_offset, offsets_offset, metadata_offset, int(offsets[-1])
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class Segment:
+    """Read-only view of a segment file backed by memory maps."""
+
+    def __init__(self, path: str):
+        """
+        Open a segment.
+
+        Args:
+            path (str): Segment file written by write_segment
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Not a segment file: {path}")
+        (magic, version, dtype_code, rows, dim,
+         matrix_offset, offsets_offset, metadata_offset, metadata_size) = _HEADER.unpack(header)
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f"Not a segment file: {path}")
+        if version != SEGMENT_VERSION:
+            raise ValueError(f"Unsupported segment version {version}: {path}")
+        dtype = {code: name for name, code in SEGMENT_DTYPES.items()}[dtype_code]
+
+        self.vectors = np.memmap(path, dtype=dtype, mode="r", offset=matrix_offset, shape=(rows, dim))
+        self._offsets = np.memmap(path, dtype=np.uint64, mode="r", offset=offsets_offset, shape=(rows + 1,))
+        self._metadata = np.memmap(path, dtype=np.uint8, mode="r", offset=metadata_offset, shape=(metadata_size,))
+        self._keys: Optional[List[Tuple[str, str]]] = None
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def raw_record(self, row: int) -> bytes:
+        """Return the encoded metadata record of one row."""
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return self._metadata[start:end].tobytes()
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Decode the metadata record of one row."""
+        return json.loads(self.raw_record(row))
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """Return (vector id, document id) of every row, decoding the records once."""
+        if self._keys is None:
+            self._keys = []
+            for row in range(len(self)):
+                record = self.record(row)
+                self._keys.append((record["id"], record["document_id"]))
+        return self._keys
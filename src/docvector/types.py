@@ -2,9 +2,10 @@
 Core data models for DocVector.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Sequence, Tuple
 from pydantic import BaseModel, Field
 from datetime import datetime
+import numpy as np
 
 class Metadata(BaseModel):
     """Document metadata."""
@@ -23,6 +24,7 @@ class Chunk(BaseModel):
     metadata: Metadata = Field(default_factory=Metadata)
     start_index: int
     end_index: int
+    page_number: Optional[int] = None
     embedding: Optional[List[float]] = None
 
 class Document(BaseModel):
@@ -31,4 +33,105 @@ class Document(BaseModel):
     metadata: Metadata = Field(default_factory=Metadata)
     chunks: List[Chunk] = Field(default_factory=list)
     embedding: Optional[List[float]] = None
-    id: Optional[str] = None 
\ No newline at end of file
+    id: Optional[str] = None
+
+class ProcessingResult(BaseModel):
+    """Outcome of processing one file in a multi-file run."""
+    file_path: str
+    document: Optional[Document] = None
+    error: Optional[str] = None
+
+class ReindexResult(BaseModel):
+    """Outcome of incrementally re-indexing one file."""
+    document_id: str
+    added: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    skipped: bool = False
+
+class ChunkBatch:
+    """
+    Columnar batch of chunks cut from one source text.
+
+    Instead of one Chunk model per chunk, a batch keeps the source string,
+    int64 arrays of chunk offsets, a single Metadata shared by every chunk
+    and, once embedded, one (n, dim) float32 embedding matrix. Indexing or
+    iterating builds Chunk objects on demand for code that expects them.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        starts: Sequence[int],
+        ends: Sequence[int],
+        metadata: Optional[Metadata] = None,
+        page_numbers: Optional[Sequence[int]] = None,
+        embeddings: Optional[np.ndarray] = None,
+        source_offset: int = 0
+    ):
+        """
+        Initialize the batch.
+
+        Args:
+            source (str): Text the chunks are cut from
+            starts (Sequence[int]): Start offset of each chunk
+            ends (Sequence[int]): End offset of each chunk
+            metadata (Metadata, optional): Metadata shared by all chunks
+            page_numbers (Sequence[int], optional): Page of each chunk, -1 if unknown
+            embeddings (np.ndarray, optional): Embedding matrix of shape (n, dim)
+            source_offset (int): Document offset of source[0], for windows of a stream
+        """
+        self.source = source
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.metadata = metadata or Metadata()
+        self.page_numbers = None if page_numbers is None else np.asarray(page_numbers, dtype=np.int64)
+        self.embeddings = None if embeddings is None else np.asarray(embeddings, dtype=np.float32)
+        self.source_offset = source_offset
+
+    @classmethod
+    def from_spans(
+        cls,
+        source: str,
+        spans: Sequence[Tuple[int, int]],
+        metadata: Optional[Metadata] = None
+    ) -> "ChunkBatch":
+        """Build a batch from (start, end) spans into source."""
+        bounds = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+        return cls(source, bounds[:, 0], bounds[:, 1], metadata)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text(self, i: int) -> str:
+        """Return the text of chunk i."""
+        return self.source[self.starts[i] - self.source_offset:self.ends[i] - self.source_offset]
+
+    @property
+    def texts(self) -> List[str]:
+        """Texts of all chunks, in order."""
+        offset = self.source_offset
+        return [self.source[start - offset:end - offset] for start, end in zip(self.starts.tolist(), self.ends.tolist())]
+
+    def __getitem__(self, i: int) -> Chunk:
+        """Build a Chunk view of chunk i."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("chunk index out of range")
+        page_number = None if self.page_numbers is None or self.page_numbers[i] < 0 else int(self.page_numbers[i])
+        return Chunk(
+            text=self.text(i),
+            metadata=self.metadata,
+            start_index=int(self.starts[i]),
+            end_index=int(self.ends[i]),
+            page_number=page_number,
+            embedding=None if self.embeddings is None else self.embeddings[i].tolist()
+        )
+
+    def __iter__(self) -> Iterator[Chunk]:
+        return (self[i] for i in range(len(self)))
+
+    def to_chunks(self) -> List[Chunk]:
+        """Materialize every chunk as a Chunk model."""
+        return list(self)
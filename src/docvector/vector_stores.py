@@ -2,13 +2,58 @@
 Vector store implementations for document storage and retrieval.
 """
 
+import json
+import os
+import random
+import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any, Tuple
-from .types import Document, Chunk
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import List, Optional, Dict, Any, Iterator, Sequence, Set, Tuple, Union
+from urllib.parse import urlparse
+import numpy as np
+from .types import Document, Chunk, ChunkBatch, Metadata
+from .embeddings import BaseEmbeddings
+from .indexes import BaseIndex
+from .cache import QueryEmbedder
+from .segments import Segment, chunk_record, record_chunk, write_segment, write_segment_blocks
+
+# A stored chunk: either a Chunk model or a row of a ChunkBatch
+ChunkEntry = Union[Chunk, Tuple[ChunkBatch, int]]
 
 class BaseVectorStore(ABC):
     """Base class for vector stores."""
     
+    embeddings: Optional[BaseEmbeddings] = None
+    query_embedder: Optional[QueryEmbedder] = None
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def _get_query_embedder(self) -> QueryEmbedder:
+        if self.query_embedder is None:
+            if self.embeddings is None:
+                raise ValueError("A text query requires the store to be created with embeddings")
+            self.query_embedder = QueryEmbedder(self.embeddings)
+        return self.query_embedder
+    
+    def _embed_query(self, query: Union[str, Sequence[float], np.ndarray]) -> np.ndarray:
+        if isinstance(query, str):
+            return self._get_query_embedder().embed(query)
+        return np.asarray(query, dtype=np.float32)
+    
+    def _embed_queries(self, queries: Sequence[Union[str, Sequence[float]]]) -> np.ndarray:
+        """Embed the text queries in one batch and stack them with the vector queries."""
+        texts = [query for query in queries if isinstance(query, str)]
+        embedded = dict(zip(texts, self._get_query_embedder().embed_many(texts))) if texts else {}
+        return np.stack([
+            embedded[query] if isinstance(query, str) else np.asarray(query, dtype=np.float32)
+            for query in queries
+        ])
+    
     @abstractmethod
     def add_document(self, document: Document) -> str:
         """Add a document to the vector store."""
@@ -19,11 +64,113 @@ class BaseVectorStore(ABC):
         """Add multiple documents to the vector store."""
         pass
     
+    def add_chunks(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        start: int = 0,
+        vector_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Add a batch of embedded chunks belonging to one document.
+        
+        Used for streaming ingestion, where a document's chunks arrive in
+        several batches and the full Document is never materialized. Vectors
+        with an existing identifier are replaced.
+        
+        Args:
+            document_id (str): Identifier of the document the chunks belong to
+            chunks (List[Chunk]): Chunks with embeddings
+            start (int): Position of the first chunk within the document
+            vector_ids (List[str], optional): Identifier of each chunk's vector,
+                defaults to f"{document_id}_{position}"
+        
+        Returns:
+            List[str]: Identifiers of the stored vectors
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support adding chunks")
+    
+    def flush(self) -> None:
+        """Write out chunks buffered by add_chunks; stores that write immediately do nothing."""
+        pass
+    
+    def delete_chunks(self, vector_ids: List[str]) -> int:
+        """
+        Delete individual chunk vectors.
+        
+        Args:
+            vector_ids (List[str]): Identifiers returned by add_chunks
+        
+        Returns:
+            int: Number of vectors deleted, where the store can tell
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support deleting chunks")
+    
+    def add_chunk_batch(self, document_id: str, batch: ChunkBatch, start: int = 0) -> List[str]:
+        """
+        Add an embedded ChunkBatch belonging to one document.
+        
+        The default converts the batch to Chunk models and calls add_chunks;
+        stores that can consume the columns directly override it.
+        
+        Args:
+            document_id (str): Identifier of the document the chunks belong to
+            batch (ChunkBatch): Chunks with an embedding matrix
+            start (int): Position of the first chunk within the document
+        
+        Returns:
+            List[str]: Identifiers of the stored vectors
+        """
+        return self.add_chunks(document_id, batch.to_chunks(), start)
+    
+    @staticmethod
+    def _vector_ids(document_id: str, count: int, start: int, vector_ids: Optional[List[str]]) -> List[str]:
+        if vector_ids is None:
+            return [f"{document_id}_{i}" for i in range(start, start + count)]
+        if len(vector_ids) != count:
+            raise ValueError(f"Got {len(vector_ids)} vector ids for {count} chunks")
+        return list(vector_ids)
+    
     @abstractmethod
     def search(self, query: str, limit: int = 5) -> List[Document]:
         """Search for similar documents."""
         pass
     
+    def search_vectors(self, vectors: np.ndarray, limit: int = 5) -> List[List[Tuple[Document, float]]]:
+        """
+        Answer many query vectors in one call.
+        
+        The default runs search once per vector; stores that can batch or
+        parallelize queries override it.
+        
+        Args:
+            vectors (np.ndarray): Query vectors of shape (n_queries, dim)
+            limit (int): Maximum number of results per query
+        
+        Returns:
+            List[List[Tuple[Document, float]]]: Results for each query, best first
+        """
+        return [self.search(vector, limit) for vector in np.atleast_2d(vectors)]
+    
+    def search_many(
+        self,
+        queries: Sequence[Union[str, Sequence[float]]],
+        limit: int = 5
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Search for several queries, embedding the text ones in a single batch.
+        
+        Args:
+            queries: Query texts or vectors
+            limit (int): Maximum number of results per query
+        
+        Returns:
+            List[List[Tuple[Document, float]]]: Results for each query, best first
+        """
+        if not len(queries):
+            return []
+        return self.search_vectors(self._embed_queries(queries), limit)
+    
     @abstractmethod
     def delete_document(self, document_id: str) -> bool:
         """Delete a document from the vector store."""
@@ -34,107 +181,1485 @@ class BaseVectorStore(ABC):
         """Clear all documents from the vector store."""
         pass
 
+class InMemoryVectorStore(BaseVectorStore):
+    """
+    In-process vector store with exact cosine similarity search.
+    
+    Embeddings are kept L2-normalized in one contiguous float32 matrix, so a
+    search is a single matrix product followed by an argpartition top-k.
+    
+    With an index (e.g. HNSWIndex) the vectors live only in the index, which
+    is built incrementally as chunks are added; rows are then never reused
+    and deleted rows are dropped from the index instead of compacted.
+    """
+    
+    def __init__(
+        self,
+        embeddings: Optional[BaseEmbeddings] = None,
+        initial_capacity: int = 1024,
+        index: Optional[BaseIndex] = None,
+        query_embedder: Optional[QueryEmbedder] = None
+    ):
+        """
+        Initialize the in-memory store.
+        
+        Args:
+            embeddings (BaseEmbeddings, optional): Model used to embed text queries
+            initial_capacity (int): Number of rows allocated up front
+            index (BaseIndex, optional): Approximate index used instead of exact search
+            query_embedder (QueryEmbedder, optional): Cached query embedder, built from embeddings if None
+        """
+        self.embeddings = embeddings
+        self.query_embedder = query_embedder
+        self.initial_capacity = initial_capacity
+        self.index = index
+        self.clear()
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def _reserve(self, rows: int, dim: int) -> None:
+        """Grow the matrix geometrically so appends are amortized O(1)."""
+        if self._matrix is None:
+            self._matrix = np.empty((max(self.initial_capacity, rows), dim), dtype=np.float32)
+        elif self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match store dimension {self._matrix.shape[1]}")
+        elif self._size + rows > self._matrix.shape[0]:
+            capacity = max(2 * self._matrix.shape[0], self._size + rows)
+            matrix = np.empty((capacity, dim), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            self._matrix = matrix
+    
+    def add_document(self, document: Document) -> str:
+        """Add a document's embedded chunks to the store."""
+        document_id = document.id or document.metadata.title or uuid.uuid4().hex
+        self.add_chunks(document_id, document.chunks)
+        return document_id
+    
+    def add_documents(self, documents: List[Document]) -> List[str]:
+        """Add multiple documents to the store."""
+        return [self.add_document(doc) for doc in documents]
+    
+    def add_chunks(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        start: int = 0,
+        vector_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add a batch of a document's embedded chunks, replacing vectors with the same id."""
+        vector_ids = self._vector_ids(document_id, len(chunks), start, vector_ids)
+        embedded = [(vector_id, chunk) for vector_id, chunk in zip(vector_ids, chunks) if chunk.embedding is not None]
+        if not embedded:
+            return []
+        vectors = np.asarray([chunk.embedding for _, chunk in embedded])
+        # Keep the chunks without their embedding lists; the vectors live in the matrix or index
+        stored = [
+            (vector_id, Chunk(
+                text=chunk.text,
+                metadata=chunk.metadata,
+                start_index=chunk.start_index,
+                end_index=chunk.end_index,
+                page_number=chunk.page_number
+            ))
+            for vector_id, chunk in embedded
+        ]
+        return self._add_rows(document_id, stored, vectors)
+    
+    def add_chunk_batch(self, document_id: str, batch: ChunkBatch, start: int = 0) -> List[str]:
+        """Add an embedded ChunkBatch, storing its embedding matrix and row references without Chunk objects."""
+        if batch.embeddings is None or not len(batch):
+            return []
+        vector_ids = self._vector_ids(document_id, len(batch), start, None)
+        # Rows reference a view of the batch without its embedding matrix
+        view = ChunkBatch(
+            batch.source, batch.starts, batch.ends, batch.metadata, batch.page_numbers, None, batch.source_offset
+        )
+        return self._add_rows(document_id, [(vector_ids[i], (view, i)) for i in range(len(batch))], batch.embeddings)
+    
+    def _add_rows(self, document_id: str, embedded: List[Tuple[str, ChunkEntry]], vectors: np.ndarray) -> List[str]:
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+        if self.index is not None:
+            return self._add_indexed(document_id, embedded, vectors)
+        self._reserve(len(embedded), vectors.shape[1])
+        
+        ids = []
+        for (vector_id, chunk), vector in zip(embedded, vectors):
+            row = self._rows.get(vector_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._rows[vector_id] = row
+                self._ids.append(vector_id)
+                self._document_ids.append(document_id)
+                self._chunks.append(chunk)
+            else:
+                self._chunks[row] = chunk
+            self._matrix[row] = vector
+            ids.append(vector_id)
+        return ids
+    
+    def _add_indexed(self, document_id: str, embedded: List[Tuple[str, ChunkEntry]], vectors: np.ndarray) -> List[str]:
+        """Append rows for new vectors and add them to the index, retiring replaced rows."""
+        ids = []
+        rows = []
+        for vector_id, chunk in embedded:
+            previous = self._rows.get(vector_id)
+            if previous is not None:
+                self.index.remove([previous])
+                self._chunks[previous] = None
+            row = self._size
+            self._size += 1
+            self._rows[vector_id] = row
+            self._ids.append(vector_id)
+            self._document_ids.append(document_id)
+            self._chunks.append(chunk)
+            ids.append(vector_id)
+            rows.append(row)
+        self.index.add(vectors, np.asarray(rows, dtype=np.int64))
+        return ids
+    
+    def search(
+        self,
+        query: Union[str, Sequence[float], np.ndarray],
+        limit: int = 5
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search for the chunks most similar to a query.
+        
+        Args:
+            query: Query text (embedded with the store's embeddings) or query vector
+            limit (int): Maximum number of results
+        
+        Returns:
+            List[Tuple[Document, float]]: One single-chunk document per hit with its cosine similarity
+        """
+        return self.search_vectors(self._embed_query(query)[np.newaxis, :], limit)[0]
+    
+    def search_vectors(self, queries: np.ndarray, limit: int = 5) -> List[List[Tuple[Document, float]]]:
+        """
+        Search for many query vectors with a single matrix product.
+        
+        Args:
+            queries (np.ndarray): Query vectors of shape (n_queries, dim)
+            limit (int): Maximum number of results per query
+        
+        Returns:
+            List[List[Tuple[Document, float]]]: Results for each query, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if len(self) == 0 or limit <= 0:
+            return [[] for _ in range(len(queries))]
+        
+        if self.index is not None:
+            rows, row_scores = self.index.search(self._normalize(queries), min(limit, len(self)))
+            return [
+                [(self._result(row), float(score)) for row, score in zip(hits, hit_scores) if row >= 0]
+                for hits, hit_scores in zip(rows.tolist(), row_scores.tolist())
+            ]
+        
+        scores = self._normalize(queries) @ self._matrix[:self._size].T
+        k = min(limit, self._size)
+        if k < self._size:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self._size), (len(queries), self._size))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        return [
+            [(self._result(row), float(score)) for row, score in zip(rows, row_scores)]
+            for rows, row_scores in zip(top, top_scores)
+        ]
+    
+    def _result(self, row: int) -> Document:
+        chunk = self._chunks[row]
+        if not isinstance(chunk, Chunk):
+            batch, i = chunk
+            chunk = batch[i]
+        return Document(
+            content=chunk.text,
+            metadata=chunk.metadata,
+            chunks=[chunk],
+            id=self._document_ids[row]
+        )
+    
+    def delete_document(self, document_id: str) -> bool:
+        """Delete all of a document's vectors from the store."""
+        removed = [vector_id for vector_id, row in self._rows.items() if self._document_ids[row] == document_id]
+        return self.delete_chunks(removed) > 0
+    
+    def delete_chunks(self, vector_ids: List[str]) -> int:
+        """Delete individual chunk vectors, compacting the matrix or dropping them from the index."""
+        rows = {self._rows[vector_id] for vector_id in vector_ids if vector_id in self._rows}
+        if not rows:
+            return 0
+        if self.index is not None:
+            for vector_id in vector_ids:
+                self._rows.pop(vector_id, None)
+            self.index.remove(sorted(rows))
+            for row in rows:
+                self._chunks[row] = None
+            return len(rows)
+        keep = [row for row in range(self._size) if row not in rows]
+        self._matrix[:len(keep)] = self._matrix[keep]
+        self._size = len(keep)
+        self._ids = [self._ids[row] for row in keep]
+        self._document_ids = [self._document_ids[row] for row in keep]
+        self._chunks = [self._chunks[row] for row in keep]
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        return len(rows)
+    
+    def clear(self) -> None:
+        """Clear all documents from the store."""
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._ids: List[str] = []
+        self._document_ids: List[str] = []
+        self._chunks: List[Optional[ChunkEntry]] = []
+        self._rows: Dict[str, int] = {}
+        if self.index is not None:
+            self.index.clear()
+
+class SegmentedVectorStore(BaseVectorStore):
+    """
+    Persistent local vector store made of memory-mapped segment files.
+    
+    New chunks collect in an in-memory buffer that is written out as an
+    immutable segment every flush_size rows or on flush(). A manifest lists
+    the live segments and their deleted rows; once more than max_segments
+    exist the smallest ones are merged into one, streaming their rows.
+    Opening a store maps its segments without reading them, so startup is
+    immediate and every process that opens the same directory shares one
+    copy in the page cache. Readers call refresh() to pick up segments
+    written by another process.
+    """
+    
+    manifest_name = "manifest.json"
+    
+    def __init__(
+        self,
+        directory: str,
+        embeddings: Optional[BaseEmbeddings] = None,
+        flush_size: int = 10000,
+        max_segments: int = 8,
+        dtype: str = "float32",
+        block_rows: int = 65536,
+        query_embedder: Optional[QueryEmbedder] = None
+    ):
+        """
+        Open or create a store.
+        
+        Args:
+            directory (str): Directory holding the manifest and segment files
+            embeddings (BaseEmbeddings, optional): Model used to embed text queries
+            flush_size (int): Buffered rows that trigger writing a segment
+            max_segments (int): Segment count above which the smallest segments are merged
+            dtype (str): Storage type of new segments, "float32" or "float16"
+            block_rows (int): Rows scored per matrix product during search
+            query_embedder (QueryEmbedder, optional): Cached query embedder, built from embeddings if None
+        """
+        self.directory = directory
+        self.embeddings = embeddings
+        self.query_embedder = query_embedder
+        self.flush_size = flush_size
+        self.max_segments = max_segments
+        self.dtype = dtype
+        self.block_rows = block_rows
+        os.makedirs(directory, exist_ok=True)
+        self._segments: List[Segment] = []
+        self._deleted: List[Set[int]] = []
+        self._next_segment = 1
+        self._reset_buffer()
+        self.refresh()
+    
+    def _reset_buffer(self) -> None:
+        self._buffer_vectors: List[np.ndarray] = []
+        self._buffer_records: List[Dict[str, Any]] = []
+        self._buffer_rows: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        stored = sum(len(segment) - len(deleted) for segment, deleted in zip(self._segments, self._deleted))
+        return stored + len(self._buffer_records)
+    
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, self.manifest_name)
+    
+    def refresh(self) -> None:
+        """Reload the manifest, mapping new segments and dropping compacted ones."""
+        open_segments = {os.path.basename(segment.path): segment for segment in self._segments}
+        self._segments = []
+        self._deleted = []
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._next_segment = manifest["next_segment"]
+            for entry in manifest["segments"]:
+                segment = open_segments.get(entry["name"])
+                if segment is None:
+                    segment = Segment(os.path.join(self.directory, entry["name"]))
+                self._segments.append(segment)
+                self._deleted.append(set(entry["deleted"]))
+        self._locations: Optional[Dict[str, Tuple[int, int]]] = None
+    
+    def _write_manifest(self) -> None:
+        manifest = {
+            "next_segment": self._next_segment,
+            "segments": [
+                {"name": os.path.basename(segment.path), "deleted": sorted(deleted)}
+                for segment, deleted in zip(self._segments, self._deleted)
+            ],
+        }
+        temp_path = self._manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self._manifest_path)
+    
+    def _ensure_locations(self) -> Dict[str, Tuple[int, int]]:
+        """Map vector ids to (segment, row), decoding segment records on first use."""
+        if self._locations is None:
+            self._locations = {}
+            for position, (segment, deleted) in enumerate(zip(self._segments, self._deleted)):
+                for row, (vector_id, _) in enumerate(segment.keys()):
+                    if row not in deleted:
+                        self._locations[vector_id] = (position, row)
+        return self._locations
+    
+    def _dim(self) -> Optional[int]:
+        if self._segments:
+            return self._segments[0].dim
+        if self._buffer_vectors:
+            return len(self._buffer_vectors[0])
+        return None
+    
+    def add_document(self, document: Document) -> str:
+        """Add a document's embedded chunks to the store."""
+        document_id = document.id or document.metadata.title or uuid.uuid4().hex
+        self.add_chunks(document_id, document.chunks)
+        return document_id
+    
+    def add_documents(self, documents: List[Document]) -> List[str]:
+        """Add multiple documents to the store."""
+        return [self.add_document(doc) for doc in documents]
+    
+    def add_chunks(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        start: int = 0,
+        vector_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Buffer a batch of a document's embedded chunks, replacing vectors with the same id."""
+        vector_ids = self._vector_ids(document_id, len(chunks), start, vector_ids)
+        embedded = [(vector_id, chunk) for vector_id, chunk in zip(vector_ids, chunks) if chunk.embedding is not None]
+        if not embedded:
+            return []
+        vectors = self._normalize(np.asarray([chunk.embedding for _, chunk in embedded], dtype=np.float32))
+        dim = self._dim()
+        if dim is not None and vectors.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {dim}")
+        
+        locations = self._ensure_locations()
+        ids = []
+        for (vector_id, chunk), vector in zip(embedded, vectors):
+            record = chunk_record(vector_id, document_id, chunk)
+            row = self._buffer_rows.get(vector_id)
+            if row is None:
+                location = locations.pop(vector_id, None)
+                if location is not None:
+                    self._deleted[location[0]].add(location[1])
+                self._buffer_rows[vector_id] = len(self._buffer_records)
+                self._buffer_records.append(record)
+                self._buffer_vectors.append(vector)
+            else:
+                self._buffer_records[row] = record
+                self._buffer_vectors[row] = vector
+            ids.append(vector_id)
+        if len(self._buffer_records) >= self.flush_size:
+            self.flush()
+        return ids
+    
+    def flush(self) -> None:
+        """Write buffered chunks as a new segment, merging small segments if there are too many."""
+        if not self._buffer_records:
+            return
+        segment = self._write_segment(np.stack(self._buffer_vectors), self._buffer_records)
+        self._segments.append(segment)
+        self._deleted.append(set())
+        if self._locations is not None:
+            position = len(self._segments) - 1
+            for vector_id, row in self._buffer_rows.items():
+                self._locations[vector_id] = (position, row)
+        self._reset_buffer()
+        if len(self._segments) > self.max_segments:
+            self._merge(self._merge_tier())
+        else:
+            self._write_manifest()
+    
+    def _write_segment(self, vectors: np.ndarray, records: List[Dict[str, Any]]) -> Segment:
+        path = os.path.join(self.directory, f"segment-{self._next_segment:06d}.dvs")
+        self._next_segment += 1
+        write_segment(path, vectors, records, self.dtype)
+        return Segment(path)
+    
+    def _merge_tier(self) -> List[int]:
+        """
+        Pick the segments to merge: the smallest ones, plus any next-smallest
+        segment no larger than their total, so each row is rewritten only a
+        logarithmic number of times instead of on every compaction.
+        """
+        live = [len(segment) - len(deleted) for segment, deleted in zip(self._segments, self._deleted)]
+        order = sorted(range(len(live)), key=lambda position: live[position])
+        count = max(2, len(live) - self.max_segments + 1)
+        total = sum(live[position] for position in order[:count])
+        while count < len(order) and live[order[count]] <= total:
+            total += live[order[count]]
+            count += 1
+        return order[:count]
+    
+    def _merge(self, positions: List[int]) -> None:
+        """Stream the live rows of the given segments into one new segment and drop the old ones."""
+        merging = [(self._segments[position], self._deleted[position]) for position in positions]
+        rows = sum(len(segment) - len(deleted) for segment, deleted in merging)
+        
+        def blocks() -> Iterator[Tuple[np.ndarray, List[bytes]]]:
+            for segment, deleted in merging:
+                live = [row for row in range(len(segment)) if row not in deleted]
+                for start in range(0, len(live), self.block_rows):
+                    block = live[start:start + self.block_rows]
+                    yield segment.vectors[block], [segment.raw_record(row) for row in block]
+        
+        merged = set(positions)
+        keep = [position for position in range(len(self._segments)) if position not in merged]
+        segments = [self._segments[position] for position in keep]
+        deleted_rows = [self._deleted[position] for position in keep]
+        if rows:
+            path = os.path.join(self.directory, f"segment-{self._next_segment:06d}.dvs")
+            self._next_segment += 1
+            write_segment_blocks(path, rows, merging[0][0].dim, blocks(), self.dtype)
+            segments.append(Segment(path))
+            deleted_rows.append(set())
+        self._segments = segments
+        self._deleted = deleted_rows
+        self._locations = None
+        self._write_manifest()
+        # Readers that still map an old segment keep it alive until they refresh
+        for segment, _ in merging:
+            os.remove(segment.path)
+    
+    def compact(self) -> None:
+        """Merge all live rows, including buffered ones, into a single segment."""
+        self.flush()
+        if len(self._segments) > 1 or any(self._deleted):
+            self._merge(list(range(len(self._segments))))
+    
+    def search(
+        self,
+        query: Union[str, Sequence[float], np.ndarray],
+        limit: int = 5
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search for the chunks most similar to a query.
+        
+        Args:
+            query: Query text (embedded with the store's embeddings) or query vector
+            limit (int): Maximum number of results
+        
+        Returns:
+            List[Tuple[Document, float]]: One single-chunk document per hit with its cosine similarity
+        """
+        return self.search_vectors(self._embed_query(query)[np.newaxis, :], limit)[0]
+    
+    def search_vectors(self, queries: np.ndarray, limit: int = 5) -> List[List[Tuple[Document, float]]]:
+        """
+        Search for many query vectors, scanning each segment in blocks of block_rows.
+        
+        Args:
+            queries (np.ndarray): Query vectors of shape (n_queries, dim)
+            limit (int): Maximum number of results per query
+        
+        Returns:
+            List[List[Tuple[Document, float]]]: Results for each query, best first
+        """
+        queries = self._normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if len(self) == 0 or limit <= 0:
+            return [[] for _ in range(len(queries))]
+        
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_keys = np.empty((len(queries), 0), dtype=np.int64)
+        # Candidates are keyed as source * stride + row, with the buffer as the last source
+        stride = max([len(segment) for segment in self._segments] + [len(self._buffer_records)])
+        sources = [(segment.vectors, deleted) for segment, deleted in zip(self._segments, self._deleted)]
+        if self._buffer_vectors:
+            sources.append((np.stack(self._buffer_vectors), set()))
+        for source, (matrix, deleted) in enumerate(sources):
+            for start in range(0, len(matrix), self.block_rows):
+                block = np.asarray(matrix[start:start + self.block_rows], dtype=np.float32)
+                scores = queries @ block.T
+                if deleted:
+                    dead = [row - start for row in deleted if start <= row < start + len(block)]
+                    scores[:, dead] = -np.inf
+                keys = np.broadcast_to(np.arange(start, start + len(block)) + source * stride, scores.shape)
+                best_scores = np.concatenate([best_scores, scores], axis=1)
+                best_keys = np.concatenate([best_keys, keys], axis=1)
+                if best_scores.shape[1] > limit:
+                    top = np.argpartition(-best_scores, limit - 1, axis=1)[:, :limit]
+                    best_scores = np.take_along_axis(best_scores, top, axis=1)
+                    best_keys = np.take_along_axis(best_keys, top, axis=1)
+        
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_keys = np.take_along_axis(best_keys, order, axis=1)
+        return [
+            [
+                (self._result(*divmod(key, stride)), float(score))
+                for key, score in zip(keys, scores) if score > -np.inf
+            ]
+            for keys, scores in zip(best_keys.tolist(), best_scores.tolist())
+        ]
+    
+    def _result(self, source: int, row: int) -> Document:
+        if source < len(self._segments):
+            record = self._segments[source].record(row)
+        else:
+            record = self._buffer_records[row]
+        chunk = record_chunk(record)
+        return Document(content=chunk.text, metadata=chunk.metadata, chunks=[chunk], id=record["document_id"])
+    
+    def delete_document(self, document_id: str) -> bool:
+        """Delete all of a document's vectors, recording deleted segment rows in the manifest."""
+        vector_ids = [
+            vector_id
+            for segment in self._segments
+            for vector_id, row_document_id in segment.keys()
+            if row_document_id == document_id
+        ]
+        vector_ids.extend(record["id"] for record in self._buffer_records if record["document_id"] == document_id)
+        return self.delete_chunks(vector_ids) > 0
+    
+    def delete_chunks(self, vector_ids: List[str]) -> int:
+        """Delete individual chunk vectors, recording deleted segment rows in the manifest."""
+        locations = self._ensure_locations()
+        deleted_rows = 0
+        for vector_id in vector_ids:
+            location = locations.pop(vector_id, None)
+            if location is not None:
+                self._deleted[location[0]].add(location[1])
+                deleted_rows += 1
+        
+        removed = set(vector_ids) & set(self._buffer_rows)
+        if removed:
+            keep = [row for row, record in enumerate(self._buffer_records) if record["id"] not in removed]
+            vectors = [self._buffer_vectors[row] for row in keep]
+            records = [self._buffer_records[row] for row in keep]
+            self._reset_buffer()
+            self._buffer_vectors = vectors
+            self._buffer_records = records
+            self._buffer_rows = {record["id"]: row for row, record in enumerate(records)}
+        if deleted_rows:
+            self._write_manifest()
+        return deleted_rows + len(removed)
+    
+    def clear(self) -> None:
+        """Delete every segment and buffered chunk."""
+        old_paths = [segment.path for segment in self._segments]
+        self._segments = []
+        self._deleted = []
+        self._locations = None
+        self._reset_buffer()
+        self._write_manifest()
+        for path in old_paths:
+            os.remove(path)
+    
+    def close(self) -> None:
+        """Flush buffered chunks to disk."""
+        self.flush()
+
 class QdrantStore(BaseVectorStore):
-    """Qdrant vector store implementation."""
+    """
+    Qdrant vector store implementation.
+    
+    Each chunk is one point whose payload holds the chunk text, offsets and
+    the document metadata fields, so searches can filter on them. Point ids
+    are UUIDs derived from the chunk's vector id, which is kept in the
+    payload. Upserts are sent in batches with wait=False so the server
+    pipelines them; flush waits until all of them are applied.
+    """
     
-    def __init__(self, url: str, collection_name: str = "documents"):
+    # Metadata fields that get a payload index, with their schema type
+    indexed_fields = {
+        "document_id": "keyword",
+        "title": "keyword",
+        "author": "keyword",
+        "file_type": "keyword",
+        "page_number": "integer",
+        "created_at": "datetime",
+    }
+    
+    def __init__(
+        self,
+        url: str = "http://localhost:6333",
+        collection_name: str = "documents",
+        embeddings: Optional[BaseEmbeddings] = None,
+        query_embedder: Optional[QueryEmbedder] = None,
+        api_key: Optional[str] = None,
+        prefer_grpc: bool = True,
+        grpc_port: int = 6334,
+        timeout: Optional[int] = None,
+        batch_size: int = 256,
+        on_disk: bool = False,
+        client: Any = None
+    ):
+        """
+        Initialize Qdrant vector store.
+        
+        Args:
+            url (str): Qdrant server URL, or ":memory:" for an in-process local instance
+            collection_name (str): Name of the collection, created on the first insert
+            embeddings (BaseEmbeddings, optional): Model used to embed text queries
+            query_embedder (QueryEmbedder, optional): Cached query embedder, built from embeddings if None
+            api_key (str, optional): Qdrant API key
+            prefer_grpc (bool): Talk to the server over gRPC instead of REST
+            grpc_port (int): Port of the gRPC interface
+            timeout (int, optional): Request timeout in seconds
+            batch_size (int): Points per upsert request
+            on_disk (bool): Keep the collection's vectors on disk instead of in RAM
+            client (optional): Existing QdrantClient to use instead of connecting to url
+        """
+        try:
+            from qdrant_client import QdrantClient, models
+        except ImportError:
+            raise ImportError("Please install qdrant-client: pip install qdrant-client")
+        self._models = models
+        # One client per store; its gRPC channel multiplexes all requests
+        self.client = client or QdrantClient(
+            location=url, api_key=api_key, prefer_grpc=prefer_grpc, grpc_port=grpc_port, timeout=timeout
+        )
         self.url = url
         self.collection_name = collection_name
-        # TODO: Initialize Qdrant client
+        self.embeddings = embeddings
+        self.query_embedder = query_embedder
+        self.batch_size = batch_size
+        self.on_disk = on_disk
+        self._collection_ready = False
+        self._last_point: Optional[Tuple[str, List[float], Dict[str, Any]]] = None
+    
+    def _ensure_collection(self, dim: int) -> None:
+        if self._collection_ready:
+            return
+        models = self._models
+        if not self.client.collection_exists(self.collection_name):
+            self.client.create_collection(
+                self.collection_name,
+                vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE, on_disk=self.on_disk)
+            )
+            for field, schema in self.indexed_fields.items():
+                self.client.create_payload_index(
+                    self.collection_name, field_name=field, field_schema=models.PayloadSchemaType(schema)
+                )
+        self._collection_ready = True
+    
+    @staticmethod
+    def _point_id(vector_id: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, vector_id))
+    
+    @staticmethod
+    def _payload(vector_id: str, document_id: str, position: int, chunk: Chunk) -> Dict[str, Any]:
+        metadata = chunk.metadata
+        payload = {
+            "vector_id": vector_id,
+            "document_id": document_id,
+            "chunk_index": position,
+            "text": chunk.text,
+            "start_index": chunk.start_index,
+            "end_index": chunk.end_index,
+            "page_number": chunk.page_number,
+            "title": metadata.title,
+            "author": metadata.author,
+            "file_type": metadata.file_type,
+            "created_at": metadata.created_at.isoformat() if metadata.created_at else None,
+            "custom": metadata.custom or None,
+        }
+        return {key: value for key, value in payload.items() if value is not None}
     
     def add_document(self, document: Document) -> str:
-        """Add a document to Qdrant."""
-        # TODO: Implement Qdrant document addition
-        return "dummy_id"
+        """Add a document to Qdrant, returning once its points are applied."""
+        document_id = document.id or document.metadata.title
+        self.add_chunks(document_id, document.chunks)
+        self.flush()
+        return document_id
     
     def add_documents(self, documents: List[Document]) -> List[str]:
-        """Add multiple documents to Qdrant."""
-        return [self.add_document(doc) for doc in documents]
+        """Add multiple documents to Qdrant, pipelining the upserts of all of them."""
+        document_ids = []
+        for document in documents:
+            document_id = document.id or document.metadata.title
+            self.add_chunks(document_id, document.chunks)
+            document_ids.append(document_id)
+        self.flush()
+        return document_ids
     
-    def search(self, query: str, limit: int = 5) -> List[Document]:
-        """Search for similar documents in Qdrant."""
-        # TODO: Implement Qdrant search
-        return []
+    def add_chunks(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        start: int = 0,
+        vector_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Upsert a batch of a document's chunks without waiting for them to be applied.
+        
+        Call flush to wait; searches and deletes flush first.
+        """
+        vector_ids = self._vector_ids(document_id, len(chunks), start, vector_ids)
+        points = [
+            (self._point_id(vector_id), list(chunk.embedding), self._payload(vector_id, document_id, i, chunk))
+            for i, (vector_id, chunk) in enumerate(zip(vector_ids, chunks), start)
+            if chunk.embedding is not None
+        ]
+        if not points:
+            return []
+        self._ensure_collection(len(points[0][1]))
+        for offset in range(0, len(points), self.batch_size):
+            self._upsert(points[offset:offset + self.batch_size], wait=False)
+        self._last_point = points[-1]
+        return [payload["vector_id"] for _, _, payload in points]
+    
+    def _upsert(self, points: List[Tuple[str, List[float], Dict[str, Any]]], wait: bool) -> None:
+        ids, vectors, payloads = zip(*points)
+        self.client.upsert(
+            self.collection_name,
+            points=self._models.Batch(ids=list(ids), vectors=list(vectors), payloads=list(payloads)),
+            wait=wait
+        )
+    
+    def flush(self) -> None:
+        """Wait until every upsert sent so far is applied."""
+        if self._last_point is None:
+            return
+        # Updates are applied in order, so re-sending the last point and
+        # waiting for it waits for everything queued before it
+        self._upsert([self._last_point], wait=True)
+        self._last_point = None
+    
+    def _filter(self, filter: Any) -> Any:
+        """Build a Qdrant filter from a field to value mapping; lists match any of their values."""
+        if filter is None or isinstance(filter, self._models.Filter):
+            return filter
+        models = self._models
+        conditions = []
+        for key, value in filter.items():
+            if isinstance(value, (list, tuple, set)):
+                match = models.MatchAny(any=list(value))
+            else:
+                match = models.MatchValue(value=value)
+            conditions.append(models.FieldCondition(key=key, match=match))
+        return models.Filter(must=conditions)
+    
+    def search(
+        self,
+        query: Union[str, Sequence[float], np.ndarray],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search for similar chunks in Qdrant.
+        
+        Args:
+            query: Query text or embedding vector
+            limit (int): Maximum number of results
+            filter (Dict[str, Any], optional): Payload field values the results must match,
+                e.g. {"file_type": "application/pdf"}, or a qdrant_client Filter
+        
+        Returns:
+            List[Tuple[Document, float]]: Matching chunks with their cosine similarity, best first
+        """
+        return self.search_vectors(self._embed_query(query)[np.newaxis, :], limit, filter)[0]
+    
+    def search_vectors(
+        self,
+        vectors: np.ndarray,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Answer many query vectors in one batch request, sharing one optional filter."""
+        self.flush()
+        if not self._collection_ready and not self.client.collection_exists(self.collection_name):
+            return [[] for _ in np.atleast_2d(vectors)]
+        models = self._models
+        query_filter = self._filter(filter)
+        requests = [
+            models.QueryRequest(query=vector.tolist(), filter=query_filter, limit=limit, with_payload=True)
+            for vector in np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        ]
+        responses = self.client.query_batch_points(self.collection_name, requests=requests)
+        return [
+            [(self._result(point.payload or {}), float(point.score)) for point in response.points]
+            for response in responses
+        ]
+    
+    @staticmethod
+    def _result(payload: Dict[str, Any]) -> Document:
+        custom = dict(payload.get("custom") or {})
+        custom.update(chunk_index=payload.get("chunk_index"), vector_id=payload.get("vector_id"))
+        return Document(
+            content=payload.get("text", ""),
+            metadata=Metadata(
+                title=payload.get("title"),
+                author=payload.get("author"),
+                file_type=payload.get("file_type"),
+                created_at=payload.get("created_at"),
+                custom=custom
+            ),
+            id=payload.get("document_id")
+        )
     
     def delete_document(self, document_id: str) -> bool:
-        """Delete a document from Qdrant."""
-        # TODO: Implement Qdrant document deletion
+        """Delete all chunks of a document from Qdrant."""
+        self.flush()
+        if not self._collection_ready and not self.client.collection_exists(self.collection_name):
+            return False
+        self.client.delete(
+            self.collection_name,
+            points_selector=self._models.FilterSelector(filter=self._filter({"document_id": document_id})),
+            wait=True
+        )
         return True
     
+    def delete_chunks(self, vector_ids: List[str]) -> int:
+        """Delete individual chunk vectors from Qdrant."""
+        self.flush()
+        if vector_ids and (self._collection_ready or self.client.collection_exists(self.collection_name)):
+            self.client.delete(
+                self.collection_name,
+                points_selector=self._models.PointIdsList(points=[self._point_id(i) for i in vector_ids]),
+                wait=True
+            )
+        return len(vector_ids)
+    
     def clear(self) -> None:
-        """Clear all documents from Qdrant."""
-        # TODO: Implement Qdrant collection clearing
-        pass
+        """Drop the Qdrant collection; it is recreated on the next insert."""
+        self._last_point = None
+        self.client.delete_collection(self.collection_name)
+        self._collection_ready = False
+    
+    def close(self) -> None:
+        """Wait for pending upserts and close the client."""
+        try:
+            self.flush()
+        finally:
+            self.client.close()
 
 class WeaviateStore(BaseVectorStore):
-    """Weaviate vector store implementation."""
+    """
+    Weaviate vector store implementation.
     
-    def __init__(self, url: str, class_name: str = "Document"):
+    Chunks are imported through Weaviate's client-side batching with our own
+    embeddings as the object vectors; the collection has no vectorizer.
+    Object ids are UUIDs derived from the chunk's vector id, so re-importing
+    a chunk replaces it. Text queries run as hybrid searches that fuse BM25
+    over the chunk text with vector similarity.
+    """
+    
+    def __init__(
+        self,
+        url: str = "http://localhost:8080",
+        class_name: str = "Document",
+        embeddings: Optional[BaseEmbeddings] = None,
+        query_embedder: Optional[QueryEmbedder] = None,
+        api_key: Optional[str] = None,
+        grpc_port: int = 50051,
+        batch_size: Optional[int] = None,
+        concurrent_requests: int = 2,
+        alpha: float = 0.5,
+        client: Any = None
+    ):
+        """
+        Initialize Weaviate vector store.
+        
+        Args:
+            url (str): Weaviate HTTP endpoint
+            class_name (str): Name of the collection, created on the first insert
+            embeddings (BaseEmbeddings, optional): Model used to embed text queries
+            query_embedder (QueryEmbedder, optional): Cached query embedder, built from embeddings if None
+            api_key (str, optional): Weaviate API key
+            grpc_port (int): Port of the gRPC interface on the same host
+            batch_size (int, optional): Objects per batch request; if None the client
+                sizes batches dynamically from the server's load
+            concurrent_requests (int): Batch requests in flight when batch_size is set
+            alpha (float): Default hybrid weight, 1 for pure vector and 0 for pure BM25 search
+            client (optional): Existing WeaviateClient to use instead of connecting to url
+        """
+        try:
+            import weaviate
+            from weaviate.classes.query import Filter, MetadataQuery
+        except ImportError:
+            raise ImportError("Please install weaviate-client: pip install weaviate-client")
+        self._filter_class = Filter
+        self._metadata_query = MetadataQuery
+        if client is None:
+            parsed = urlparse(url)
+            secure = parsed.scheme == "https"
+            client = weaviate.connect_to_custom(
+                http_host=parsed.hostname or "localhost",
+                http_port=parsed.port or (443 if secure else 8080),
+                http_secure=secure,
+                grpc_host=parsed.hostname or "localhost",
+                grpc_port=grpc_port,
+                grpc_secure=secure,
+                auth_credentials=weaviate.auth.AuthApiKey(api_key) if api_key else None
+            )
+        self.client = client
         self.url = url
         self.class_name = class_name
-        # TODO: Initialize Weaviate client
+        self.embeddings = embeddings
+        self.query_embedder = query_embedder
+        self.batch_size = batch_size
+        self.concurrent_requests = concurrent_requests
+        self.alpha = alpha
+        self._collection: Any = None
+    
+    def _get_collection(self, create: bool = False) -> Any:
+        """Return the collection, creating it if create is set; None if it does not exist."""
+        if self._collection is not None:
+            return self._collection
+        if not self.client.collections.exists(self.class_name):
+            if not create:
+                return None
+            from weaviate.classes.config import Configure, DataType, Property, Tokenization, VectorDistances
+            keyword = {"data_type": DataType.TEXT, "tokenization": Tokenization.FIELD}
+            self.client.collections.create(
+                self.class_name,
+                vectorizer_config=Configure.Vectorizer.none(),
+                vector_index_config=Configure.VectorIndex.hnsw(distance_metric=VectorDistances.COSINE),
+                properties=[
+                    Property(name="text", data_type=DataType.TEXT),
+                    Property(name="vector_id", **keyword),
+                    Property(name="document_id", **keyword),
+                    Property(name="chunk_index", data_type=DataType.INT),
+                    Property(name="start_index", data_type=DataType.INT),
+                    Property(name="end_index", data_type=DataType.INT),
+                    Property(name="page_number", data_type=DataType.INT),
+                    Property(name="title", data_type=DataType.TEXT),
+                    Property(name="file_type", **keyword),
+                ]
+            )
+        self._collection = self.client.collections.get(self.class_name)
+        return self._collection
     
     def add_document(self, document: Document) -> str:
         """Add a document to Weaviate."""
-        # TODO: Implement Weaviate document addition
-        return "dummy_id"
+        return self.add_documents([document])[0]
     
     def add_documents(self, documents: List[Document]) -> List[str]:
-        """Add multiple documents to Weaviate."""
-        return [self.add_document(doc) for doc in documents]
+        """Add multiple documents to Weaviate through one batch import."""
+        document_ids = [document.id or document.metadata.title for document in documents]
+        self._import([
+            (document_id, document.chunks, 0, None)
+            for document_id, document in zip(document_ids, documents)
+        ])
+        return document_ids
     
-    def search(self, query: str, limit: int = 5) -> List[Document]:
-        """Search for similar documents in Weaviate."""
-        # TODO: Implement Weaviate search
-        return []
+    def add_chunks(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        start: int = 0,
+        vector_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Import a batch of a document's chunks."""
+        return self._import([(document_id, chunks, start, vector_ids)])
+    
+    def _import(self, groups: List[Tuple[str, List[Chunk], int, Optional[List[str]]]]) -> List[str]:
+        """Send the chunks of several documents through a single batch context."""
+        from weaviate.util import generate_uuid5
+        objects = []
+        for document_id, chunks, start, vector_ids in groups:
+            vector_ids = self._vector_ids(document_id, len(chunks), start, vector_ids)
+            for i, (vector_id, chunk) in enumerate(zip(vector_ids, chunks), start):
+                if chunk.embedding is not None:
+                    properties = {
+                        "text": chunk.text,
+                        "vector_id": vector_id,
+                        "document_id": document_id,
+                        "chunk_index": i,
+                        "start_index": chunk.start_index,
+                        "end_index": chunk.end_index,
+                        "page_number": chunk.page_number,
+                        "title": chunk.metadata.title,
+                        "file_type": chunk.metadata.file_type,
+                    }
+                    properties = {key: value for key, value in properties.items() if value is not None}
+                    objects.append((generate_uuid5(vector_id), properties, list(chunk.embedding)))
+        if not objects:
+            return []
+        
+        collection = self._get_collection(create=True)
+        if self.batch_size is None:
+            context = collection.batch.dynamic()
+        else:
+            context = collection.batch.fixed_size(
+                batch_size=self.batch_size, concurrent_requests=self.concurrent_requests
+            )
+        with context as batch:
+            for object_id, properties, vector in objects:
+                batch.add_object(properties=properties, vector=vector, uuid=object_id)
+        failed = collection.batch.failed_objects
+        if failed:
+            raise RuntimeError(f"Weaviate rejected {len(failed)} objects: {failed[0].message}")
+        return [properties["vector_id"] for _, properties, _ in objects]
+    
+    def _filters(self, filter: Any) -> Any:
+        """Build a Weaviate filter from a property to value mapping; lists match any of their values."""
+        if filter is None or not isinstance(filter, dict):
+            return filter
+        Filter = self._filter_class
+        conditions = [
+            Filter.by_property(key).contains_any(list(value))
+            if isinstance(value, (list, tuple, set))
+            else Filter.by_property(key).equal(value)
+            for key, value in filter.items()
+        ]
+        combined = conditions[0]
+        for condition in conditions[1:]:
+            combined = combined & condition
+        return combined
+    
+    def search(
+        self,
+        query: Union[str, Sequence[float], np.ndarray],
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        alpha: Optional[float] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search for similar chunks in Weaviate.
+        
+        Text queries run a hybrid search when the store has embeddings and a
+        BM25 search otherwise; vector queries run a near-vector search.
+        
+        Args:
+            query: Query text or embedding vector
+            limit (int): Maximum number of results
+            filter (Dict[str, Any], optional): Property values the results must match,
+                e.g. {"document_id": "report.pdf"}, or a Weaviate Filter
+            alpha (float, optional): Hybrid weight overriding the store default
+        
+        Returns:
+            List[Tuple[Document, float]]: Matching chunks with their score, best first;
+                cosine similarity for vector queries, the fused score for text queries
+        """
+        collection = self._get_collection()
+        if collection is None:
+            return []
+        filters = self._filters(filter)
+        if not isinstance(query, str):
+            return self._near_vector(collection, self._embed_query(query), limit, filters)
+        if self.embeddings is None and self.query_embedder is None:
+            response = collection.query.bm25(
+                query, limit=limit, filters=filters, return_metadata=self._metadata_query(score=True)
+            )
+        else:
+            response = collection.query.hybrid(
+                query,
+                vector=self._embed_query(query).tolist(),
+                alpha=self.alpha if alpha is None else alpha,
+                limit=limit,
+                filters=filters,
+                return_metadata=self._metadata_query(score=True)
+            )
+        return [(self._result(obj.properties), float(obj.metadata.score or 0.0)) for obj in response.objects]
+    
+    def search_vectors(
+        self,
+        vectors: np.ndarray,
+        limit: int = 5,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Run a near-vector search for each query vector, sharing one optional filter."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        collection = self._get_collection()
+        if collection is None:
+            return [[] for _ in vectors]
+        filters = self._filters(filter)
+        return [self._near_vector(collection, vector, limit, filters) for vector in vectors]
+    
+    def _near_vector(self, collection: Any, vector: np.ndarray, limit: int, filters: Any) -> List[Tuple[Document, float]]:
+        response = collection.query.near_vector(
+            vector.tolist(), limit=limit, filters=filters, return_metadata=self._metadata_query(distance=True)
+        )
+        # Weaviate reports cosine distance; convert to similarity like the other stores
+        return [(self._result(obj.properties), 1.0 - float(obj.metadata.distance)) for obj in response.objects]
+    
+    @staticmethod
+    def _result(properties: Dict[str, Any]) -> Document:
+        return Document(
+            content=properties.get("text", ""),
+            metadata=Metadata(
+                title=properties.get("title"),
+                file_type=properties.get("file_type"),
+                custom={"chunk_index": properties.get("chunk_index"), "vector_id": properties.get("vector_id")}
+            ),
+            id=properties.get("document_id")
+        )
     
     def delete_document(self, document_id: str) -> bool:
-        """Delete a document from Weaviate."""
-        # TODO: Implement Weaviate document deletion
+        """Delete all chunks of a document from Weaviate."""
+        collection = self._get_collection()
+        if collection is None:
+            return False
+        collection.data.delete_many(where=self._filters({"document_id": document_id}))
         return True
     
+    def delete_chunks(self, vector_ids: List[str]) -> int:
+        """Delete individual chunk vectors from Weaviate."""
+        from weaviate.util import generate_uuid5
+        collection = self._get_collection()
+        if collection is not None and vector_ids:
+            collection.data.delete_many(
+                where=self._filter_class.by_id().contains_any([generate_uuid5(i) for i in vector_ids])
+            )
+        return len(vector_ids)
+    
     def clear(self) -> None:
-        """Clear all documents from Weaviate."""
-        # TODO: Implement Weaviate class clearing
-        pass
+        """Delete the Weaviate collection; it is recreated on the next insert."""
+        self.client.collections.delete(self.class_name)
+        self._collection = None
+    
+    def close(self) -> None:
+        """Close the client connection."""
+        self.client.close()
 
 class MilvusStore(BaseVectorStore):
-    """Milvus vector store implementation."""
+    """
+    Milvus vector store implementation.
+    
+    Chunks are written column-wise: ids, the embedding matrix and each
+    scalar field go to Milvus as one array per field, in slices of
+    batch_size rows, so no per-row dicts are built. ChunkBatch input is
+    inserted straight from its offset arrays and embedding matrix. The
+    collection's vector index type is chosen at construction; the
+    collection is loaded into memory on first search, or explicitly with
+    load, and can be released again with release.
+    """
     
-    def __init__(self, host: str, port: int, collection_name: str = "documents"):
+    # Default build and search parameters for each supported index type
+    index_types = {
+        "FLAT": ({}, {}),
+        "IVF_FLAT": ({"nlist": 1024}, {"nprobe": 16}),
+        "HNSW": ({"M": 16, "efConstruction": 200}, {"ef": 64}),
+        "DISKANN": ({}, {"search_list": 100}),
+    }
+    
+    # Scalar fields stored next to each vector, in column order
+    scalar_fields = ("document_id", "chunk_index", "start_index", "end_index", "page_number", "title", "file_type", "text")
+    
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 19530,
+        collection_name: str = "documents",
+        embeddings: Optional[BaseEmbeddings] = None,
+        query_embedder: Optional[QueryEmbedder] = None,
+        index_type: str = "HNSW",
+        index_params: Optional[Dict[str, Any]] = None,
+        search_params: Optional[Dict[str, Any]] = None,
+        uri: Optional[str] = None,
+        token: Optional[str] = None,
+        batch_size: int = 10000,
+        replace_existing: bool = True,
+        max_text_length: int = 65535
+    ):
+        """
+        Initialize Milvus vector store.
+        
+        Args:
+            host (str): Milvus server host
+            port (int): Milvus server port
+            collection_name (str): Name of the collection, created on the first insert
+            embeddings (BaseEmbeddings, optional): Model used to embed text queries
+            query_embedder (QueryEmbedder, optional): Cached query embedder, built from embeddings if None
+            index_type (str): Vector index type: "FLAT", "IVF_FLAT", "HNSW" or "DISKANN"
+            index_params (Dict[str, Any], optional): Index build parameters, overriding the type's defaults
+            search_params (Dict[str, Any], optional): Search parameters, overriding the type's defaults
+            uri (str, optional): Connection URI used instead of host and port, e.g. a Milvus Lite file
+            token (str, optional): Authentication token
+            batch_size (int): Rows per insert request
+            replace_existing (bool): Upsert so existing ids are replaced; plain inserts are
+                faster when every id is new
+            max_text_length (int): Maximum stored chunk text length in bytes; longer texts are truncated
+        """
+        index_type = index_type.upper()
+        if index_type not in self.index_types:
+            raise ValueError(f"Unsupported Milvus index type: {index_type}. Choose from {list(self.index_types)}")
+        try:
+            import pymilvus
+        except ImportError:
+            raise ImportError("Please install pymilvus: pip install pymilvus")
+        self._milvus = pymilvus
         self.host = host
         self.port = port
         self.collection_name = collection_name
-        # TODO: Initialize Milvus client
+        self.embeddings = embeddings
+        self.query_embedder = query_embedder
+        self.index_type = index_type
+        default_index_params, default_search_params = self.index_types[index_type]
+        self.index_params = {**default_index_params, **(index_params or {})}
+        self.search_params = {**default_search_params, **(search_params or {})}
+        self.batch_size = batch_size
+        self.replace_existing = replace_existing
+        self.max_text_length = max_text_length
+        self._alias = f"docvector-{uuid.uuid4().hex}"
+        if uri:
+            pymilvus.connections.connect(alias=self._alias, uri=uri, token=token or "")
+        else:
+            pymilvus.connections.connect(alias=self._alias, host=host, port=str(port), token=token or "")
+        self._collection: Any = None
+        self._loaded = False
+        if pymilvus.utility.has_collection(collection_name, using=self._alias):
+            self._collection = pymilvus.Collection(collection_name, using=self._alias)
+    
+    def _ensure_collection(self, dim: int) -> Any:
+        if self._collection is not None:
+            return self._collection
+        milvus = self._milvus
+        DataType = milvus.DataType
+        fields = [
+            milvus.FieldSchema("id", DataType.VARCHAR, is_primary=True, max_length=512),
+            milvus.FieldSchema("embedding", DataType.FLOAT_VECTOR, dim=dim),
+            milvus.FieldSchema("document_id", DataType.VARCHAR, max_length=512),
+            milvus.FieldSchema("chunk_index", DataType.INT64),
+            milvus.FieldSchema("start_index", DataType.INT64),
+            milvus.FieldSchema("end_index", DataType.INT64),
+            milvus.FieldSchema("page_number", DataType.INT64),
+            milvus.FieldSchema("title", DataType.VARCHAR, max_length=1024),
+            milvus.FieldSchema("file_type", DataType.VARCHAR, max_length=256),
+            milvus.FieldSchema("text", DataType.VARCHAR, max_length=self.max_text_length),
+        ]
+        collection = milvus.Collection(
+            self.collection_name, milvus.CollectionSchema(fields), using=self._alias
+        )
+        collection.create_index(
+            "embedding",
+            {"index_type": self.index_type, "metric_type": "COSINE", "params": self.index_params}
+        )
+        self._collection = collection
+        return collection
+    
+    def load(self) -> None:
+        """Load the collection into query node memory; searches do this on demand."""
+        if self._collection is not None and not self._loaded:
+            self._collection.load()
+            self._loaded = True
+    
+    def release(self) -> None:
+        """Release the collection from query node memory."""
+        if self._collection is not None and self._loaded:
+            self._collection.release()
+        self._loaded = False
+    
+    def _truncate(self, text: str) -> str:
+        encoded = text.encode("utf-8")
+        if len(encoded) <= self.max_text_length:
+            return text
+        return encoded[:self.max_text_length].decode("utf-8", errors="ignore")
+    
+    def _write_columns(self, ids: List[str], vectors: np.ndarray, columns: Dict[str, List[Any]]) -> List[str]:
+        collection = self._ensure_collection(vectors.shape[1])
+        write = collection.upsert if self.replace_existing else collection.insert
+        for offset in range(0, len(ids), self.batch_size):
+            end = offset + self.batch_size
+            write(
+                [ids[offset:end], vectors[offset:end]]
+                + [columns[field][offset:end] for field in self.scalar_fields]
+            )
+        return ids
     
     def add_document(self, document: Document) -> str:
         """Add a document to Milvus."""
-        # TODO: Implement Milvus document addition
-        return "dummy_id"
+        document_id = document.id or document.metadata.title
+        self.add_chunks(document_id, document.chunks)
+        return document_id
     
     def add_documents(self, documents: List[Document]) -> List[str]:
         """Add multiple documents to Milvus."""
         return [self.add_document(doc) for doc in documents]
     
-    def search(self, query: str, limit: int = 5) -> List[Document]:
-        """Search for similar documents in Milvus."""
-        # TODO: Implement Milvus search
-        return []
+    def add_chunks(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        start: int = 0,
+        vector_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Insert a batch of a document's chunks as columns."""
+        vector_ids = self._vector_ids(document_id, len(chunks), start, vector_ids)
+        rows = [
+            (vector_id, i, chunk)
+            for i, (vector_id, chunk) in enumerate(zip(vector_ids, chunks), start)
+            if chunk.embedding is not None
+        ]
+        if not rows:
+            return []
+        columns = {
+            "document_id": [document_id] * len(rows),
+            "chunk_index": [i for _, i, _ in rows],
+            "start_index": [chunk.start_index for _, _, chunk in rows],
+            "end_index": [chunk.end_index for _, _, chunk in rows],
+            "page_number": [-1 if chunk.page_number is None else chunk.page_number for _, _, chunk in rows],
+            "title": [chunk.metadata.title or "" for _, _, chunk in rows],
+            "file_type": [chunk.metadata.file_type or "" for _, _, chunk in rows],
+            "text": [self._truncate(chunk.text) for _, _, chunk in rows],
+        }
+        vectors = np.asarray([chunk.embedding for _, _, chunk in rows], dtype=np.float32)
+        return self._write_columns([vector_id for vector_id, _, _ in rows], vectors, columns)
+    
+    def add_chunk_batch(self, document_id: str, batch: ChunkBatch, start: int = 0) -> List[str]:
+        """Insert an embedded ChunkBatch straight from its offset arrays and embedding matrix."""
+        if batch.embeddings is None or not len(batch):
+            return []
+        count = len(batch)
+        page_numbers = batch.page_numbers if batch.page_numbers is not None else np.full(count, -1, dtype=np.int64)
+        columns = {
+            "document_id": [document_id] * count,
+            "chunk_index": np.arange(start, start + count, dtype=np.int64).tolist(),
+            "start_index": batch.starts.tolist(),
+            "end_index": batch.ends.tolist(),
+            "page_number": page_numbers.tolist(),
+            "title": [batch.metadata.title or ""] * count,
+            "file_type": [batch.metadata.file_type or ""] * count,
+            "text": [self._truncate(text) for text in batch.texts],
+        }
+        return self._write_columns(self._vector_ids(document_id, count, start, None), batch.embeddings, columns)
+    
+    def flush(self) -> None:
+        """Seal the collection's growing segments so inserted data is persisted."""
+        if self._collection is not None:
+            self._collection.flush()
+    
+    @staticmethod
+    def _expr(filter: Union[str, Dict[str, Any], None]) -> Optional[str]:
+        """Build a Milvus boolean expression from a field to value mapping; lists match any of their values."""
+        if filter is None or isinstance(filter, str):
+            return filter
+        terms = []
+        for key, value in filter.items():
+            if isinstance(value, (list, tuple, set)):
+                terms.append(f"{key} in {json.dumps(list(value))}")
+            else:
+                terms.append(f"{key} == {json.dumps(value)}")
+        return " and ".join(terms)
+    
+    def search(
+        self,
+        query: Union[str, Sequence[float], np.ndarray],
+        limit: int = 5,
+        filter: Union[str, Dict[str, Any], None] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search for similar chunks in Milvus.
+        
+        Args:
+            query: Query text or embedding vector
+            limit (int): Maximum number of results
+            filter (optional): Scalar field values the results must match, e.g.
+                {"document_id": "report.pdf"}, or a Milvus boolean expression
+        
+        Returns:
+            List[Tuple[Document, float]]: Matching chunks with their cosine similarity, best first
+        """
+        return self.search_vectors(self._embed_query(query)[np.newaxis, :], limit, filter)[0]
+    
+    def search_vectors(
+        self,
+        vectors: np.ndarray,
+        limit: int = 5,
+        filter: Union[str, Dict[str, Any], None] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Answer many query vectors in one search request, sharing one optional filter."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if self._collection is None:
+            return [[] for _ in vectors]
+        self.load()
+        results = self._collection.search(
+            data=vectors,
+            anns_field="embedding",
+            param={"metric_type": "COSINE", "params": self.search_params},
+            limit=limit,
+            expr=self._expr(filter),
+            output_fields=list(self.scalar_fields)
+        )
+        return [[(self._result(hit), float(hit.distance)) for hit in hits] for hits in results]
+    
+    def _result(self, hit: Any) -> Document:
+        entity = hit.entity
+        page_number = entity.get("page_number")
+        return Document(
+            content=entity.get("text") or "",
+            metadata=Metadata(
+                title=entity.get("title") or None,
+                file_type=entity.get("file_type") or None,
+                custom={
+                    "chunk_index": entity.get("chunk_index"),
+                    "vector_id": hit.id,
+                    "page_number": None if page_number is None or page_number < 0 else page_number,
+                }
+            ),
+            id=entity.get("document_id")
+        )
     
     def delete_document(self, document_id: str) -> bool:
-        """Delete a document from Milvus."""
-        # TODO: Implement Milvus document deletion
+        """Delete all chunks of a document from Milvus."""
+        if self._collection is None:
+            return False
+        self._collection.delete(self._expr({"document_id": document_id}))
         return True
     
+    def delete_chunks(self, vector_ids: List[str]) -> int:
+        """Delete individual chunk vectors from Milvus."""
+        if self._collection is not None and vector_ids:
+            self._collection.delete(self._expr({"id": list(vector_ids)}))
+        return len(vector_ids)
+    
     def clear(self) -> None:
-        """Clear all documents from Milvus."""
-        # TODO: Implement Milvus collection clearing
-        pass
+        """Drop the Milvus collection; it is recreated on the next insert."""
+        self._milvus.utility.drop_collection(self.collection_name, using=self._alias)
+        self._collection = None
+        self._loaded = False
+    
+    def close(self) -> None:
+        """Release the collection and disconnect."""
+        self.release()
+        self._milvus.connections.disconnect(self._alias)
 
 class PineconeStore(BaseVectorStore):
-    """Pinecone vector store implementation."""
+    """
+    Pinecone vector store implementation.
+    
+    Chunks are collected in a buffer shared by all documents and sent as
+    upserts bounded by vector count and estimated request size. Full batches
+    are upserted in the background by a small pool of workers, retrying with
+    exponential backoff; flush waits for them and raises the first failure.
+    """
     
-    def __init__(self, api_key: str, environment: str, index_name: str):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        environment: Optional[str] = None,
+        index_name: Optional[str] = None,
+        embeddings: Optional[BaseEmbeddings] = None,
+        query_embedder: Optional[QueryEmbedder] = None,
+        query_workers: int = 8,
+        index: Any = None,
+        batch_size: int = 100,
+        max_request_bytes: int = 2 * 1024 * 1024,
+        upsert_workers: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5
+    ):
         """
         Initialize Pinecone vector store.
         
@@ -142,7 +1667,32 @@ class PineconeStore(BaseVectorStore):
             api_key (str): Pinecone API key
             environment (str): Pinecone environment (e.g., 'us-west1-gcp')
             index_name (str): Name of the Pinecone index
+            embeddings (BaseEmbeddings, optional): Model used to embed text queries
+            query_embedder (QueryEmbedder, optional): Cached query embedder, built from embeddings if None
+            query_workers (int): Maximum concurrent queries in search_vectors
+            index (optional): Existing index object to use instead of connecting with the credentials
+            batch_size (int): Maximum vectors per upsert request
+            max_request_bytes (int): Maximum estimated payload size per upsert request
+            upsert_workers (int): Number of upsert requests in flight
+            max_retries (int): Retries of a failed upsert request
+            retry_backoff (float): Delay before the first retry in seconds, doubled on each retry
         """
+        self.embeddings = embeddings
+        self.query_embedder = query_embedder
+        self.query_workers = query_workers
+        self.batch_size = batch_size
+        self.max_request_bytes = max_request_bytes
+        self.upsert_workers = upsert_workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._query_pool: Optional[ThreadPoolExecutor] = None
+        self._upsert_pool: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Set[Future] = set()
+        self._pending: List[Tuple[str, List[float], Dict[str, Any]]] = []
+        self._pending_bytes = 0
+        if index is not None:
+            self.index = index
+            return
         try:
             import pinecone
             pinecone.init(api_key=api_key, environment=environment)
@@ -150,36 +1700,161 @@ class PineconeStore(BaseVectorStore):
         except ImportError:
             raise ImportError("Please install pinecone-client: pip install pinecone-client")
     
-    def add_document(self, document: Document) -> None:
-        """Add a document to Pinecone."""
-        vectors = []
-        for i, chunk in enumerate(document.chunks):
+    def add_document(self, document: Document) -> str:
+        """Add a document to Pinecone, returning once all of its vectors are upserted."""
+        document_id = document.id or document.metadata.title
+        self.add_chunks(document_id, document.chunks)
+        self.flush()
+        return document_id
+    
+    def add_documents(self, documents: List[Document]) -> List[str]:
+        """Add multiple documents, packing chunks from consecutive documents into shared upserts."""
+        document_ids = []
+        for document in documents:
+            document_id = document.id or document.metadata.title
+            self.add_chunks(document_id, document.chunks)
+            document_ids.append(document_id)
+        self.flush()
+        return document_ids
+    
+    def add_chunks(
+        self,
+        document_id: str,
+        chunks: List[Chunk],
+        start: int = 0,
+        vector_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Buffer a batch of a document's chunks, upserting full batches in the background.
+        
+        Call flush to send the remainder and wait for every upsert.
+        """
+        vector_ids = self._vector_ids(document_id, len(chunks), start, vector_ids)
+        ids = []
+        for i, (vector_id, chunk) in enumerate(zip(vector_ids, chunks), start):
             if chunk.embedding is not None:
-                vector_id = f"{document.metadata.source}_{i}"
                 metadata = {
-                    "title": document.metadata.title,
-                    "source": document.metadata.source,
-                    "content_type": document.metadata.content_type,
+                    "title": chunk.metadata.title,
+                    "source": document_id,
+                    "content_type": chunk.metadata.file_type,
                     "chunk_index": i,
                     "text": chunk.text
                 }
-                vectors.append((vector_id, chunk.embedding, metadata))
+                # Pinecone rejects null metadata values
+                metadata = {key: value for key, value in metadata.items() if value is not None}
+                self._buffer((vector_id, list(chunk.embedding), metadata))
+                ids.append(vector_id)
+        return ids
+    
+    @staticmethod
+    def _payload_bytes(vector: Tuple[str, List[float], Dict[str, Any]]) -> int:
+        """Estimate the JSON request size of one vector."""
+        vector_id, values, metadata = vector
+        return len(vector_id) + 12 * len(values) + len(json.dumps(metadata)) + 64
+    
+    def _buffer(self, vector: Tuple[str, List[float], Dict[str, Any]]) -> None:
+        size = self._payload_bytes(vector)
+        if self._pending and (
+            len(self._pending) >= self.batch_size or self._pending_bytes + size > self.max_request_bytes
+        ):
+            self._submit()
+        self._pending.append(vector)
+        self._pending_bytes += size
+    
+    def _submit(self) -> None:
+        """Send the buffered vectors as one upsert, keeping at most two batches per worker queued."""
+        if self._upsert_pool is None:
+            self._upsert_pool = ThreadPoolExecutor(max_workers=self.upsert_workers)
+        while len(self._in_flight) >= 2 * self.upsert_workers:
+            done, self._in_flight = wait(self._in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+        self._in_flight.add(self._upsert_pool.submit(self._upsert, self._pending))
+        self._pending = []
+        self._pending_bytes = 0
+    
+    def _upsert(self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.index.upsert(vectors=vectors)
+                return
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.retry_backoff * 2 ** attempt * (1 + random.random()))
+    
+    def flush(self) -> None:
+        """Upsert buffered vectors and wait for all upserts, raising the first failure."""
+        if self._pending:
+            self._submit()
+        in_flight, self._in_flight = self._in_flight, set()
+        errors = [future.exception() for future in in_flight if future.exception() is not None]
+        if errors:
+            raise errors[0]
+    
+    def search(
+        self,
+        query: Union[str, Sequence[float], np.ndarray],
+        top_k: int = 3
+    ) -> List[Tuple[Document, float]]:
+        """Search for similar documents in Pinecone, embedding text queries with the query embedder."""
+        return self.search_vectors(self._embed_query(query)[np.newaxis, :], top_k)[0]
+    
+    def search_vectors(self, vectors: np.ndarray, limit: int = 5) -> List[List[Tuple[Document, float]]]:
+        """Query Pinecone for many vectors concurrently, returning results in query order."""
+        self.flush()
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        
+        def query(vector: np.ndarray) -> List[Tuple[Document, float]]:
+            response = self.index.query(vector=vector.tolist(), top_k=limit, include_metadata=True)
+            return [(self._result(match), float(match["score"])) for match in response["matches"]]
         
-        if vectors:
-            self.index.upsert(vectors=vectors)
+        if len(vectors) == 1:
+            return [query(vectors[0])]
+        if self._query_pool is None:
+            self._query_pool = ThreadPoolExecutor(max_workers=self.query_workers)
+        return list(self._query_pool.map(query, vectors))
     
-    def search(self, query: str, top_k: int = 3) -> List[Tuple[Document, float]]:
-        """Search for similar documents in Pinecone."""
-        # Note: In a real implementation, you would need to embed the query first
-        # This is a placeholder implementation
-        results = []
-        return results
+    @staticmethod
+    def _result(match: Any) -> Document:
+        metadata = match["metadata"] or {}
+        return Document(
+            content=metadata.get("text", ""),
+            metadata=Metadata(
+                title=metadata.get("title"),
+                file_type=metadata.get("content_type"),
+                custom={"chunk_index": metadata.get("chunk_index"), "vector_id": match["id"]}
+            ),
+            id=metadata.get("source")
+        )
     
     def delete_document(self, document_id: str) -> None:
         """Delete a document from Pinecone."""
+        self.flush()
         # Delete all vectors with the document prefix
         self.index.delete(filter={"source": document_id})
     
+    def delete_chunks(self, vector_ids: List[str]) -> int:
+        """Delete individual chunk vectors from Pinecone."""
+        self.flush()
+        if vector_ids:
+            self.index.delete(ids=list(vector_ids))
+        return len(vector_ids)
+    
     def clear(self) -> None:
         """Clear all documents from Pinecone."""
-        self.index.delete(delete_all=True) 
\ No newline at end of file
+        self._pending = []
+        self._pending_bytes = 0
+        self.flush()
+        self.index.delete(delete_all=True)
+    
+    def close(self) -> None:
+        """Upsert buffered vectors and stop the worker threads."""
+        try:
+            self.flush()
+        finally:
+            for pool in (self._upsert_pool, self._query_pool):
+                if pool is not None:
+                    pool.shutdown()
+            self._upsert_pool = None
+            self._query_pool = None 
\ No newline at end of file
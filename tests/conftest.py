@@ -0,0 +1,70 @@
+"""
+Shared test fixtures.
+"""
+
+import threading
+import zlib
+from typing import List
+import numpy as np
+import pytest
+from docvector.embeddings import BaseEmbeddings
+
+class FakeEmbeddings(BaseEmbeddings):
+    """Deterministic embeddings that record every provider call."""
+
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.calls: List[List[str]] = []
+
+    def _vector(self, text: str) -> List[float]:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        return rng.standard_normal(self.dim).tolist()
+
+    def embed_text(self, text: str) -> List[float]:
+        self.calls.append([text])
+        return self._vector(text)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [self._vector(text) for text in texts]
+
+class FakePineconeIndex:
+    """In-process stand-in for a Pinecone index that fails the first upserts."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.requests = []
+        self.vectors = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors):
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("upsert failed")
+            self.requests.append(len(vectors))
+            for vector_id, values, metadata in vectors:
+                assert None not in metadata.values()
+                self.vectors[vector_id] = (np.asarray(values), metadata)
+
+    def query(self, vector, top_k, include_metadata):
+        scores = sorted(
+            ((float(np.dot(vector, values)), vector_id) for vector_id, (values, _) in self.vectors.items()),
+            reverse=True
+        )
+        return {"matches": [
+            {"id": vector_id, "score": score, "metadata": self.vectors[vector_id][1]}
+            for score, vector_id in scores[:top_k]
+        ]}
+
+    def delete(self, ids=None, filter=None, delete_all=False):
+        for vector_id in list(self.vectors):
+            if delete_all or vector_id in (ids or ()) or (
+                filter and self.vectors[vector_id][1]["source"] == filter["source"]
+            ):
+                del self.vectors[vector_id]
+
+@pytest.fixture
+def fake_embeddings():
+    """Fake embedding model with call recording."""
+    return FakeEmbeddings()
@@ -0,0 +1,219 @@
+"""
+Tests for chunking strategies.
+"""
+
+import pickle
+import numpy as np
+import pytest
+from docvector.chunking import CodeChunker, SemanticChunker, TokenChunker
+from docvector.embeddings import OpenAIEmbeddings
+from docvector.types import Metadata
+from conftest import FakeEmbeddings
+
+def test_semantic_chunker_exact_offsets_with_repeated_text():
+    """Test that offsets are exact even when sentences repeat."""
+    text = "Same sentence here.\n\nSame sentence here.  Another one!\tSame sentence here."
+    chunks = SemanticChunker(chunk_size=30, overlap=0).chunk_text(text)
+
+    assert [chunk.start_index for chunk in chunks] == [0, 21, 42, 55]
+    for chunk in chunks:
+        assert chunk.text == text[chunk.start_index:chunk.end_index]
+
+def test_semantic_chunker_overlap_in_characters():
+    """Test that trailing sentences are repeated up to the overlap size."""
+    text = " ".join(f"Sentence {i}." for i in range(20))
+    chunks = SemanticChunker(chunk_size=60, overlap=25).chunk_text(text)
+
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous.start_index < chunk.start_index < previous.end_index
+        assert previous.end_index - chunk.start_index <= 25
+    assert chunks[-1].end_index == len(text)
+
+GPT2_PATTERN = r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+
+@pytest.fixture
+def byte_encoding():
+    """Offline tiktoken encoding with one token per byte."""
+    tiktoken = pytest.importorskip("tiktoken")
+    return tiktoken.Encoding(
+        name="bytes",
+        pat_str=GPT2_PATTERN,
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+
+def test_token_chunker_exact_offsets(byte_encoding):
+    """Test that token chunks preserve the original whitespace and offsets."""
+    text = "alpha  beta\ngamma delta\t\tepsilon zeta eta theta"
+    chunks = TokenChunker(chunk_size=20, overlap=1, tokenizer=byte_encoding).chunk_text(text)
+
+    assert len(chunks) > 1
+    assert chunks[0].start_index == 0
+    assert chunks[-1].end_index == len(text)
+    for chunk in chunks:
+        assert chunk.text == text[chunk.start_index:chunk.end_index]
+
+def test_token_chunker_counts_tokens_with_exact_overlap(byte_encoding):
+    """Test token windows, including ones that split multi-byte characters."""
+    text = "héllo wörld 日本語 text " * 5
+    chunker = TokenChunker(chunk_size=16, overlap=4, tokenizer=byte_encoding)
+    chunks = chunker.chunk_text(text)
+
+    tokens = byte_encoding.encode_ordinary(text)
+    assert len(chunks) == -(-(len(tokens) - 4) // 12)
+    assert chunks[-1].end_index == len(text)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # A window may start or end inside a character, which widens the slice by at most one character
+        assert chunker.count_tokens(previous.text) <= 16 + 4
+        assert chunk.start_index < previous.end_index
+    assert chunker.chunk_batch(text).texts == [chunk.text for chunk in chunks]
+    with pytest.raises(ValueError):
+        TokenChunker(chunk_size=10, overlap=10)
+
+def test_token_chunker_streams_same_windows():
+    """Test that streamed token windows equal whole-text ones, including merged and multi-byte tokens."""
+    tiktoken = pytest.importorskip("tiktoken")
+    ranks = {bytes([i]): i for i in range(256)}
+    for merge in [b"he", b"ll", b"hell", b"hello", b" w", b"or", b" wor", b"ld", b" world", b"\xc3\xa9"]:
+        ranks[merge] = len(ranks)
+    encoding = tiktoken.Encoding(name="merges", pat_str=GPT2_PATTERN, mergeable_ranks=ranks, special_tokens={})
+    text = "\n".join(f"hello world {i} héllo 日本語 wörld hellohello" for i in range(300))
+    chunker = TokenChunker(chunk_size=37, overlap=9, tokenizer=encoding)
+    expected = [(c.text, c.start_index, c.end_index) for c in chunker.chunk_text(text)]
+
+    blocks = (text[i:i + 101] for i in range(0, len(text), 101))
+    streamed = [(c.text, c.start_index, c.end_index) for c in chunker.iter_chunks(blocks, buffer_size=700)]
+    assert streamed == expected
+
+def test_iter_chunks_matches_chunk_text_across_buffers():
+    """Test that streaming chunking gives the same chunks as whole-text chunking."""
+    text = " ".join(f"Sentence number {i} is here." for i in range(500))
+    chunker = SemanticChunker(chunk_size=200, overlap=50)
+    expected = [(c.text, c.start_index, c.end_index) for c in chunker.chunk_text(text)]
+
+    blocks = (text[i:i + 97] for i in range(0, len(text), 97))
+    streamed = [(c.text, c.start_index, c.end_index) for c in chunker.iter_chunks(blocks, buffer_size=500)]
+
+    assert streamed == expected
+
+def test_iter_chunks_bounded_without_sentence_punctuation():
+    """Test that text with no sentence boundaries is still cut into chunk_size pieces when streamed."""
+    text = "\n".join(f"2024-01-01 host{i % 7} service=api status=200 latency={i}ms" for i in range(2000))
+    text += "\n" + "x" * 450
+    chunker = SemanticChunker(chunk_size=200, overlap=50)
+    expected = [(c.text, c.start_index, c.end_index) for c in chunker.chunk_text(text)]
+
+    streamed = [(c.text, c.start_index, c.end_index) for c in chunker.iter_chunks(text, buffer_size=1000)]
+    assert streamed == expected
+    assert max(len(chunk_text) for chunk_text, _, _ in streamed) <= 200
+    assert all(chunk_text == text[start:end] for chunk_text, start, end in streamed)
+    assert expected[-1][0] == "x" * 50
+
+def test_chunk_batch_matches_chunk_text():
+    """Test that the columnar batch views back to the same chunks."""
+    text = "One sentence. Two sentences here! Three? " * 20
+    metadata = Metadata(title="doc")
+    chunker = SemanticChunker(chunk_size=60, overlap=20)
+    batch = chunker.chunk_batch(text, metadata)
+
+    assert batch.starts.dtype == np.int64 and len(batch) == len(chunker.chunk_text(text))
+    assert [(chunk.text, chunk.start_index, chunk.end_index) for chunk in batch] == [
+        (chunk.text, chunk.start_index, chunk.end_index) for chunk in chunker.chunk_text(text, metadata)
+    ]
+    assert batch[-1].metadata is metadata and batch.texts[0] == batch[0].text
+
+PYTHON_SOURCE = '''"""Module docstring."""
+import os
+
+# Explains f
+def f():
+    s = "def fake(): pass"
+    return s
+
+@decorator
+class Big:
+    """Doc."""
+
+    def a(self):
+        return 1
+
+    def b(self):
+        return 2
+'''
+
+def test_code_chunker_python_keeps_whole_definitions():
+    """Test that Python is split at statements with decorators, comments and preamble kept."""
+    chunks = CodeChunker(chunk_size=80).chunk_text(PYTHON_SOURCE)
+
+    assert "".join(chunk.text for chunk in chunks) == PYTHON_SOURCE
+    assert [chunk.text.splitlines()[0] for chunk in chunks] == [
+        '"""Module docstring."""', "# Explains f", "@decorator", "    def b(self):"
+    ]
+    assert all(chunk.text == PYTHON_SOURCE[chunk.start_index:chunk.end_index] for chunk in chunks)
+    assert len(CodeChunker(chunk_size=1000).chunk_text(PYTHON_SOURCE)) == 1
+
+def test_code_chunker_brace_fallback():
+    """Test that other languages split at unindented lines outside brackets."""
+    source = "import x from 'y';\n\n// Does things\nfunction foo(a) {\n  if (a) {\n    return 1;\n  }\n}\n"
+    chunks = CodeChunker(chunk_size=40, language="javascript").chunk_text(source)
+
+    assert [chunk.text for chunk in chunks] == [
+        "import x from 'y';\n\n",
+        "// Does things\nfunction foo(a) {\n",
+        "  if (a) {\n    return 1;\n  }\n}\n",
+    ]
+
+def test_code_chunker_ignores_brackets_in_strings_and_comments():
+    """Test that brackets inside string literals and comments do not change nesting."""
+    source = (
+        'const s = "{";\n'
+        "/* open { */\n"
+        "function a() { return '('; } // }\n"
+        "function b() {\n  return `)`;\n}\n"
+    )
+    chunks = CodeChunker(chunk_size=50, language="javascript").chunk_text(source)
+
+    assert [chunk.text for chunk in chunks] == [
+        'const s = "{";\n',
+        "/* open { */\nfunction a() { return '('; } // }\n",
+        "function b() {\n  return `)`;\n}\n",
+    ]
+
+class TopicEmbeddings(FakeEmbeddings):
+    """Embeds sentences by topic so similarity drops at topic changes."""
+
+    def _vector(self, text):
+        return [1.0, 0.1, 0.0] if "cat" in text.lower() else [0.0, 0.1, 1.0]
+
+def test_semantic_chunker_splits_at_similarity_drop():
+    """Test that similarity mode splits at the topic change with batched, cached embeddings."""
+    text = (
+        "The cat sat on the mat. Another cat chased it. Cats like warm spots. "
+        "Stocks fell sharply today. Markets fear rates. Investors sold bonds."
+    )
+    embeddings = TopicEmbeddings()
+    chunker = SemanticChunker(chunk_size=500, embeddings=embeddings, min_chunk_size=10)
+
+    chunks = chunker.chunk_text(text)
+    assert [chunk.text for chunk in chunks] == [
+        "The cat sat on the mat. Another cat chased it. Cats like warm spots.",
+        "Stocks fell sharply today. Markets fear rates. Investors sold bonds.",
+    ]
+    assert len(embeddings.calls) == 1 and len(embeddings.calls[0]) == 6
+
+    chunker.chunk_text(text)
+    assert len(embeddings.calls) == 1
+    assert len(SemanticChunker(chunk_size=40, embeddings=embeddings, min_chunk_size=10).chunk_text(text)) > 2
+
+def test_similarity_chunker_pickles_with_provider_client():
+    """Test that a similarity chunker on a real provider client can be sent to worker processes."""
+    embeddings = OpenAIEmbeddings(api_key="dummy", model="text-embedding-3-large", base_url="http://localhost:1/v1")
+    chunker = SemanticChunker(embeddings=embeddings)
+    assert chunker.batcher is not None
+
+    copy = pickle.loads(pickle.dumps(chunker))
+    assert isinstance(copy.embeddings, OpenAIEmbeddings)
+    assert copy.embeddings.model == "text-embedding-3-large"
+    assert str(copy.embeddings.client.base_url) == "http://localhost:1/v1/"
+    assert copy.batcher.embeddings.embeddings is copy.embeddings
@@ -0,0 +1,91 @@
+"""
+Tests for near-duplicate chunk detection.
+"""
+
+import pytest
+from docvector import DocumentProcessor, SemanticChunker
+from docvector.dedup import MinHashDeduplicator
+from docvector.types import Chunk
+
+DISCLAIMER = (
+    "This email and any attachments are confidential and intended solely for the use of the "
+    "individual to whom they are addressed. If you have received this email in error please notify the sender."
+)
+
+def _chunk(text):
+    return Chunk(text=text, start_index=0, end_index=len(text))
+
+def test_minhash_finds_near_duplicates():
+    """Test that reworded and re-cased boilerplate maps to the first occurrence."""
+    deduplicator = MinHashDeduplicator(threshold=0.8)
+    original = _chunk(DISCLAIMER)
+    unrelated = _chunk("Quarterly revenue grew by twelve percent, driven by demand in the enterprise segment.")
+    reworded = _chunk(DISCLAIMER.replace("notify the sender", "notify the sender immediately"))
+    shouted = _chunk(DISCLAIMER.upper())
+
+    unique, duplicates = deduplicator.split([original, unrelated, reworded, shouted])
+
+    assert unique == [original, unrelated]
+    assert duplicates == [(reworded, 0), (shouted, 0)]
+    assert deduplicator.duplicates == 2
+    # Drop mode keeps signatures only, never chunks or embeddings
+    assert not deduplicator._pending and not deduplicator._embeddings
+    with pytest.raises(ValueError):
+        MinHashDeduplicator(mode="merge")
+
+def test_processor_skips_embedding_duplicates_across_files(tmp_path, fake_embeddings):
+    """Test that boilerplate repeated across files is embedded once and linked or dropped."""
+    first = tmp_path / "first.txt"
+    second = tmp_path / "second.txt"
+    first.write_text(f"Welcome to the first report. {DISCLAIMER}")
+    second.write_text(f"Numbers for the second report follow. {DISCLAIMER}")
+    chunker = SemanticChunker(chunk_size=130, overlap=0)
+
+    linking = DocumentProcessor(chunker=chunker, embeddings=fake_embeddings,
+                                deduplicator=MinHashDeduplicator(mode="link"))
+    linking.process(str(first))
+    document = linking.process(str(second))
+    last_sentence = "If you have received this email in error please notify the sender."
+    assert [text for call in fake_embeddings.calls for text in call].count(last_sentence) == 1
+    assert all(chunk.embedding is not None for chunk in document.chunks)
+    assert not linking.deduplicator._pending
+
+    dropping = DocumentProcessor(chunker=chunker, embeddings=fake_embeddings, deduplicator=MinHashDeduplicator())
+    dropping.process(str(first))
+    texts = [chunk.text for chunk in dropping.process(str(second)).chunks]
+    assert texts == ["Numbers for the second report follow."]
+
+@pytest.mark.parametrize("mode", ["drop", "link"])
+def test_duplicates_of_a_failed_document_are_still_indexed(tmp_path, fake_embeddings, mode):
+    """Test that chunks of a document whose embedding fails do not stay canonical."""
+    class RejectingEmbeddings(type(fake_embeddings)):
+        def embed_batch(self, texts):
+            if any("poison" in text for text in texts):
+                raise ValueError("input too long")
+            return super().embed_batch(texts)
+
+    poison = tmp_path / "poison.txt"
+    second = tmp_path / "second.txt"
+    poison.write_text(f"This poison report is rejected. {DISCLAIMER}")
+    second.write_text(f"Numbers for the second report follow. {DISCLAIMER}")
+    processor = DocumentProcessor(chunker=SemanticChunker(chunk_size=130, overlap=0),
+                                  embeddings=RejectingEmbeddings(), deduplicator=MinHashDeduplicator(mode=mode))
+    failed, = processor.process_many([str(poison)], workers=1)
+    indexed, = processor.process_many([str(second)], workers=1)
+
+    assert "input too long" in failed.error
+    chunks = indexed.document.chunks
+    assert [chunk.text for chunk in chunks][1:] == [chunk.text for chunk in processor.chunker.chunk_text(DISCLAIMER)]
+    assert all(chunk.embedding is not None for chunk in chunks)
+    assert processor.deduplicator.duplicates == 0
+    assert not processor.deduplicator._pending
+
+def test_link_mode_without_embeddings_keeps_no_pending_chunks(tmp_path):
+    """Test that canonical chunks are not held waiting for an embedding that never comes."""
+    path = tmp_path / "first.txt"
+    path.write_text(f"Welcome to the first report. {DISCLAIMER}")
+    processor = DocumentProcessor(chunker=SemanticChunker(chunk_size=130, overlap=0),
+                                  deduplicator=MinHashDeduplicator(mode="link"))
+    processor.process(str(path))
+
+    assert not processor.deduplicator._pending
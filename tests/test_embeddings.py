@@ -1 +1,202 @@
- 
\ No newline at end of file
+"""
+Tests for embedding generation.
+"""
+
+import asyncio
+import base64
+import json
+import pickle
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytest
+from docvector.batching import EmbeddingBatcher, RateLimiter, iter_batches
+from docvector.cache import CachedEmbeddings, EmbeddingCache
+from docvector.chunking import SemanticChunker
+from docvector.embeddings import EmbeddingFactory, OpenAIEmbeddings
+from docvector.types import Chunk
+
+class StubEmbeddingServer(ThreadingHTTPServer):
+    """Local OpenAI-compatible embeddings endpoint that tracks concurrency."""
+
+    def __init__(self, delay: float = 0.05):
+        super().__init__(("127.0.0.1", 0), StubEmbeddingHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.encoding_format = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+class StubEmbeddingHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.requests += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(server.delay)
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        server.encoding_format = body.get("encoding_format")
+        vectors = [[float(len(text)), 1.0] for text in inputs]
+        if server.encoding_format == "base64":
+            vectors = [base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii") for vector in vectors]
+        payload = json.dumps({
+            "object": "list",
+            "model": body["model"],
+            "data": [
+                {"object": "embedding", "index": i, "embedding": vector}
+                for i, vector in enumerate(vectors)
+            ],
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        }).encode("utf-8")
+        with server.lock:
+            server.in_flight -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    """Run a stub embeddings server for the duration of a test."""
+    server = StubEmbeddingServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_iter_batches_respects_count_and_token_limits():
+    """Test that batches are split on both count and token limits."""
+    texts = ["a" * 40] * 10
+    assert list(iter_batches(texts, max_batch_size=4, max_batch_tokens=1000)) == [(0, 4), (4, 8), (8, 10)]
+    # Each text is estimated at 11 tokens, so only two fit under 25
+    assert list(iter_batches(texts[:5], max_batch_size=100, max_batch_tokens=25)) == [(0, 2), (2, 4), (4, 5)]
+
+def test_iter_batches_oversized_text_gets_own_batch():
+    """Test that a text over the token limit is still emitted."""
+    texts = ["short", "x" * 1000, "short"]
+    assert list(iter_batches(texts, max_batch_size=10, max_batch_tokens=50)) == [(0, 1), (1, 2), (2, 3)]
+
+def test_embed_chunks_uses_batches_in_order(fake_embeddings):
+    """Test that chunk embeddings are mapped back in order."""
+    chunks = [Chunk(text=f"chunk {i}", start_index=i, end_index=i + 1) for i in range(10)]
+    batcher = EmbeddingBatcher(fake_embeddings, max_batch_size=3)
+    batcher.embed_chunks(chunks)
+
+    assert [len(call) for call in fake_embeddings.calls] == [3, 3, 3, 1]
+    for chunk in chunks:
+        assert chunk.embedding == fake_embeddings._vector(chunk.text)
+
+def test_async_openai_embeddings_bounded_concurrency(stub_server):
+    """Test that async batches are in flight concurrently but bounded."""
+    embeddings = OpenAIEmbeddings(api_key="dummy_key", base_url=stub_server.url)
+    batcher = EmbeddingBatcher(embeddings, max_batch_size=2, max_concurrency=3)
+    texts = ["x" * i for i in range(1, 21)]
+
+    vectors = asyncio.run(batcher.aembed_texts(texts))
+
+    assert [vector[0] for vector in vectors] == [float(len(text)) for text in texts]
+    assert stub_server.requests == 10
+    assert 1 < stub_server.max_in_flight <= 3
+
+def test_openai_embeddings_decode_base64_arrays(stub_server):
+    """Test that OpenAI embeddings are requested as base64 and decoded into arrays."""
+    embeddings = OpenAIEmbeddings(api_key="dummy_key", base_url=stub_server.url)
+    vectors = EmbeddingBatcher(embeddings, max_batch_size=2).embed_texts_array(["a", "bb", "ccc"])
+
+    assert stub_server.encoding_format == "base64"
+    assert vectors.dtype == np.float32
+    assert vectors.tolist() == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    assert embeddings.embed_text("dddd") == [4.0, 1.0]
+
+def test_async_embeddings_fall_back_to_executor(fake_embeddings):
+    """Test that providers without an async client still work asynchronously."""
+    chunks = [Chunk(text=f"chunk {i}", start_index=i, end_index=i + 1) for i in range(5)]
+    batcher = EmbeddingBatcher(fake_embeddings, max_batch_size=2)
+    asyncio.run(batcher.aembed_chunks(chunks))
+
+    assert [len(call) for call in fake_embeddings.calls] == [2, 2, 1]
+    assert all(chunk.embedding == fake_embeddings._vector(chunk.text) for chunk in chunks)
+
+def test_rate_limiter_waits_for_token_budget():
+    """Test that the limiter delays requests once the token budget is spent."""
+    limiter = RateLimiter(tokens_per_minute=6000)
+
+    async def run():
+        await limiter.acquire(6000)
+        start = time.monotonic()
+        await limiter.acquire(10)
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.08
+
+def test_cached_embeddings_persist_across_instances(tmp_path, fake_embeddings):
+    """Test that cached vectors are reused from memory and from disk."""
+    path = str(tmp_path / "cache.sqlite")
+    cached = CachedEmbeddings(fake_embeddings, EmbeddingCache(path))
+
+    first = cached.embed_batch(["alpha", "beta", "alpha"])
+    assert fake_embeddings.calls == [["alpha", "beta"]]
+    assert cached.embed_text("beta") == first[1]
+    assert len(fake_embeddings.calls) == 1
+    cached.cache.close()
+
+    reopened = CachedEmbeddings(fake_embeddings, EmbeddingCache(path))
+    vectors = reopened.embed_batch(["alpha", "gamma"])
+    assert fake_embeddings.calls[1:] == [["gamma"]]
+    assert np.allclose(vectors[0], first[0], atol=1e-6)
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.stats()["misses"] == 1
+
+def test_cached_embeddings_empty_batch(fake_embeddings):
+    """Test that empty batches return empty results without calling the provider."""
+    cached = CachedEmbeddings(fake_embeddings, EmbeddingCache())
+
+    assert cached.embed_batch([]) == []
+    assert cached.embed_batch_array([]).shape == (0, 0)
+    assert asyncio.run(cached.aembed_batch([])) == []
+    assert fake_embeddings.calls == []
+
+def test_embedding_cache_evicts_by_size():
+    """Test that the in-memory LRU stays within its byte budget."""
+    cache = EmbeddingCache(max_memory_bytes=3 * 4 * 8)
+    for i in range(5):
+        cache.put_many({bytes([i]): np.zeros(8, dtype=np.float32)})
+
+    assert cache.stats()["memory_entries"] == 3
+    assert set(cache.get_many([bytes([0]), bytes([4])])) == {bytes([4])}
+
+def test_embedding_factory_returns_cached_wrapper(tmp_path):
+    """Test that the factory wraps the provider when a cache path is given."""
+    embeddings = EmbeddingFactory.create("openai", api_key="dummy_key", cache_path=str(tmp_path / "cache.sqlite"))
+    assert isinstance(embeddings, CachedEmbeddings)
+    assert isinstance(embeddings.embeddings, OpenAIEmbeddings)
+
+def test_cached_embeddings_pickle_reopens_cache(tmp_path):
+    """Test that a cached provider can be sent to worker processes and shares the cache file."""
+    embeddings = EmbeddingFactory.create(
+        "openai", api_key="dummy_key", cache_path=str(tmp_path / "cache.sqlite"), cache_memory_bytes=4096
+    )
+    key = embeddings._key("alpha")
+    embeddings.cache.put_many({key: np.ones(8, dtype=np.float32)})
+
+    copy = pickle.loads(pickle.dumps(embeddings))
+    assert isinstance(copy.embeddings, OpenAIEmbeddings)
+    assert copy.cache is not embeddings.cache
+    assert copy.cache.max_memory_bytes == 4096
+    assert copy.embed_batch(["alpha"]) == [[1.0] * 8]
+    assert copy.stats()["disk_hits"] == 1
+    chunker = pickle.loads(pickle.dumps(SemanticChunker(embeddings=embeddings)))
+    assert chunker.embeddings.cache.path == embeddings.cache.path
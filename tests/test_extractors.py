@@ -0,0 +1,121 @@
+"""
+Tests for text extractors.
+"""
+
+import json
+import pytest
+from docvector import DocumentProcessor
+from docvector.extractors import detect_mime_type, get_extractor
+
+def _extract(path, read_size=64 * 1024):
+    extractor = get_extractor(detect_mime_type(str(path)))
+    return "".join(extractor.iter_text(str(path), read_size=read_size))
+
+def test_html_extraction_streams_visible_text(tmp_path):
+    """Test that HTML is converted to text across read blocks."""
+    path = tmp_path / "page.html"
+    path.write_text(
+        "<html><head><style>p { color: red; }</style><script>var x = 1;</script></head>"
+        "<body><h1>Title</h1><p>First &amp; second.</p><p>Third paragraph.</p></body></html>"
+    )
+    text = _extract(path, read_size=16)
+
+    assert detect_mime_type(str(path)) == "text/html"
+    assert "Title" in text and "First & second." in text and "Third paragraph." in text
+    assert "color" not in text and "var x" not in text
+
+def test_markdown_extraction_renders_blocks(tmp_path):
+    """Test that Markdown is detected by extension and rendered to text."""
+    pytest.importorskip("markdown")
+    path = tmp_path / "notes.md"
+    path.write_text("# Heading\n\nSome *emphasis* here.\n\n```\ncode\n\nblock\n```\n\nLast.\n")
+    text = _extract(path, read_size=10)
+
+    assert detect_mime_type(str(path)) == "text/markdown"
+    assert "Heading" in text and "Some emphasis here." in text and "Last." in text
+    assert "*" not in text and "#" not in text
+
+def test_json_extraction_flattens_values(tmp_path):
+    """Test that JSON leaves are emitted with their paths."""
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"title": "Report", "sections": [{"body": "Intro text"}]}))
+    text = _extract(path)
+
+    assert "title: Report" in text
+    assert "sections[0].body: Intro text" in text
+
+def test_json_extraction_streams_across_blocks(tmp_path):
+    """Test that JSON is tokenized block by block with the same output as a full parse."""
+    data = {"items": [{"id": i, "score": i / 4, "tags": ["a\"b", "日本"], "ok": i % 2 == 0, "none": None}
+                      for i in range(50)], "total": 1e-7}
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    lines = _extract(path, read_size=7).splitlines()
+
+    assert len(lines) == 50 * 5 + 1
+    assert lines[:5] == ["items[0].id: 0", "items[0].score: 0.0", 'items[0].tags[0]: a"b', "items[0].tags[1]: 日本", "items[0].ok: True"]
+    assert lines[-1] == "total: 1e-07"
+    path.write_text('{"items": [1, 2')
+    with pytest.raises(ValueError):
+        _extract(path, read_size=4)
+
+def test_docx_extraction(tmp_path):
+    """Test that DOCX paragraphs, tables and properties are extracted in document order."""
+    docx = pytest.importorskip("docx")
+    path = tmp_path / "report.docx"
+    document = docx.Document()
+    document.core_properties.author = "Ada"
+    document.add_paragraph("First paragraph.")
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Name"
+    table.cell(0, 1).text = "Value"
+    document.add_paragraph("Second paragraph.")
+    document.save(str(path))
+
+    processed = DocumentProcessor().process(str(path))
+    assert processed.content == "First paragraph.\nName\tValue\nSecond paragraph.\n"
+    assert processed.metadata.author == "Ada"
+
+def test_unregistered_mime_type():
+    """Test that unknown MIME types are rejected."""
+    with pytest.raises(ValueError):
+        get_extractor("application/x-unknown")
+
+def test_detection_probes_each_file_version_once(tmp_path, monkeypatch):
+    """Test that libmagic is consulted once per (path, mtime, size)."""
+    from docvector import extractors
+
+    class CountingMagic:
+        def __init__(self):
+            self.calls = 0
+
+        def from_buffer(self, header):
+            self.calls += 1
+            return "text/plain"
+
+    detector = CountingMagic()
+    monkeypatch.setattr(extractors, "_get_magic", lambda: detector)
+    extractors._detect_cached.cache_clear()
+
+    path = tmp_path / "doc.txt"
+    path.write_text("First version.")
+    DocumentProcessor().process(str(path))
+    assert detector.calls == 1
+    assert detect_mime_type(str(path)) == "text/plain"
+    assert detector.calls == 1
+
+    path.write_text("Second, longer version.")
+    assert detect_mime_type(str(path)) == "text/plain"
+    assert detector.calls == 2
+
+def test_detection_falls_back_to_extension(tmp_path, monkeypatch):
+    """Test extension-based detection when libmagic is unavailable."""
+    from docvector import extractors
+
+    monkeypatch.setattr(extractors, "_get_magic", lambda: None)
+    extractors._detect_cached.cache_clear()
+    path = tmp_path / "page.htm"
+    path.write_text("<p>Hello</p>")
+
+    assert detect_mime_type(str(path)) == "text/html"
+    assert detect_mime_type(str(tmp_path / "page.htm")) == "text/html"
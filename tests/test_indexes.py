@@ -0,0 +1,111 @@
+"""
+Tests for approximate nearest neighbour indexes.
+"""
+
+import numpy as np
+import pytest
+from docvector import InMemoryVectorStore
+from docvector.indexes import HNSWIndex, IVFPQIndex, recall_report
+from docvector.types import Chunk, Document
+
+def _unit_vectors(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_hnsw_recall_and_removal():
+    """Test that HNSW finds nearly all exact neighbours and skips removed ids."""
+    vectors = _unit_vectors(400)
+    queries = _unit_vectors(20, seed=1)
+    index = HNSWIndex(M=8, ef_construction=64, ef_search=64)
+    index.add(vectors, np.arange(400))
+
+    report = recall_report(index, vectors, np.arange(400), queries, k=5, settings=[{"ef_search": 64}])
+    assert report[0]["recall"] >= 0.9
+    assert index.ef_search == 64
+
+    ids, _ = index.search(vectors[:1], 1)
+    assert ids[0, 0] == 0
+    index.remove([0])
+    ids, _ = index.search(vectors[:1], 1)
+    assert ids[0, 0] != 0
+    assert len(index) == 399
+
+def test_hnsw_save_and_load(tmp_path):
+    """Test that a saved index answers queries identically after loading."""
+    vectors = _unit_vectors(200)
+    index = HNSWIndex(M=6, ef_construction=32)
+    index.add(vectors, np.arange(100, 300))
+    index.remove([150])
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+
+    loaded = HNSWIndex.load(path)
+    queries = _unit_vectors(5, seed=2)
+    assert np.array_equal(loaded.search(queries, 5)[0], index.search(queries, 5)[0])
+    assert len(loaded) == 199
+
+def test_store_with_index():
+    """Test that the in-memory store delegates search to its index."""
+    vectors = _unit_vectors(50)
+    chunks = [Chunk(text=f"chunk {i}", start_index=i, end_index=i + 1, embedding=list(v)) for i, v in enumerate(vectors)]
+    store = InMemoryVectorStore(index=HNSWIndex(M=8, ef_construction=32))
+    store.add_document(Document(content="", chunks=chunks, id="doc"))
+
+    assert store.search(vectors[7], limit=1)[0][0].content == "chunk 7"
+    assert store.delete_document("doc")
+    assert len(store) == 0 and store.search(vectors[7]) == []
+
+def test_hnswlib_backend_matches_interface(tmp_path):
+    """Test the compiled backend when hnswlib is installed."""
+    pytest.importorskip("hnswlib")
+    from docvector.indexes import HnswlibIndex
+
+    vectors = _unit_vectors(100)
+    index = HnswlibIndex(M=8, ef_construction=32, initial_capacity=10)
+    index.add(vectors, np.arange(100))
+    index.remove([3])
+    path = str(tmp_path / "index.bin")
+    index.save(path)
+
+    loaded = HnswlibIndex.load(path)
+    ids, _ = loaded.search(vectors[3:5], 1)
+    assert ids[1, 0] == 4 and ids[0, 0] != 3
+    assert len(loaded) == 99
+
+def test_ivfpq_trains_and_reranks(tmp_path):
+    """Test that IVF-PQ searches exactly before training and reranks after."""
+    vectors = _unit_vectors(600)
+    index = IVFPQIndex(n_lists=8, n_subvectors=4, n_probe=8, rerank=50, train_size=300)
+    index.add(vectors[:100], np.arange(100))
+    assert not index.is_trained
+    assert index.search(vectors[5:6], 1)[0][0, 0] == 5
+
+    index.add(vectors[100:], np.arange(100, 600))
+    assert index.is_trained and len(index) == 600
+    assert all(codes.dtype == np.uint8 for codes in index._codes)
+    report = recall_report(index, vectors, np.arange(600), _unit_vectors(20, seed=1), k=5)
+    assert report[0]["recall"] >= 0.9
+
+    index.remove([5])
+    assert index.search(vectors[5:6], 1)[0][0, 0] != 5
+    path = str(tmp_path / "ivfpq.npz")
+    index.save(path)
+    loaded = IVFPQIndex.load(path)
+    queries = _unit_vectors(5, seed=2)
+    assert np.array_equal(loaded.search(queries, 5)[0], index.search(queries, 5)[0])
+    assert len(loaded) == 599
+
+def test_store_keeps_vectors_only_in_ivfpq_index():
+    """Test that a store backed by IVF-PQ does not also keep embedding lists on its chunks."""
+    vectors = _unit_vectors(50)
+    chunks = [
+        Chunk(text=f"chunk {i}", start_index=i, end_index=i + 1, embedding=vector.tolist())
+        for i, vector in enumerate(vectors)
+    ]
+    store = InMemoryVectorStore(index=IVFPQIndex(n_lists=4, n_subvectors=4, train_size=40))
+    store.add_document(Document(content="", chunks=chunks, id="doc"))
+
+    assert all(chunk.embedding is None for chunk in store._chunks)
+    doc, _ = store.search(vectors[7], limit=1)[0]
+    assert doc.content == "chunk 7"
+    assert chunks[7].embedding is not None
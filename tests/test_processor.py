@@ -4,8 +4,11 @@ Tests for the document processor.
 
 import os
 import pytest
-from docvector import DocumentProcessor, SemanticChunker, OpenAIEmbeddings
+from docvector import DocumentProcessor, InMemoryVectorStore, SegmentedVectorStore, SemanticChunker, OpenAIEmbeddings
+from docvector.manifest import IndexManifest
 from docvector.types import Document, Metadata
+from docvector.vector_stores import PineconeStore
+from conftest import FakePineconeIndex
 
 def test_document_processor_initialization():
     """Test document processor initialization."""
@@ -57,4 +60,166 @@ def test_unsupported_file_type(tmp_path):
     # Process the file
     processor = DocumentProcessor()
     with pytest.raises(ValueError):
-        processor.process(str(test_file)) 
\ No newline at end of file
+        processor.process(str(test_file))
+
+def test_document_processing_batches_embeddings(tmp_path, fake_embeddings):
+    """Test that chunk embeddings are generated with batched calls."""
+    test_file = tmp_path / "test.txt"
+    test_file.write_text(" ".join(f"Sentence number {i}." for i in range(200)))
+
+    processor = DocumentProcessor(chunker=SemanticChunker(chunk_size=100, overlap=1), embeddings=fake_embeddings)
+    document = processor.process(str(test_file))
+
+    assert len(document.chunks) > 1
+    assert all(chunk.embedding is not None for chunk in document.chunks)
+    # One call for the document plus a single batch for all chunks
+    assert len(fake_embeddings.calls) == 2
+
+def test_iter_process_streams_to_vector_store(tmp_path, fake_embeddings):
+    """Test that streamed chunks are embedded and stored in batches."""
+    test_file = tmp_path / "test.txt"
+    text = " ".join(f"Sentence number {i}." for i in range(300))
+    test_file.write_text(text)
+
+    class RecordingStore:
+        def __init__(self):
+            self.batches = []
+
+        def add_chunks(self, document_id, chunks, start=0):
+            self.batches.append((document_id, start, len(chunks)))
+            return []
+
+        def flush(self):
+            pass
+
+    store = RecordingStore()
+    processor = DocumentProcessor(chunker=SemanticChunker(chunk_size=100, overlap=0), embeddings=fake_embeddings)
+    processor.read_size = 256
+    chunks = list(processor.iter_process(str(test_file), vector_store=store, store_batch_size=10))
+
+    assert [chunk.text for chunk in chunks] == [chunk.text for chunk in processor.chunker.chunk_text(text)]
+    assert all(chunk.embedding is not None for chunk in chunks)
+    assert store.batches[0] == ("test.txt", 0, 10)
+    assert sum(size for _, _, size in store.batches) == len(chunks)
+
+def test_iter_process_flushes_buffered_store(tmp_path, fake_embeddings):
+    """Test that a store buffering its writes has every chunk sent once streaming ends."""
+    test_file = tmp_path / "test.txt"
+    test_file.write_text(" ".join(f"Sentence number {i}." for i in range(50)))
+    index = FakePineconeIndex()
+    store = PineconeStore(index=index, batch_size=1000)
+    processor = DocumentProcessor(chunker=SemanticChunker(chunk_size=100, overlap=0), embeddings=fake_embeddings)
+
+    chunks = list(processor.iter_process(str(test_file), vector_store=store, store_batch_size=4))
+    assert len(index.vectors) == len(chunks) > 4
+
+def test_reindex_only_embeds_changed_chunks(tmp_path, fake_embeddings):
+    """Test that re-indexing skips unchanged files and chunks and deletes vanished ones."""
+    test_file = tmp_path / "notes.txt"
+    test_file.write_text("First sentence here. Second sentence here. Third sentence here.")
+    store = InMemoryVectorStore(embeddings=fake_embeddings)
+    manifest = IndexManifest(str(tmp_path / "manifest.db"))
+    processor = DocumentProcessor(chunker=SemanticChunker(chunk_size=25, overlap=0), embeddings=fake_embeddings)
+
+    assert processor.reindex(str(test_file), store, manifest).added == 3
+    assert processor.reindex(str(test_file), store, manifest).skipped
+
+    fake_embeddings.calls.clear()
+    test_file.write_text("New opening line. First sentence here. Third sentence here.")
+    result = processor.reindex(str(test_file), store, manifest)
+
+    assert (result.added, result.unchanged, result.deleted) == (1, 2, 1)
+    assert fake_embeddings.calls == [["New opening line."]]
+    assert len(store) == 3
+    assert store.search("New opening line.", limit=1)[0][0].content == "New opening line."
+
+def test_reindex_records_manifest_after_store_flush(tmp_path, fake_embeddings):
+    """Test that the manifest is written only after the store has persisted the chunks."""
+    test_file = tmp_path / "notes.txt"
+    test_file.write_text("First sentence here. Second sentence here. Third sentence here.")
+    manifest = IndexManifest(str(tmp_path / "manifest.db"))
+    processor = DocumentProcessor(chunker=SemanticChunker(chunk_size=25, overlap=0), embeddings=fake_embeddings)
+
+    failing = PineconeStore(index=FakePineconeIndex(failures=10), max_retries=0)
+    with pytest.raises(ConnectionError):
+        processor.reindex(str(test_file), failing, manifest)
+    assert manifest.fingerprint("notes.txt") is None
+
+    processor.reindex(str(test_file), SegmentedVectorStore(str(tmp_path / "store")), manifest)
+    assert len(SegmentedVectorStore(str(tmp_path / "store"))) == 3
+
+def test_process_many_isolates_errors(tmp_path, fake_embeddings):
+    """Test parallel processing with shared embedding batches and per-file errors."""
+    for i in range(5):
+        (tmp_path / f"doc{i}.txt").write_text(f"Document {i}. It has two sentences.")
+    (tmp_path / "broken.xyz").write_bytes(b"\x00\x01\x02\x03" * 64)
+
+    processor = DocumentProcessor(embeddings=fake_embeddings)
+    results = {os.path.basename(r.file_path): r for r in processor.process_directory(str(tmp_path), workers=2)}
+
+    assert len(results) == 6
+    assert results["broken.xyz"].document is None
+    assert "Unsupported file type" in results["broken.xyz"].error
+    for i in range(5):
+        document = results[f"doc{i}.txt"].document
+        assert document.embedding is not None
+        assert all(chunk.embedding is not None for chunk in document.chunks)
+    # Contents and chunks of all five small documents share one batch
+    assert len(fake_embeddings.calls) == 1
+
+def test_process_many_isolates_rejected_documents(tmp_path, fake_embeddings):
+    """Test that a document the provider rejects fails only its own file."""
+    class RejectingEmbeddings(type(fake_embeddings)):
+        def embed_batch(self, texts):
+            if any("poison" in text for text in texts):
+                raise ValueError("input too long")
+            return super().embed_batch(texts)
+
+    for name in ("a", "poison", "b"):
+        (tmp_path / f"{name}.txt").write_text(f"The {name} document. It has two sentences.")
+    processor = DocumentProcessor(embeddings=RejectingEmbeddings())
+    results = {os.path.basename(r.file_path): r for r in processor.process_directory(str(tmp_path), workers=1)}
+
+    assert "input too long" in results["poison.txt"].error
+    assert results["a.txt"].document.embedding is not None
+    assert results["b.txt"].document.chunks[0].embedding is not None
+
+PDF_PATH = os.path.join(os.path.dirname(__file__), "..", "uploads", "2505.01074v1.pdf")
+
+def test_pdf_processing_fills_pages():
+    """Test PDF extraction with page count and per-chunk page numbers."""
+    pytest.importorskip("PyPDF2")
+    document = DocumentProcessor().process(PDF_PATH)
+
+    assert document.metadata.file_type == "application/pdf"
+    assert document.metadata.page_count == 12
+    assert "WirelessAgent" in document.content
+    pages = [chunk.page_number for chunk in document.chunks]
+    assert pages[0] == 1 and pages[-1] == 12
+    assert pages == sorted(pages)
+
+def test_pdf_opened_once_for_text_and_metadata(monkeypatch):
+    """Test that the page count and text come from the same PDF reader."""
+    pytest.importorskip("PyPDF2")
+    from docvector import extractors
+
+    open_pdf = extractors._open_pdf
+    opened = []
+    def counting_open(file_path):
+        opened.append(file_path)
+        return open_pdf(file_path)
+    monkeypatch.setattr(extractors, "_open_pdf", counting_open)
+
+    document = DocumentProcessor().process(PDF_PATH)
+    chunks = list(DocumentProcessor().iter_process(PDF_PATH))
+    assert document.metadata.page_count == chunks[0].metadata.page_count == 12
+    assert len(opened) == 2
+
+def test_pdf_pages_extracted_in_parallel():
+    """Test that page-parallel extraction preserves page order."""
+    pytest.importorskip("PyPDF2")
+    from docvector.extractors import iter_pdf_pages
+
+    sequential = list(iter_pdf_pages(PDF_PATH))
+    parallel = list(iter_pdf_pages(PDF_PATH, workers=2, pages_per_task=3, min_parallel_pages=1))
+    assert parallel == sequential
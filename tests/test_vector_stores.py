@@ -0,0 +1,298 @@
+"""
+Tests for vector stores.
+"""
+
+import contextlib
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from docvector import InMemoryVectorStore, SegmentedVectorStore
+from docvector.batching import EmbeddingBatcher
+from docvector import vector_stores
+from docvector.chunking import SemanticChunker
+from docvector.types import Chunk, ChunkBatch, Document, Metadata
+from docvector.segments import write_segment_blocks
+from docvector.vector_stores import MilvusStore, PineconeStore, QdrantStore, WeaviateStore
+from conftest import FakePineconeIndex
+
+def _document(doc_id, vectors):
+    chunks = [
+        Chunk(text=f"{doc_id} chunk {i}", start_index=i, end_index=i + 1, embedding=list(vector))
+        for i, vector in enumerate(vectors)
+    ]
+    return Document(content="", metadata=Metadata(title=doc_id), chunks=chunks, id=doc_id)
+
+def test_in_memory_store_exact_search():
+    """Test that search returns the exact cosine top-k, best first."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 16)).astype(np.float32)
+    store = InMemoryVectorStore(initial_capacity=4)
+    store.add_documents([_document("a", vectors[:30]), _document("b", vectors[30:])])
+    assert len(store) == 50
+
+    query = rng.standard_normal(16)
+    results = store.search(query, limit=5)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+
+    assert [doc.content for doc, _ in results] == [
+        f"a chunk {i}" if i < 30 else f"b chunk {i - 30}" for i in expected
+    ]
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+def test_in_memory_store_batched_queries_and_delete(fake_embeddings):
+    """Test batched search, text queries and document deletion."""
+    store = InMemoryVectorStore(embeddings=fake_embeddings)
+    texts = ["alpha", "beta", "gamma"]
+    store.add_document(_document("doc", [fake_embeddings._vector(text) for text in texts]))
+
+    batch = store.search_vectors(np.asarray([fake_embeddings._vector(text) for text in texts]), limit=1)
+    assert [results[0][0].content for results in batch] == ["doc chunk 0", "doc chunk 1", "doc chunk 2"]
+    assert store.search("beta", limit=1)[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    assert store.delete_document("doc")
+    assert len(store) == 0
+    assert store.search("beta") == []
+
+def test_segmented_store_persists_and_compacts(tmp_path):
+    """Test flushing to segments, reopening, deletes, replacement and compaction."""
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((40, 8)).astype(np.float32)
+    store = SegmentedVectorStore(str(tmp_path), flush_size=10, max_segments=2)
+    store.add_documents([_document("a", vectors[:25]), _document("b", vectors[25:])])
+    store.delete_document("b")
+    store.add_chunks("a", _document("a", vectors[39:]).chunks, start=3)
+    store.flush()
+    assert len(store) == 25
+
+    reopened = SegmentedVectorStore(str(tmp_path))
+    assert len(reopened) == 25
+    doc, score = reopened.search(vectors[39], limit=1)[0]
+    assert (doc.id, doc.content, doc.chunks[0].start_index) == ("a", "a chunk 0", 0)
+    assert score == pytest.approx(1.0, abs=1e-5)
+    assert all(doc.id == "a" for doc, _ in reopened.search(vectors[30], limit=30))
+
+    reopened.compact()
+    store.refresh()
+    assert len(list(tmp_path.glob("*.dvs"))) == 1
+    assert len(store) == 25
+    assert store.search(vectors[10], limit=1)[0][0].content == "a chunk 10"
+
+def test_in_memory_store_consumes_chunk_batches(fake_embeddings):
+    """Test that an embedded ChunkBatch is stored and searched without Chunk objects."""
+    batch = SemanticChunker(chunk_size=12, overlap=0).chunk_batch("Alpha one. Beta two. Gamma three.")
+    EmbeddingBatcher(fake_embeddings).embed_chunk_batch(batch)
+    assert batch.embeddings.shape == (3, 8)
+
+    store = InMemoryVectorStore(embeddings=fake_embeddings)
+    assert store.add_chunk_batch("doc", batch) == ["doc_0", "doc_1", "doc_2"]
+    doc, score = store.search("Beta two.", limit=1)[0]
+    assert (doc.content, doc.chunks[0].start_index) == ("Beta two.", 11)
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+def test_search_many_embeds_queries_once(fake_embeddings):
+    """Test that text queries are embedded in one batch and cached across searches."""
+    store = InMemoryVectorStore(embeddings=fake_embeddings)
+    texts = ["alpha", "beta", "gamma"]
+    store.add_document(_document("doc", [fake_embeddings._vector(text) for text in texts]))
+    fake_embeddings.calls.clear()
+
+    results = store.search_many(["gamma", "alpha", fake_embeddings._vector("beta")], limit=1)
+    assert [hits[0][0].content for hits in results] == ["doc chunk 2", "doc chunk 0", "doc chunk 1"]
+    assert fake_embeddings.calls == [["gamma", "alpha"]]
+
+    store.search("alpha")
+    store.search_many(["gamma"])
+    assert len(fake_embeddings.calls) == 1
+    assert store.query_embedder.hits == 2
+
+class FakeWeaviateCollection:
+    """In-process stand-in for a Weaviate v4 collection without filter support."""
+
+    def __init__(self):
+        self.objects = {}
+        self.batches = []
+        self.hybrid_calls = []
+        self.batch = self
+        self.query = self
+        self.data = self
+        self.failed_objects = []
+
+    @contextlib.contextmanager
+    def fixed_size(self, batch_size, concurrent_requests):
+        self.batches.append((batch_size, concurrent_requests))
+        yield self
+
+    def add_object(self, properties, vector, uuid):
+        self.objects[uuid] = (properties, np.asarray(vector))
+
+    def near_vector(self, vector, limit, filters, return_metadata):
+        vector = np.asarray(vector) / np.linalg.norm(vector)
+        scored = sorted(
+            ((float(np.dot(vector, values) / np.linalg.norm(values)), properties)
+             for properties, values in self.objects.values()),
+            key=lambda item: -item[0]
+        )[:limit]
+        return SimpleNamespace(objects=[
+            SimpleNamespace(properties=properties, metadata=SimpleNamespace(distance=1 - score))
+            for score, properties in scored
+        ])
+
+    def hybrid(self, query, vector, alpha, limit, filters, return_metadata):
+        self.hybrid_calls.append((query, alpha))
+        response = self.near_vector(vector, limit, filters, None)
+        for obj in response.objects:
+            obj.metadata.score = 1 - obj.metadata.distance
+        return response
+
+class FakeWeaviateClient:
+    def __init__(self):
+        self.collection = None
+        self.collections = self
+
+    def exists(self, name):
+        return self.collection is not None
+
+    def create(self, name, **config):
+        self.collection = FakeWeaviateCollection()
+
+    def get(self, name):
+        return self.collection
+
+def test_pinecone_store_batches_upserts_across_documents():
+    """Test that upserts are packed across documents, split by size and retried."""
+    index = FakePineconeIndex(failures=2)
+    store = PineconeStore(index=index, batch_size=4, upsert_workers=2, retry_backoff=0)
+    vectors = np.eye(10, dtype=np.float32)
+    store.add_documents([_document("a", vectors[:3]), _document("b", vectors[3:10])])
+    assert sorted(index.requests) == [2, 4, 4]
+    assert len(index.vectors) == 10
+
+    hits = store.search(vectors[5], top_k=1)
+    assert hits[0][0].content == "b chunk 2"
+    assert hits[0][0].id == "b"
+
+    store.delete_document("a")
+    assert len(index.vectors) == 7
+
+    small = FakePineconeIndex()
+    store = PineconeStore(index=small, max_request_bytes=400)
+    store.add_document(_document("c", vectors[:6]))
+    assert sum(small.requests) == 6 and len(small.requests) > 1
+    store.close()
+
+def test_pinecone_store_raises_after_retries():
+    """Test that an upsert failing every attempt surfaces on flush."""
+    store = PineconeStore(index=FakePineconeIndex(failures=10), max_retries=2, retry_backoff=0)
+    store.add_chunks("a", _document("a", np.eye(3)).chunks)
+    with pytest.raises(ConnectionError):
+        store.flush()
+
+@pytest.mark.filterwarnings("ignore:Payload indexes")
+def test_qdrant_store_filters_and_batches(fake_embeddings):
+    """Test pipelined upserts, filtered search and batched queries against local Qdrant."""
+    pytest.importorskip("qdrant_client")
+    store = QdrantStore(":memory:", embeddings=fake_embeddings, batch_size=2)
+    texts = ["alpha", "beta", "gamma"]
+    report = _document("report", [fake_embeddings._vector(text) for text in texts])
+    notes = _document("notes", [fake_embeddings._vector(text) for text in texts])
+    for chunk in notes.chunks:
+        chunk.metadata = Metadata(title="notes", file_type="text/plain")
+    assert store.add_documents([report, notes]) == ["report", "notes"]
+
+    hits = store.search("beta", limit=2)
+    assert {doc.id for doc, _ in hits} == {"report", "notes"}
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    hits = store.search("beta", limit=2, filter={"file_type": "text/plain"})
+    assert [(doc.id, doc.content) for doc, _ in hits][0] == ("notes", "notes chunk 1")
+    assert all(doc.metadata.file_type == "text/plain" for doc, _ in hits)
+
+    results = store.search_many(["gamma", "alpha"], limit=1)
+    assert [hits[0][0].metadata.custom["chunk_index"] for hits in results] == [2, 0]
+
+    assert store.delete_document("notes")
+    assert store.delete_chunks(["report_0"]) == 1
+    hits = store.search("alpha", limit=5)
+    assert sorted(doc.content for doc, _ in hits) == ["report chunk 1", "report chunk 2"]
+    store.clear()
+    assert store.search("alpha") == []
+    store.close()
+
+@pytest.mark.filterwarnings("ignore:.*ORM-style")
+def test_milvus_store_columnar_inserts_and_search(tmp_path, fake_embeddings):
+    """Test column-wise inserts, ChunkBatch ingestion and filtered batched search on Milvus Lite."""
+    pytest.importorskip("milvus_lite")
+    store = MilvusStore(
+        uri=str(tmp_path / "milvus.db"),
+        embeddings=fake_embeddings,
+        index_type="IVF_FLAT",
+        index_params={"nlist": 4},
+        batch_size=2
+    )
+    texts = ["alpha", "beta", "gamma"]
+    store.add_documents([_document("report", [fake_embeddings._vector(text) for text in texts])])
+    batch = ChunkBatch.from_spans("alpha beta", [(0, 5), (6, 10)], Metadata(title="notes"))
+    batch.embeddings = np.stack([fake_embeddings._vector("alpha"), fake_embeddings._vector("beta")])
+    assert store.add_chunk_batch("notes", batch) == ["notes_0", "notes_1"]
+
+    hits = store.search("alpha", limit=2)
+    assert sorted(doc.content for doc, _ in hits) == ["alpha", "report chunk 0"]
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    queries = np.stack([fake_embeddings._vector("beta"), fake_embeddings._vector("gamma")])
+    results = store.search_vectors(queries, limit=1, filter={"document_id": "report"})
+    assert [hits[0][0].content for hits in results] == ["report chunk 1", "report chunk 2"]
+
+    assert store.delete_document("notes")
+    assert store.delete_chunks(["report_0"]) == 1
+    assert [doc.content for doc, _ in store.search("alpha", limit=1)] != ["alpha"]
+    store.clear()
+    assert store.search("alpha") == []
+    store.close()
+
+def test_weaviate_store_batch_import_and_hybrid_search(fake_embeddings):
+    """Test fixed-size batch import with our vectors and hybrid text queries."""
+    pytest.importorskip("weaviate")
+    client = FakeWeaviateClient()
+    store = WeaviateStore(
+        embeddings=fake_embeddings, batch_size=50, concurrent_requests=4, alpha=0.75, client=client
+    )
+    assert store.search("alpha") == []
+    texts = ["alpha", "beta", "gamma"]
+    store.add_documents([
+        _document("report", [fake_embeddings._vector(text) for text in texts]),
+        _document("notes", [fake_embeddings._vector("delta")])
+    ])
+    assert client.collection.batches == [(50, 4)]
+    assert len(client.collection.objects) == 4
+
+    hits = store.search("gamma", limit=1, alpha=0.3)
+    assert hits[0][0].content == "report chunk 2"
+    assert hits[0][0].metadata.custom["vector_id"] == "report_2"
+    assert client.collection.hybrid_calls == [("gamma", 0.3)]
+
+    results = store.search_many([fake_embeddings._vector("delta"), "beta"], limit=1)
+    assert [hits[0][0].id for hits in results] == ["notes", "report"]
+    assert results[0][0][1] == pytest.approx(1.0, abs=1e-5)
+    assert len(client.collection.hybrid_calls) == 1
+
+def test_segmented_store_merges_smallest_segments(tmp_path, monkeypatch):
+    """Test that flushing past max_segments streams a merge of small segments only."""
+    written = []
+    def counting_write(path, rows, dim, blocks, dtype="float32"):
+        blocks = list(blocks)
+        assert all(len(vectors) <= 4 for vectors, _ in blocks)
+        written.append(rows)
+        write_segment_blocks(path, rows, dim, blocks, dtype)
+    monkeypatch.setattr(vector_stores, "write_segment_blocks", counting_write)
+
+    vectors = np.random.default_rng(2).standard_normal((200, 8)).astype(np.float32)
+    store = SegmentedVectorStore(str(tmp_path), flush_size=10, max_segments=3, block_rows=4)
+    for start in range(0, 200, 10):
+        store.add_chunks("doc", _document("doc", vectors[start:start + 10]).chunks, start=start)
+    assert len(store._segments) <= 3
+    assert len(store) == 200
+    assert store.search(vectors[123], limit=1)[0][0].content == "doc chunk 3"
+    # Compacting everything on each overflow would rewrite 690 rows
+    assert sum(written) < 500